@@ -1,24 +1,28 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
-import base64
+from data_store import get_dataset
+from page_data import experience_distribution, home_overview, salary_trend, top_job_titles
+from figure_cache import cached_figure
+from assets import data_uri
+from rerun_timing import start_page, end_page
 
 # Page configuration
 st.set_page_config(page_title="Cybersecurity Salary Explorer", page_icon="🕵️‍♂️", layout="wide")
+# No widgets here; timed for comparison with the other pages (rerun_timing.py)
+start_page("home")
 
 # --- Banner Section ---
-banner_path = Path("images/digital_rain_banner.jpg")
-if banner_path.exists():
-    with open(banner_path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode()
+# Display-size, cached once per process (assets.py)
+banner_uri = data_uri("digital_rain_banner.jpg")
+if banner_uri:
     st.markdown(
         f"""
         <style>
         .banner {{
             width: 100%;
             height: 280px;
-            background: url("data:image/jpeg;base64,{b64}") no-repeat center center;
+            background: url("{banner_uri}") no-repeat center center;
             background-size: cover;
             border-radius: 12px;
             margin-bottom: 25px;
@@ -75,20 +79,22 @@ and predict your future earnings** based on real data.
 """)
 
 # --- Load Dataset ---
-df = pd.read_csv('salaries_cyber_clean.csv')
+data = get_dataset()
+df = data.df
+overview = home_overview(data)
 
 # --- Dataset Overview ---
 st.subheader("📊 Dataset at a Glance")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Total Records", f"{df.shape[0]:,}")
+    st.metric("Total Records", f"{overview['records']:,}")
 with col2:
-    st.metric("Unique Job Titles", df['job_title'].nunique())
+    st.metric("Unique Job Titles", overview['job_titles'])
 with col3:
-    st.metric("Years Covered", f"{df['work_year'].min()}–{df['work_year'].max()}")
+    st.metric("Years Covered", "{}–{}".format(*overview['years']))
 with col4:
-    st.metric("Countries", df['company_location'].nunique())
+    st.metric("Countries", overview['countries'])
 
 st.divider()
 
@@ -151,9 +157,14 @@ st.subheader("📈 Key Insights")
 st.markdown("**Salary Trend Over Years**")
 st.write("This chart shows how the average salary in cybersecurity has changed over the years. "
          "An upward trend indicates growing demand and value for cybersecurity professionals.")
-yearly_avg = df.groupby('work_year')['salary_in_usd'].mean().reset_index()
-fig1 = px.line(yearly_avg, x='work_year', y='salary_in_usd', markers=True,
-               labels={'work_year': 'Year', 'salary_in_usd': 'Average Salary (USD)'})
+
+
+def build_trend():
+    return px.line(salary_trend(data), x='work_year', y='salary_in_usd', markers=True,
+                   labels={'work_year': 'Year', 'salary_in_usd': 'Average Salary (USD)'})
+
+
+fig1 = cached_figure("home", "salary_trend", data.version, build_trend)
 st.plotly_chart(fig1, use_container_width=True)
 
 col1, col2 = st.columns(2)
@@ -163,13 +174,16 @@ with col1:
     st.markdown("**Top 5 Most Common Job Titles**")
     st.write("These are the most frequently occurring job positions in the cybersecurity field, "
              "showing where the highest demand exists.")
-    top_jobs = df['job_title'].value_counts().head(5).reset_index()
-    top_jobs.columns = ['job_title', 'count']
-    fig2 = px.bar(top_jobs, x='job_title', y='count',
-                  labels={'job_title': 'Job Title', 'count': 'Count'},
-                  color='job_title',
-                  color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8'])
-    fig2.update_layout(showlegend=False)
+
+    def build_top_jobs():
+        fig = px.bar(top_job_titles(data, 5), x='job_title', y='count',
+                     labels={'job_title': 'Job Title', 'count': 'Count'},
+                     color='job_title',
+                     color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8'])
+        fig.update_layout(showlegend=False)
+        return fig
+
+    fig2 = cached_figure("home", "top5_titles", data.version, build_top_jobs)
     st.plotly_chart(fig2, use_container_width=True)
 
 with col2:
@@ -177,10 +191,12 @@ with col2:
     st.markdown("**Experience Level Distribution**")
     st.write("This shows the breakdown of positions by experience level, "
              "helping you understand which career stage has the most opportunities.")
-    exp_dist = df['experience_level'].value_counts().reset_index()
-    exp_dist.columns = ['experience_level', 'count']
-    fig3 = px.pie(exp_dist, values='count', names='experience_level',
-                  color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A'])
+
+    def build_experience():
+        return px.pie(experience_distribution(data), values='count', names='experience_level',
+                      color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A'])
+
+    fig3 = cached_figure("home", "experience_pie", data.version, build_experience)
     st.plotly_chart(fig3, use_container_width=True)
 
 st.divider()
@@ -204,4 +220,6 @@ column_info = {
     "company_location": "Location of company HQ",
     "company_size": "Company size (S/M/L)"
 }
-st.table(pd.DataFrame(list(column_info.items()), columns=["Column", "Description"]))
\ No newline at end of file
+st.table(pd.DataFrame(list(column_info.items()), columns=["Column", "Description"]))
+
+end_page()
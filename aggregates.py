@@ -0,0 +1,112 @@
+"""Precomputed aggregate cube behind the dashboard charts.
+
+The cube is built once per dataset version (``get_cube``). It keeps count,
+sum and sum of squares of ``salary_in_usd`` for every observed combination of
+the chart dimensions, so any group-by the pages need is a roll-up over those
+cells instead of a scan over rows. The groupings the pages chart directly are
+materialised up front together with a quantile sketch per group.
+"""
+import numpy as np
+import pandas as pd
+
+from sketches import QuantileSketch
+
+VALUE = "salary_in_usd"
+
+# Labels sorted alphabetically, the order a group-by on the text labels gave
+REMOTE_MODES = ["Hybrid", "Onsite", "Remote"]
+
+DIMENSIONS = [
+    "work_year",
+    "experience_level",
+    "employment_type",
+    "job_title",
+    "company_size",
+    "company_location",
+    "employee_residence",
+    "remote_mode",
+]
+
+# Groupings charted by the pages; each also gets per-group quantile sketches
+CUBOIDS = [
+    ("work_year",),
+    ("job_title",),
+    ("experience_level",),
+    ("employment_type",),
+    ("remote_mode",),
+    ("company_size", "experience_level"),
+    ("company_location",),
+    ("employee_residence",),
+]
+
+
+def remote_mode(remote_ratio):
+    """Onsite (0), Remote (100) or Hybrid label per remote ratio, as a categorical."""
+    ratio = np.asarray(remote_ratio)
+    codes = np.where(ratio == 0, 1, np.where(ratio == 100, 2, 0))
+    return pd.Categorical.from_codes(codes, REMOTE_MODES)
+
+
+class AggregateCube:
+    """Count / sum / sum-of-squares cells plus sketches for the charted cuboids.
+
+    ``rollup(dims)`` returns one row per group with ``rows`` (group size),
+    ``count`` (non-null salaries), ``sum``, ``sumsq``, ``mean`` and ``std``;
+    it costs O(cells), not O(rows). ``quantile(dims, q)`` answers from the
+    sketches of a precomputed cuboid.
+    """
+
+    def __init__(self, df, value=VALUE, cuboids=CUBOIDS, sketch_k=200):
+        keys = df[[dim for dim in DIMENSIONS if dim != "remote_mode"]]
+        keys = keys.assign(remote_mode=remote_mode(df["remote_ratio"]))
+        values = df[value].to_numpy(dtype=float)
+        cells = keys.assign(_rows=1, _count=~np.isnan(values),
+                            _sum=np.nan_to_num(values), _sumsq=np.nan_to_num(values) ** 2)
+
+        # Keep rows with a missing key: a roll-up that ignores that key still counts them
+        self.base = (
+            cells.groupby(DIMENSIONS, observed=True, dropna=False)[["_rows", "_count", "_sum", "_sumsq"]]
+            .sum()
+            .rename(columns=lambda c: c.lstrip("_"))
+        )
+        self.total_rows = len(df)
+        self._rollups = {}
+        self._sketches = {}
+        for dims in cuboids:
+            self._sketches[tuple(dims)] = self._build_sketches(keys, values, list(dims), sketch_k)
+
+    @staticmethod
+    def _build_sketches(keys, values, dims, k):
+        group = keys.groupby(dims, observed=True).ngroup().to_numpy()
+        valid = (group >= 0) & ~np.isnan(values)
+        group, vals = group[valid], values[valid]
+        order = np.argsort(group, kind="stable")
+        group, vals = group[order], vals[order]
+        n_groups = int(keys.groupby(dims, observed=True).ngroups)
+        bounds = np.searchsorted(group, np.arange(n_groups + 1))
+        return [QuantileSketch(k=k, seed=0).update(vals[bounds[i]:bounds[i + 1]]) for i in range(n_groups)]
+
+    def rollup(self, dims):
+        """Aggregates per group of ``dims`` (sorted by key, read-only)."""
+        dims = tuple(dims)
+        if dims not in self._rollups:
+            agg = self.base.groupby(list(dims), observed=True)[["rows", "count", "sum", "sumsq"]].sum()
+            count = agg["count"].astype(float)
+            agg["mean"] = agg["sum"] / count.where(count > 0)
+            var = (agg["sumsq"] - agg["sum"] ** 2 / count.where(count > 0)) / (count - 1).where(count > 1)
+            agg["std"] = np.sqrt(var.clip(lower=0))
+            self._rollups[dims] = agg
+        return self._rollups[dims]
+
+    def quantile(self, dims, q):
+        """Per-group quantile ``q`` estimated from a precomputed cuboid's sketches."""
+        dims = tuple(dims)
+        if dims not in self._sketches:
+            raise ValueError(f"No quantile sketches for {dims}; precomputed cuboids are {list(self._sketches)}")
+        index = self.rollup(dims).index
+        return pd.Series([float(s.quantile(q)) for s in self._sketches[dims]], index=index)
+
+
+def get_cube(dataset):
+    """The cube for a ``data_store.Dataset``, built once per dataset version."""
+    return dataset.derived("aggregate_cube", lambda ds: AggregateCube(ds.df))
@@ -0,0 +1,280 @@
+"""Display-size images and minified Lottie animations for the pages.
+
+The pages used to re-read and base64-encode full-size photos and parse ~1 MB
+Lottie files on every rerun. ``python assets.py build`` writes into
+``assets/``:
+
+- every image in ``IMAGES`` scaled down to cover its box (twice the size it
+  is shown at) and recompressed, unless that would not make it smaller;
+- every Lottie file in ``LOTTIES`` with numbers rounded to ``LOTTIE_DIGITS``
+  decimals, embedded bitmaps scaled down to ``LOTTIE_IMAGE_SIZE``, editor-only
+  keys dropped and whitespace removed;
+
+under content-hashed names (``Aaron-profile.1a2b3c4d5e.jpg``), plus a
+``manifest.json`` recording each source's mtime. Building needs Pillow.
+
+At runtime ``load_asset``, ``data_uri`` and ``lottie`` serve the built file
+when it was made from the source's current mtime, and the source itself
+otherwise, so the app still works without a build. Payloads are cached per
+process keyed by source path and the source's and manifest's mtimes.
+"""
+import argparse
+import base64
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import threading
+
+from data_store import ROOT_DIR
+
+SOURCE_DIR = os.path.join(ROOT_DIR, "images")
+BUILD_DIR = os.path.join(ROOT_DIR, "assets")
+MANIFEST = "manifest.json"
+
+# Source image -> (box in px to cover, output format)
+IMAGES = {
+    "Aaron-profile.png": ((240, 240), "JPEG"),
+    "Bryan-profile.png": ((240, 240), "JPEG"),
+    "YihWah-profile.png": ((240, 240), "JPEG"),
+    "Katsutoki-profile.png": ((240, 240), "JPEG"),
+    "UOWM_Logo.png": ((300, 300), "PNG"),
+    "digital_rain_banner.jpg": ((1600, 560), "JPEG"),
+}
+LOTTIES = ["Data Extraction.json", "illustration graph.json"]
+JPEG_QUALITY = 85
+LOTTIE_DIGITS = 3
+# Animations are shown at 250 px; embedded frames keep their declared w/h
+LOTTIE_IMAGE_SIZE = 500
+# Names and property indexes only expressions look up; hd=false is the default
+LOTTIE_EDITOR_KEYS = {"nm", "mn", "ix"}
+HASH_CHARS = 10
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class Asset:
+    """A servable file: content-hashed ``name``, ``mime`` type and ``data`` bytes."""
+
+    def __init__(self, name, mime, data):
+        self.name = name
+        self.mime = mime
+        self.data = data
+        self._data_uri = None
+        self._json = None
+
+    @property
+    def data_uri(self):
+        if self._data_uri is None:
+            self._data_uri = f"data:{self.mime};base64,{base64.b64encode(self.data).decode()}"
+        return self._data_uri
+
+    def json(self):
+        """The parsed JSON (shared between callers; do not modify)."""
+        if self._json is None:
+            self._json = json.loads(self.data)
+        return self._json
+
+    def __repr__(self):
+        return f"Asset({self.name!r}, {self.mime}, {len(self.data):,} bytes)"
+
+
+def hashed_name(source, data, ext=None):
+    """``Aaron-profile.png`` -> ``Aaron-profile.<hash>.jpg`` for ``data``."""
+    stem, source_ext = os.path.splitext(source)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_CHARS]
+    return f"{stem}.{digest}{ext or source_ext}"
+
+
+# ----------- Build -----------
+
+def build_image(path, box, fmt):
+    """``(data, ext, mime)`` of the image at ``path`` scaled to cover ``box``, or its own bytes if smaller."""
+    from PIL import Image
+
+    with open(path, "rb") as f:
+        original = f.read()
+    with Image.open(io.BytesIO(original)) as image:
+        source_mime = Image.MIME.get(image.format) or mimetypes.guess_type(path)[0]
+        scale = min(1.0, max(box[0] / image.width, box[1] / image.height))
+        if scale < 1.0:
+            image = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+        if fmt == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, fmt, **({"quality": JPEG_QUALITY, "optimize": True} if fmt == "JPEG" else {"optimize": True}))
+    data = out.getvalue()
+    if len(data) >= len(original):
+        # Keep the source, but label it with what it really is (the banner is AVIF)
+        ext = mimetypes.guess_extension(source_mime) or os.path.splitext(path)[1]
+        return original, ext, source_mime
+    return data, "." + fmt.lower().replace("jpeg", "jpg"), Image.MIME[fmt]
+
+
+def _has_expressions(value):
+    if isinstance(value, dict):
+        return isinstance(value.get("x"), str) or any(_has_expressions(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_expressions(v) for v in value)
+    return False
+
+
+def _minify(value, digits, drop):
+    if isinstance(value, float):
+        value = round(value, digits)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, list):
+        return [_minify(v, digits, drop) for v in value]
+    if isinstance(value, dict):
+        return {k: _minify(v, digits, drop) for k, v in value.items()
+                if k not in drop and not (k == "hd" and v is False)}
+    return value
+
+
+def shrink_embedded_image(uri, size):
+    """A ``data:image/...`` URI re-encoded as PNG within ``size`` px, or ``uri`` if that is not smaller."""
+    from PIL import Image
+
+    header, _, payload = uri.partition(",")
+    with Image.open(io.BytesIO(base64.b64decode(payload))) as image:
+        image.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "PNG", optimize=True)
+    shrunk = "data:image/png;base64," + base64.b64encode(out.getvalue()).decode()
+    return shrunk if len(shrunk) < len(uri) else uri
+
+
+def minify_lottie(data, digits=LOTTIE_DIGITS, image_size=LOTTIE_IMAGE_SIZE):
+    """Lottie JSON bytes with rounded numbers, smaller embedded images and no whitespace.
+
+    Players draw an image asset into its ``w`` x ``h`` box, so only the
+    bitmap inside the data URI is scaled down.
+    """
+    animation = json.loads(data)
+    drop = set() if _has_expressions(animation) else LOTTIE_EDITOR_KEYS
+    animation = _minify(animation, digits, drop)
+    for asset in animation.get("assets", []):
+        if str(asset.get("p", "")).startswith("data:image/"):
+            asset["p"] = shrink_embedded_image(asset["p"], image_size)
+    return json.dumps(animation, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def build_assets(source_dir=SOURCE_DIR, build_dir=BUILD_DIR):
+    """Write every built asset and the manifest; returns the manifest."""
+    os.makedirs(build_dir, exist_ok=True)
+    manifest = {}
+    for source, (box, fmt) in IMAGES.items():
+        path = os.path.join(source_dir, source)
+        data, ext, mime = build_image(path, box, fmt)
+        manifest[source] = _write(build_dir, path, hashed_name(source, data, ext), mime, data)
+    for source in LOTTIES:
+        path = os.path.join(source_dir, source)
+        with open(path, "rb") as f:
+            data = minify_lottie(f.read())
+        manifest[source] = _write(build_dir, path, hashed_name(source, data), "application/json", data)
+
+    # Drop builds of earlier source versions
+    current = {entry["file"] for entry in manifest.values()}
+    for name in os.listdir(build_dir):
+        if name != MANIFEST and name not in current:
+            os.remove(os.path.join(build_dir, name))
+    tmp = os.path.join(build_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(build_dir, MANIFEST))
+    return manifest
+
+
+def _write(build_dir, path, name, mime, data):
+    with open(os.path.join(build_dir, name), "wb") as f:
+        f.write(data)
+    return {"file": name, "mime": mime, "bytes": len(data),
+            "source_bytes": os.path.getsize(path), "source_mtime_ns": os.stat(path).st_mtime_ns}
+
+
+# ----------- Runtime -----------
+
+def read_manifest(build_dir=BUILD_DIR):
+    try:
+        with open(os.path.join(build_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_asset(source, source_dir=SOURCE_DIR, build_dir=BUILD_DIR):
+    """The ``Asset`` for a file in ``images/``, or None when it does not exist.
+
+    Cached per process until the source or the manifest changes.
+    """
+    path = os.path.join(source_dir, source)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    try:
+        built = os.stat(os.path.join(build_dir, MANIFEST)).st_mtime_ns
+    except OSError:
+        built = None
+    key = (path, build_dir, mtime, built)
+    asset = _cache.get(key)
+    if asset is None:
+        with _cache_lock:
+            asset = _cache.get(key)
+            if asset is None:
+                asset = _read(source, path, mtime, build_dir)
+                for old in [k for k in _cache if k[:2] == key[:2]]:
+                    del _cache[old]
+                _cache[key] = asset
+    return asset
+
+
+def _read(source, path, mtime, build_dir):
+    entry = read_manifest(build_dir).get(source)
+    if entry and entry["source_mtime_ns"] == mtime:
+        try:
+            with open(os.path.join(build_dir, entry["file"]), "rb") as f:
+                return Asset(entry["file"], entry["mime"], f.read())
+        except OSError:
+            pass
+    # Not built, or the source changed since: serve the source as it is
+    with open(path, "rb") as f:
+        data = f.read()
+    mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return Asset(hashed_name(source, data), mime, data)
+
+
+def data_uri(source):
+    """``data:`` URI of an image in ``images/``, or None when it does not exist."""
+    asset = load_asset(source)
+    return asset.data_uri if asset is not None else None
+
+
+def lottie(source):
+    """Parsed Lottie animation from ``images/``."""
+    asset = load_asset(source)
+    if asset is None:
+        raise FileNotFoundError(os.path.join(SOURCE_DIR, source))
+    return asset.json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build display-size images and minified Lottie files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write assets/ and its manifest (needs Pillow)")
+    build.add_argument("--source-dir", default=SOURCE_DIR)
+    build.add_argument("--build-dir", default=BUILD_DIR)
+    args = parser.parse_args(argv)
+
+    manifest = build_assets(args.source_dir, args.build_dir)
+    for source, entry in manifest.items():
+        print(f"{source:<28} {entry['source_bytes'] / 1024:>8.0f} KB -> {entry['bytes'] / 1024:>6.0f} KB  {entry['file']}")
+    total = sum(entry["bytes"] for entry in manifest.values())
+    source_total = sum(entry["source_bytes"] for entry in manifest.values())
+    print(f"{source_total / 1024:.0f} KB -> {total / 1024:.0f} KB in {args.build_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Batch salary prediction for many profiles at once.
+
+    python batch_predict.py offers.csv predictions.csv
+
+Input is a CSV (path or file object), a DataFrame, a dict of columns or a list
+of profile dicts with the model's ``FEATURES``. Each column is validated and
+encoded as one array with the same text normalisation ``preprocessing.py``
+applies (strip, upper case). Rows are then scored in chunks on a thread pool,
+since NumPy releases the GIL in the forest traversal. Results come back chunk
+by chunk in input order, with a P10-P90 interval from the spread of the
+individual trees.
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_store import get_dataset
+from salary_model import load_engine
+
+CHUNK_ROWS = 50_000
+INTERVAL = (0.1, 0.9)
+OUTPUT_COLUMNS = ["predicted_salary", "salary_p10", "salary_p90", "status"]
+
+
+class BatchValidationError(ValueError):
+    """The input cannot be scored at all, e.g. a required column is missing."""
+
+
+# ----------- Validation + encoding -----------
+def to_columns(profiles, features):
+    """Mapping of feature -> array from a DataFrame, dict of columns or list of dicts."""
+    if not hasattr(profiles, "keys"):
+        profiles = list(profiles)
+        present = set().union(*(p.keys() for p in profiles))
+        profiles = {name: [p.get(name) for p in profiles] for name in features if name in present}
+    missing = [name for name in features if name not in profiles]
+    if missing:
+        raise BatchValidationError(f"Missing required column(s): {', '.join(missing)}")
+    return {name: profiles[name] for name in features}
+
+
+def prepare(engine, columns):
+    """Encode whole columns; returns ``(active, valid, status)``.
+
+    Rows with an empty or non-numeric value are not scored (``valid`` False).
+    Values the model never saw are scored with that feature ignored, like the
+    encoder's ``handle_unknown="ignore"``, and flagged in ``status``.
+    """
+    features = engine.features
+    n = len(columns[features[0]])
+    active = np.empty((n, len(features)), dtype=np.int32)
+    missing = np.zeros((n, len(features)), dtype=bool)
+    unknown = np.zeros((n, len(features)), dtype=bool)
+    for f, name in enumerate(features):
+        values = pd.Series(np.asarray(columns[name], dtype=object))
+        if engine.categories[f].dtype.kind == "f":
+            values = pd.to_numeric(values, errors="coerce")
+            missing[:, f] = values.isna().to_numpy()
+            values = values.fillna(-1)
+        else:
+            # Stringify only present values: before pandas 3, astype(str) turns None/NaN into "NONE"/"NAN"
+            present = values.notna()
+            values = (values[present].astype(str).str.strip().str.upper()
+                      .reindex(values.index, fill_value=""))
+            missing[:, f] = (values == "").to_numpy()
+        codes = engine.encode_column(f, values.to_numpy(dtype=object))
+        codes[missing[:, f]] = -1
+        active[:, f] = codes
+        unknown[:, f] = (codes < 0) & ~missing[:, f]
+
+    valid = ~missing.any(axis=1)
+    status = np.full(n, "ok", dtype=object)
+    names = np.array(features, dtype=object)
+    for i in np.flatnonzero(~valid | unknown.any(axis=1)):
+        if not valid[i]:
+            status[i] = "missing: " + ", ".join(names[missing[i]])
+        else:
+            status[i] = "unknown: " + ", ".join(names[unknown[i]])
+    return active, valid, status
+
+
+def prepare_records(engine, profiles):
+    """``prepare`` for a short list of profile dicts, in plain Python.
+
+    Same rules as the column path, without building pandas objects per call;
+    meant for request-sized inputs such as the HTTP service's.
+    """
+    features = engine.features
+    present = set().union(*(p.keys() for p in profiles)) if profiles else set(features)
+    missing_cols = [name for name in features if name not in present]
+    if missing_cols:
+        raise BatchValidationError(f"Missing required column(s): {', '.join(missing_cols)}")
+    numeric = [values.dtype.kind == "f" for values in engine.categories]
+    active = np.empty((len(profiles), len(features)), dtype=np.int32)
+    valid = np.ones(len(profiles), dtype=bool)
+    status = np.full(len(profiles), "ok", dtype=object)
+    for i, profile in enumerate(profiles):
+        missing, unknown = [], []
+        for f, name in enumerate(features):
+            value = _normalize(profile.get(name), numeric[f])
+            code = -1 if value is None else engine.lookups[f].get(value, -1)
+            active[i, f] = code
+            if value is None:
+                missing.append(name)
+            elif code < 0:
+                unknown.append(name)
+        if missing:
+            valid[i] = False
+            status[i] = "missing: " + ", ".join(missing)
+        elif unknown:
+            status[i] = "unknown: " + ", ".join(unknown)
+    return active, valid, status
+
+
+def _normalize(value, numeric):
+    """One raw value as the encoder key, or None when it is empty / not a number."""
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    if numeric:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if np.isnan(value) else value
+    value = str(value).strip().upper()
+    return value or None
+
+
+# ----------- Scoring -----------
+def iter_predictions(engine, profiles, chunksize=CHUNK_ROWS, workers=None, interval=INTERVAL):
+    """Yield one dict of arrays per chunk (``start``, ``stop`` plus ``OUTPUT_COLUMNS``), in order.
+
+    At most ``2 * workers`` chunks are in flight, so memory stays bounded
+    however slowly the caller consumes the results.
+    """
+    active, valid, status = prepare(engine, to_columns(profiles, engine.features))
+    workers = workers or os.cpu_count() or 1
+
+    def score(start):
+        stop = min(start + chunksize, len(active))
+        mean, bands = engine.predict_intervals_encoded(active[start:stop], interval)
+        ok = valid[start:stop]
+        return {
+            "start": start,
+            "stop": stop,
+            "predicted_salary": np.where(ok, np.expm1(mean), np.nan),
+            "salary_p10": np.where(ok, np.expm1(bands[:, 0]), np.nan),
+            "salary_p90": np.where(ok, np.expm1(bands[:, -1]), np.nan),
+            "status": status[start:stop],
+        }
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start in range(0, len(active), chunksize):
+            pending.append(pool.submit(score, start))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def predict_batch(engine, profiles, **kwargs):
+    """All predictions at once: a dict of ``OUTPUT_COLUMNS`` arrays."""
+    chunks = list(iter_predictions(engine, profiles, **kwargs))
+    if not chunks:
+        return {name: np.empty(0) for name in OUTPUT_COLUMNS}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in OUTPUT_COLUMNS}
+
+
+def predict_frame(engine, profiles, chunksize=CHUNK_ROWS, progress=None, **kwargs):
+    """``profiles`` (a DataFrame) with the ``OUTPUT_COLUMNS`` appended, or None when it has no rows.
+
+    ``progress(scored, total)`` is called after each chunk.
+    """
+    parts = []
+    for chunk in iter_predictions(engine, profiles, chunksize, **kwargs):
+        parts.append(chunk)
+        if progress is not None:
+            progress(chunk["stop"], len(profiles))
+    if not parts:
+        return None
+    return profiles.assign(**{name: np.concatenate([part[name] for part in parts]) for name in OUTPUT_COLUMNS})
+
+
+def predict_csv(engine, source, output, chunksize=CHUNK_ROWS, **kwargs):
+    """Stream ``source`` CSV to ``output`` CSV with the prediction columns appended."""
+    rows = 0
+    for i, frame in enumerate(pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False)):
+        result = predict_batch(engine, frame, chunksize=max(chunksize // 4, 1), **kwargs)
+        frame = frame.assign(**result)
+        frame.to_csv(output, mode="w" if i == 0 else "a", header=i == 0, index=False, float_format="%.2f")
+        rows += len(frame)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict salaries for every profile in a CSV.")
+    parser.add_argument("input", help="CSV with the model's feature columns")
+    parser.add_argument("output", help="where to write the input plus " + ", ".join(OUTPUT_COLUMNS))
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=None, help="scoring threads (default: all cores)")
+    args = parser.parse_args(argv)
+
+    engine = load_engine(get_dataset())
+    rows = predict_csv(engine, args.input, args.output, chunksize=args.chunksize, workers=args.workers)
+    print(f"Wrote {rows:,} predictions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
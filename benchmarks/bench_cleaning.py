@@ -0,0 +1,109 @@
+"""Before/after timing of the cleaning steps in preprocessing.py.
+
+    python -m benchmarks.bench_cleaning --rows 10000000
+
+"legacy" is the per-column loop version preprocessing.py used before the
+vectorized kernels, reading text columns as strings; "vectorized" reads them
+as categoricals (``read_raw``) and calls ``prepare_frame`` / ``clip_frame``.
+The synthetic input goes through a temporary CSV so parsing is timed too.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_salaries
+from preprocessing import CLIP_QUANTILES, clip_frame, prepare_frame, read_raw
+
+
+# ----------- Legacy loops (kept only for comparison) -----------
+def legacy_prepare(df, num_cols, cat_cols):
+    for col in num_cols:
+        df[col] = df[col].fillna(df[col].median())
+    for col in cat_cols:
+        df[col] = df[col].fillna(df[col].mode()[0])
+    for col in num_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df[num_cols] = df[num_cols].round(2)
+    for col in cat_cols:
+        df[col] = df[col].astype(str).str.strip().str.upper()
+    return df
+
+
+def legacy_clip(df, num_cols):
+    for col in num_cols:
+        low, high = df[col].quantile(list(CLIP_QUANTILES))
+        df[col] = df[col].clip(lower=low, upper=high)
+    return df
+
+
+# ----------- Vectorized kernels -----------
+def vectorized_prepare(df, num_cols, cat_cols):
+    fill = {**df[num_cols].median().to_dict(), **df[cat_cols].mode().iloc[0].to_dict()}
+    return prepare_frame(df, num_cols, cat_cols, fill)
+
+
+def vectorized_clip(df, num_cols):
+    bounds = df[num_cols].quantile(list(CLIP_QUANTILES))
+    return clip_frame(df, num_cols, bounds.iloc[0], bounds.iloc[1])
+
+
+def run(path, read, prepare, clip, num_cols, cat_cols):
+    timings = {}
+    start = time.perf_counter()
+    df = read(path)
+    timings["read csv"] = time.perf_counter() - start
+    start = time.perf_counter()
+    df = prepare(df, num_cols, cat_cols)
+    timings["fill + coerce + round + text"] = time.perf_counter() - start
+    start = time.perf_counter()
+    df = clip(df, num_cols)
+    timings["quantile + clip"] = time.perf_counter() - start
+    timings["total"] = sum(timings.values())
+    return df, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--check", action="store_true", help="verify both versions give the same frame")
+    parser.add_argument("--json", help="also write the timings to this file")
+    args = parser.parse_args(argv)
+
+    print(f"Generating {args.rows:,} synthetic raw rows...")
+    raw = synthetic_salaries(args.rows, raw=True, missing=0.01)
+    num_cols = raw.select_dtypes(include=[np.number]).columns.tolist()
+    cat_cols = [col for col in raw.columns if col not in num_cols]
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    raw.to_csv(path, index=False)
+    del raw
+
+    try:
+        legacy, legacy_t = run(path, pd.read_csv, legacy_prepare, legacy_clip, num_cols, cat_cols)
+        if args.check:
+            legacy = legacy.astype(dict.fromkeys(cat_cols, object))
+        else:
+            del legacy
+        fast, fast_t = run(path, read_raw, vectorized_prepare, vectorized_clip, num_cols, cat_cols)
+    finally:
+        os.remove(path)
+    if args.check:
+        pd.testing.assert_frame_equal(legacy, fast.astype(dict.fromkeys(cat_cols, object)))
+        print("Outputs match.")
+
+    print(f"\n{'stage':<32}{'legacy (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for stage in legacy_t:
+        print(f"{stage:<32}{legacy_t[stage]:>12.2f}{fast_t[stage]:>16.2f}{legacy_t[stage] / fast_t[stage]:>9.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": args.rows, "legacy": legacy_t, "vectorized": fast_t}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Latency of the salary model: sklearn Pipeline vs the flat-array engine.
+
+    python -m benchmarks.bench_inference --repeats 200 --batch 100000
+
+Single-row latency is what the Predictive Model page pays per widget change
+(a one-row DataFrame through the Pipeline vs ``FlatForest.predict_one`` on a
+dict); the batch numbers score synthetic rows in one call. Both use the model
+artifact for the bundled dataset (trained first if it is missing).
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_predict import prepare, prepare_records, to_columns
+from benchmarks.synthetic import synthetic_salaries
+from data_store import get_dataset
+from forest_engine import FlatForest
+from salary_model import FEATURES, load_or_train
+
+
+def latencies(fn, repeats):
+    out = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        out[i] = time.perf_counter() - start
+    return out
+
+
+def summary(seconds):
+    ms = seconds * 1e3
+    return {"p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99)), "mean_ms": float(ms.mean())}
+
+
+def batch_paths_agree(engine, rows, blanks=(None, np.nan, "", "  ")):
+    """Whether CSV/DataFrame scoring (``prepare``) and the service's ``prepare_records`` encode alike.
+
+    Covers ``rows`` plus, for every feature, each blank value in turn.
+    """
+    profiles = rows.to_dict("records")
+    profiles += [{**profiles[0], name: blank} for name in engine.features for blank in blanks]
+    columns = prepare(engine, to_columns(pd.DataFrame(profiles, dtype=object), engine.features))
+    records = prepare_records(engine, profiles)
+    return all(np.array_equal(a, b) for a, b in zip(columns, records))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200, help="single-row predictions to time")
+    parser.add_argument("--batch", type=int, default=100_000, help="rows in the batch run")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    model = load_or_train(get_dataset())
+    engine = FlatForest.from_pipeline(model)
+    rows = synthetic_salaries(max(args.batch, 1), seed=1)[FEATURES]
+    row = rows.iloc[0].to_dict()
+    one = pd.DataFrame([row])
+
+    results = {
+        "single_pipeline": summary(latencies(lambda: model.predict(one), max(args.repeats // 10, 5))),
+        "single_flat": summary(latencies(lambda: engine.predict_one(row), args.repeats)),
+    }
+    start = time.perf_counter()
+    expected = model.predict(rows)
+    results["batch_pipeline_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    got = engine.predict(rows)
+    results["batch_flat_s"] = time.perf_counter() - start
+    results["bit_identical"] = bool(np.array_equal(expected, got) and engine.predict_one(row) == expected[0])
+    results["batch_paths_agree"] = batch_paths_agree(engine, rows.head(1000))
+
+    print(f"{engine!r}")
+    print(f"\n{'single row':<12}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for name in ("single_pipeline", "single_flat"):
+        print(f"{name[7:]:<12}{results[name]['p50_ms']:>12.3f}{results[name]['p99_ms']:>12.3f}")
+    print(f"\nbatch of {args.batch:,}: pipeline {results['batch_pipeline_s']:.2f}s, "
+          f"flat {results['batch_flat_s']:.2f}s ({args.batch / results['batch_flat_s']:,.0f} rows/s)")
+    print(f"bit-identical: {results['bit_identical']}")
+    print(f"batch/service encodings agree: {results['batch_paths_agree']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"batch_rows": args.batch, **results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Accuracy vs size of the quantized flat engine against the sklearn model.
+
+    python -m benchmarks.bench_quantized --rows 100000 --json quantized.json
+
+For the page's Random Forest (``salary_model.load_or_train``) this reports,
+per format: bytes on disk, bytes of node arrays a worker maps, the largest
+and mean prediction error against the full-precision ``Pipeline`` (log
+scale and USD, on the dataset rows plus synthetic ones), test-split RMSE
+and batch scoring time.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_salaries
+from data_store import get_dataset
+from forest_engine import FlatForest
+from salary_model import FEATURES, load_or_train, split
+
+VALUE_DTYPES = ["float64", "float32", "float16"]
+
+
+def dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic rows scored on top of the dataset")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    dataset = get_dataset()
+    model = load_or_train(dataset)
+    rows = np.concatenate([dataset.df[FEATURES].to_numpy(dtype=object),
+                           synthetic_salaries(max(args.rows, 1), seed=1)[FEATURES].to_numpy(dtype=object)])
+    columns = {name: rows[:, f] for f, name in enumerate(FEATURES)}
+    _, X_test, _, y_test = split(dataset.df)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.joblib")
+        joblib.dump(model, model_path)
+        results = {"pipeline": {"disk_bytes": os.path.getsize(model_path)}}
+        reference = model.predict(pd.DataFrame(columns))
+        full = FlatForest.from_pipeline(model)
+        for dtype in VALUE_DTYPES:
+            engine = full if dtype == "float64" else full.quantize(dtype)
+            path = engine.save(os.path.join(tmp, dtype))
+            engine = FlatForest.load(path)
+            start = time.perf_counter()
+            got = engine.predict(columns)
+            seconds = time.perf_counter() - start
+            error = np.abs(got - reference)
+            usd = np.abs(np.expm1(got) - np.expm1(reference))
+            test = engine.predict(X_test)
+            results[dtype] = {
+                "disk_bytes": dir_bytes(path),
+                "mapped_bytes": engine.nbytes,
+                "max_abs_log_error": float(error.max()),
+                "mean_abs_log_error": float(error.mean()),
+                "max_abs_usd_error": float(usd.max()),
+                "test_rmse": float(np.sqrt(np.mean((test - y_test.to_numpy()) ** 2))),
+                "batch_s": seconds,
+            }
+
+    print(f"{len(rows):,} rows scored; pipeline artifact {results['pipeline']['disk_bytes'] / 2**20:.1f} MB\n")
+    print(f"{'format':<10}{'disk MB':>9}{'mapped MB':>11}{'max |log err|':>15}{'max |USD err|':>15}"
+          f"{'test RMSE':>11}{'batch s':>9}")
+    for dtype in VALUE_DTYPES:
+        r = results[dtype]
+        print(f"{dtype:<10}{r['disk_bytes'] / 2**20:>9.2f}{r['mapped_bytes'] / 2**20:>11.2f}"
+              f"{r['max_abs_log_error']:>15.2e}{r['max_abs_usd_error']:>15.2f}{r['test_rmse']:>11.6f}{r['batch_s']:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": len(rows), **results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
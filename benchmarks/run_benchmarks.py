@@ -0,0 +1,308 @@
+"""Data-path timings of every page on synthetic datasets, plus a regression check.
+
+    python -m benchmarks.run_benchmarks run --sizes 1000 100000 --json results.json
+    python -m benchmarks.run_benchmarks compare baseline.json results.json
+
+``run`` wraps a synthetic dataset of each size (``benchmarks.synthetic``) in
+a ``Dataset`` handle and calls, without Streamlit, the same data-prep
+functions the pages call (``page_data``, ``PredictionGrid.what_if``,
+``batch_predict.predict_frame``): the homepage metrics, every Salary
+Descriptive tab, the globe's map and country tables, and the predictor's
+inputs, training, single prediction, What-if grid and batch scoring. Each
+case is timed ``cold`` on a
+fresh handle, so the derived tables it needs are built inside the timing
+(the first rerun after the data changes), then ``warm`` on the same handle
+(what a widget rerun pays). The JSON keeps the median of ``--repeats``.
+
+Training fits the page's pipeline on at most ``--train-rows`` rows of the
+dataset; the prediction cases use the flat engine of that model. Training and
+the What-if grid build run once per size, since the app does both once per
+model; batch scoring reads at most ``--batch-rows`` profiles.
+
+``compare`` (or ``run --compare``) reports every case that got slower than
+the baseline by more than ``--tolerance`` and ``--min-ms`` and exits with
+status 1 if there is one.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import sklearn
+
+from batch_predict import predict_frame
+from benchmarks.synthetic import synthetic_salaries
+from data_store import DTYPES, Dataset, cast_columns
+from density import get_density, histogram_trace, violin_figure
+from forest_engine import FlatForest
+from page_data import (COMPARISONS, MAP_METRICS, MAP_REGIONS, contributions_table, country_overview,
+                       experience_distribution, home_overview, match_titles, most_common_titles,
+                       predict_profile, prediction_inputs, region_map, salary_comparison, salary_heatmap,
+                       salary_trend, title_stats, top_job_titles, top_paid_titles, violin_groups)
+from prediction_grid import PredictionGrid
+from salary_model import FEATURES, train_pipeline
+from search_index import get_title_index
+
+SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+REPEATS = 3
+TRAIN_ROWS = 20_000
+BATCH_ROWS = 100_000
+SINGLE_CALLS = 200
+TOLERANCE = 0.25
+MIN_MS = 5.0
+
+
+# ----------- Page data paths -----------
+# Each takes a Dataset and makes the page's own page_data calls
+
+def home_metrics(data):
+    return home_overview(data), salary_trend(data), top_job_titles(data, 5), experience_distribution(data)
+
+
+def descriptive_top15(data):
+    top = top_paid_titles(data, 15)
+    index = get_title_index(data)
+    return top, match_titles(index, "engineer", top["job_title"]), match_titles(index, "enginer", top["job_title"])
+
+
+def descriptive_violin(data):
+    return violin_figure(*violin_groups(data, 10), px.colors.qualitative.Vivid)
+
+
+def descriptive_heatmap(data):
+    return salary_heatmap(data)
+
+
+def descriptive_comparison(data):
+    return [salary_comparison(data, chart_type) for chart_type in COMPARISONS]
+
+
+def descriptive_treemap(data):
+    return title_stats(data), most_common_titles(data, 25)
+
+
+def globe_summary(data):
+    """The country table of the first country in each metric's first non-empty region."""
+    tables = []
+    for metric in MAP_METRICS:
+        for region in MAP_REGIONS:
+            map_df = region_map(data, metric, region)
+            if len(map_df):
+                tables.append(country_overview(data, metric, map_df["Country"].iloc[0]))
+                break
+    return tables
+
+
+def globe_map(data):
+    return [region_map(data, metric, region) for metric in MAP_METRICS for region in MAP_REGIONS]
+
+
+def predict_inputs(data):
+    return prediction_inputs(data), histogram_trace(get_density(data))
+
+
+DATA_CASES = {
+    "home.metrics": home_metrics,
+    "descriptive.top15": descriptive_top15,
+    "descriptive.violin": descriptive_violin,
+    "descriptive.heatmap": descriptive_heatmap,
+    "descriptive.comparison": descriptive_comparison,
+    "descriptive.treemap": descriptive_treemap,
+    "globe.summary": globe_summary,
+    "globe.map": globe_map,
+    "predict.inputs": predict_inputs,
+}
+MODEL_CASES = ["predict.train", "predict.single", "predict.what_if", "predict.batch"]
+
+
+# ----------- Timing -----------
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def median(values):
+    values = [v for v in values if v is not None]
+    return float(np.median(values)) if values else None
+
+
+def make_dataset(rows, seed=0):
+    """A synthetic dataset in the app's dtypes; returns the frame (handles are made per run)."""
+    return cast_columns(synthetic_salaries(rows, seed=seed), DTYPES)
+
+
+def run_data_cases(df, rows, repeats):
+    """``{case: {"cold_s", "warm_s"}}`` for every page data path."""
+    results = {}
+    for name, fn in DATA_CASES.items():
+        cold, warm = [], []
+        for r in range(repeats):
+            data = Dataset(df, f"bench-{rows}-{name}-{r}", "synthetic")
+            cold.append(timed(fn, data)[0])
+            warm.append(timed(fn, data)[0])
+        results[name] = {"cold_s": median(cold), "warm_s": median(warm)}
+    return results
+
+
+def run_model_cases(df, rows, repeats, train_rows=TRAIN_ROWS, batch_rows=BATCH_ROWS):
+    """Training, single prediction, What-if grid and batch scoring on a model fitted to a sample of ``df``."""
+    sample = df.sample(n=min(len(df), train_rows), random_state=0) if len(df) > train_rows else df
+    train_s, (model, _) = timed(train_pipeline, sample)
+    engine = FlatForest.from_pipeline(model)
+    results = {"predict.train": {"cold_s": train_s, "warm_s": None, "rows": len(sample)}}
+
+    # One widget change on the predictor: intervals plus contributions for one profile
+    row = {name: df[name].iloc[0] for name in FEATURES}
+    row = {name: value.item() if hasattr(value, "item") else value for name, value in row.items()}
+
+    def single():
+        predict_profile(engine, row)
+        contributions_table(engine, row)
+
+    first = timed(single)[0]
+    calls = [timed(single)[0] for _ in range(SINGLE_CALLS)]
+    results["predict.single"] = {"cold_s": first, "warm_s": median(calls)}
+
+    # The grid is built once per model, like training; a rerun only slices it
+    grid_s, grid = timed(PredictionGrid.build, engine, df)
+    job, location = grid.jobs[0], grid.locations[0]
+
+    def what_if():
+        grid.what_if(job, location, engine,
+                     remote_ratio=grid.axes["remote_ratio"][0], employment_type=grid.axes["employment_type"][0])
+
+    lookups = [timed(what_if)[0] for _ in range(SINGLE_CALLS)]
+    results["predict.what_if"] = {"cold_s": grid_s, "warm_s": median(lookups), "pairs": len(grid.jobs)}
+
+    # Uploaded CSVs are read as strings
+    profiles = df[FEATURES].head(batch_rows).astype(str)
+    batch = [timed(predict_frame, engine, profiles, 20_000)[0] for _ in range(repeats)]
+    results["predict.batch"] = {"cold_s": median(batch), "warm_s": None, "rows": len(profiles)}
+    return results
+
+
+def run(sizes=SIZES, repeats=REPEATS, train_rows=TRAIN_ROWS, batch_rows=BATCH_ROWS, log=print):
+    """Results for every size, as written to the JSON file."""
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeats": repeats,
+            "train_rows": train_rows,
+            "batch_rows": batch_rows,
+        },
+        "sizes": {},
+    }
+    for rows in sizes:
+        generate_s, df = timed(make_dataset, rows)
+        log(f"{rows:,} rows generated in {generate_s:.1f} s")
+        cases = run_data_cases(df, rows, repeats)
+        cases.update(run_model_cases(df, rows, repeats, train_rows, batch_rows))
+        results["sizes"][str(rows)] = {"generate_s": generate_s, "cases": cases}
+        for name, timing in cases.items():
+            log(f"  {name:<24}{_ms(timing['cold_s']):>12}{_ms(timing['warm_s']):>12}")
+        del df
+    return results
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1e3:,.1f} ms"
+
+
+# ----------- Regression check -----------
+
+def compare(baseline, current, tolerance=TOLERANCE, min_ms=MIN_MS):
+    """``(rows, regressions)``: one row per case and timing present in both results.
+
+    A timing regresses when it is more than ``tolerance`` (relative) and
+    ``min_ms`` (absolute) slower than the baseline.
+    """
+    rows, regressions = [], []
+    for size, entry in current["sizes"].items():
+        base_cases = baseline["sizes"].get(size, {}).get("cases", {})
+        for name, timing in entry["cases"].items():
+            for metric in ("cold_s", "warm_s"):
+                new, old = timing.get(metric), base_cases.get(name, {}).get(metric)
+                if new is None or old is None:
+                    continue
+                regressed = new > old * (1 + tolerance) and (new - old) * 1e3 > min_ms
+                row = {"size": int(size), "case": name, "timing": metric[:-2],
+                       "baseline_s": old, "current_s": new, "ratio": new / old if old else float("inf"),
+                       "regressed": regressed}
+                rows.append(row)
+                if regressed:
+                    regressions.append(row)
+    return rows, regressions
+
+
+def print_comparison(rows, out=sys.stdout):
+    print(f"{'rows':>11}  {'case':<24}{'timing':<7}{'baseline':>12}{'current':>12}{'ratio':>8}", file=out)
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"{row['size']:>11,}  {row['case']:<24}{row['timing']:<7}{_ms(row['baseline_s']):>12}"
+              f"{_ms(row['current_s']):>12}{row['ratio']:>7.2f}x{flag}", file=out)
+
+
+def read_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="time every page's data path")
+    run_cmd.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="dataset rows to benchmark")
+    run_cmd.add_argument("--repeats", type=int, default=REPEATS)
+    run_cmd.add_argument("--train-rows", type=int, default=TRAIN_ROWS, help="rows the model is fitted on")
+    run_cmd.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="profiles in the batch run")
+    run_cmd.add_argument("--json", help="write the results to this file")
+    run_cmd.add_argument("--compare", metavar="BASELINE", help="check the results against this file")
+
+    compare_cmd = sub.add_parser("compare", help="check results against a baseline")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+
+    for cmd in (run_cmd, compare_cmd):
+        cmd.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed relative slowdown")
+        cmd.add_argument("--min-ms", type=float, default=MIN_MS, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        print(f"{'':<26}{'cold':>12}{'warm':>12}")
+        current = run(args.sizes, args.repeats, args.train_rows, args.batch_rows)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(current, f, indent=2)
+        if not args.compare:
+            return 0
+        baseline = read_results(args.compare)
+    else:
+        baseline, current = read_results(args.baseline), read_results(args.current)
+
+    rows, regressions = compare(baseline, current, args.tolerance, args.min_ms)
+    print_comparison(rows)
+    if regressions:
+        print(f"\n{len(regressions)} timing(s) slower than the baseline by more than "
+              f"{args.tolerance:.0%} and {args.min_ms:g} ms")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
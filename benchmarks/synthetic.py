@@ -0,0 +1,66 @@
+"""Synthetic salary datasets shaped like the bundled CSVs.
+
+Categorical columns are sampled with the real value frequencies, and salaries
+follow a log-normal driven by experience, company size and remote ratio, so
+group-bys, models and charts see realistic cardinalities at any row count.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_CSV = os.path.join(ROOT_DIR, "salaries_cyber.csv")
+CLEAN_CSV = os.path.join(ROOT_DIR, "salaries_cyber_clean.csv")
+
+CATEGORICAL = [
+    "experience_level",
+    "employment_type",
+    "job_title",
+    "salary_currency",
+    "employee_residence",
+    "company_location",
+    "company_size",
+]
+
+EXPERIENCE_FACTOR = {"EN": 0.6, "MI": 0.85, "SE": 1.15, "EX": 1.6}
+SIZE_FACTOR = {"S": 0.85, "M": 1.0, "L": 1.1}
+
+
+def _sample(series, n_rows, rng):
+    counts = series.value_counts()
+    values = np.asarray(counts.index, dtype=object)
+    return values[rng.choice(len(values), size=n_rows, p=(counts / counts.sum()).to_numpy())]
+
+
+def synthetic_salaries(n_rows, seed=0, raw=False, missing=0.0, duplicates=0.0):
+    """Return ``n_rows`` rows with the columns of the salary CSVs.
+
+    ``raw=True`` samples from the uncleaned CSV and adds stray whitespace to
+    some text values; ``missing`` and ``duplicates`` inject that share of
+    NaNs and repeated rows, which is what the cleaning benchmarks need.
+    """
+    rng = np.random.default_rng(seed)
+    source = pd.read_csv(RAW_CSV if raw else CLEAN_CSV)
+
+    df = pd.DataFrame({col: _sample(source[col], n_rows, rng) for col in CATEGORICAL})
+    df["work_year"] = rng.choice([2020, 2021, 2022], size=n_rows, p=[0.15, 0.35, 0.5])
+    df["remote_ratio"] = rng.choice([0, 50, 100], size=n_rows, p=[0.25, 0.2, 0.55])
+
+    base = (df["experience_level"].map(EXPERIENCE_FACTOR).to_numpy(dtype=float)
+            * df["company_size"].map(SIZE_FACTOR).to_numpy(dtype=float))
+    usd = np.round(110_000 * base * rng.lognormal(0.0, 0.45, n_rows), 2)
+    df["salary_in_usd"] = usd
+    df["salary"] = np.where(df["salary_currency"] == "USD", usd, np.round(usd * rng.uniform(0.7, 5.0, n_rows)))
+    df = df[source.columns.tolist()]
+
+    if raw:
+        for col in ("job_title", "company_size"):
+            padded = rng.random(n_rows) < 0.05
+            df.loc[padded, col] = " " + df.loc[padded, col].astype(str) + " "
+    if missing:
+        for col in ("salary", "job_title"):
+            df.loc[rng.random(n_rows) < missing, col] = np.nan
+    if duplicates:
+        df = pd.concat([df, df.sample(frac=duplicates, random_state=seed)], ignore_index=True)
+    return df
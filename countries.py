@@ -0,0 +1,121 @@
+"""ISO country lookups (alpha-2 -> alpha-3, name, continent) without pycountry.
+
+The table lives in ``countries.csv`` and is read once per process; the pages
+map whole columns of alpha-2 codes through it with one indexer lookup instead
+of a ``pycountry`` call per row. Regenerate the CSV (needs ``pycountry``)
+with::
+
+    python countries.py build
+"""
+import argparse
+import os
+import threading
+
+import pandas as pd
+
+from data_store import ROOT_DIR
+
+COUNTRIES_CSV = os.path.join(ROOT_DIR, "countries.csv")
+COLUMNS = ["alpha_2", "alpha_3", "name", "continent"]
+
+CONTINENT_NAMES = {
+    "AF": "Africa",
+    "AN": "Antarctica",
+    "AS": "Asia",
+    "EU": "Europe",
+    "NA": "North America",
+    "OC": "Oceania",
+    "SA": "South America",
+}
+
+# Build-time source of the continent column; transcontinental countries
+# follow common usage (RU, CY in Europe; TR, the Caucasus in Asia)
+CONTINENTS = {
+    "AF": "AO BF BI BJ BW CD CF CG CI CM CV DJ DZ EG EH ER ET GA GH GM GN GQ GW KE KM LR LS LY MA MG "
+          "ML MR MU MW MZ NA NE NG RE RW SC SD SH SL SN SO SS ST SZ TD TG TN TZ UG YT ZA ZM ZW",
+    "AN": "AQ BV GS HM TF",
+    "AS": "AE AF AM AZ BD BH BN BT CC CN CX GE HK ID IL IN IO IQ IR JO JP KG KH KP KR KW KZ LA LB LK "
+          "MM MN MO MV MY NP OM PH PK PS QA SA SG SY TH TJ TL TM TR TW UZ VN YE",
+    "EU": "AD AL AT AX BA BE BG BY CH CY CZ DE DK EE ES FI FO FR GB GG GI GR HR HU IE IM IS IT JE LI "
+          "LT LU LV MC MD ME MK MT NL NO PL PT RO RS RU SE SI SJ SK SM UA VA",
+    "NA": "AG AI AW BB BL BM BQ BS BZ CA CR CU CW DM DO GD GL GP GT HN HT JM KN KY LC MF MQ MS MX NI "
+          "PA PM PR SV SX TC TT UM US VC VG VI",
+    "OC": "AS AU CK FJ FM GU KI MH MP NC NF NR NU NZ PF PG PN PW SB TK TO TV VU WF WS",
+    "SA": "AR BO BR CL CO EC FK GF GY PE PY SR UY VE",
+}
+
+_table = {}
+_table_lock = threading.Lock()
+
+
+def build_table():
+    """The lookup table from pycountry plus ``CONTINENTS`` (build time only)."""
+    import pycountry
+
+    continent = {code: key for key, codes in CONTINENTS.items() for code in codes.split()}
+    rows = [(c.alpha_2, c.alpha_3, c.name, continent.get(c.alpha_2, "")) for c in pycountry.countries]
+    missing = [code for code, *_, cont in rows if not cont]
+    if missing:
+        raise ValueError(f"No continent for: {', '.join(missing)}")
+    return pd.DataFrame(rows, columns=COLUMNS).sort_values("alpha_2", ignore_index=True)
+
+
+def load_countries(path=COUNTRIES_CSV):
+    """The table indexed by alpha-2 code, read at most once per process."""
+    table = _table.get(path)
+    if table is None:
+        with _table_lock:
+            table = _table.get(path)
+            if table is None:
+                # "NA" is Namibia / North America, not a missing value
+                table = pd.read_csv(path, dtype=str, keep_default_na=False).set_index("alpha_2")
+                _table[path] = table
+    return table
+
+
+def resolve(codes, path=COUNTRIES_CSV):
+    """``alpha_3``, ``name`` and ``continent`` for an array of alpha-2 codes, one row each.
+
+    Unknown codes get NaN. Categoricals are resolved once per category.
+    """
+    table = load_countries(path)
+    codes = pd.Series(codes)
+    if isinstance(codes.dtype, pd.CategoricalDtype):
+        # A trailing all-NaN row for missing values (category code -1)
+        looked_up = table.reindex([*codes.cat.categories.astype(str), ""])
+        return looked_up.iloc[codes.cat.codes.to_numpy()].set_axis(codes.index)
+    return table.reindex(codes.astype(str).to_numpy()).set_axis(codes.index)
+
+
+def labels(codes, path=COUNTRIES_CSV):
+    """``"US — United States"`` style labels for an array of alpha-2 codes."""
+    codes = pd.Series(codes).astype(str)
+    return codes + " — " + resolve(codes, path)["name"].fillna("Unknown")
+
+
+def label_map(codes, path=COUNTRIES_CSV):
+    """``{code: label}`` for the distinct codes in ``codes``, missing values dropped."""
+    codes = pd.Series(pd.Series(codes).dropna().unique()).astype(str)
+    return dict(zip(codes, labels(codes, path)))
+
+
+def continent_codes(continent, path=COUNTRIES_CSV):
+    """Alpha-2 codes of every country on ``continent`` (e.g. ``"EU"``)."""
+    table = load_countries(path)
+    return set(table.index[table["continent"] == continent])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the country lookup table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="regenerate the CSV from pycountry")
+    build.add_argument("--output", default=COUNTRIES_CSV)
+    args = parser.parse_args(argv)
+
+    table = build_table()
+    table.to_csv(args.output, index=False)
+    print(f"Wrote {len(table)} countries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
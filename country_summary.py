@@ -0,0 +1,82 @@
+"""Per-country summaries behind the globe page, precomputed per dataset version.
+
+For each basis (``company_location`` and ``employee_residence``) one table,
+indexed by alpha-2 code, holds everything the page shows: record count, mean
+and median salary, the title of the highest salary, the most common title and
+experience level, plus the country's alpha-3 code, name and continent. The
+table is also split by continent up front, so a change of metric or region is
+a dictionary lookup and the country overview a row lookup.
+
+Counts and means come from the aggregate cube and medians from the exact
+percentile tables, so figures agree with the other pages. Modes break ties
+like ``Series.mode()[0]``, by the first label in sort order.
+"""
+import pandas as pd
+
+from aggregates import VALUE, get_cube
+from countries import resolve
+from percentiles import get_percentiles
+
+BASES = ["company_location", "employee_residence"]
+COLUMNS = ["count", "mean", "median", "top_paid_title", "top_title", "top_experience",
+           "alpha_3", "name", "continent"]
+
+
+def modes(df, by, column):
+    """Most common ``column`` value per ``by`` group; ties go to the first label in sort order."""
+    counts = df.groupby([by, column], observed=True).size().rename("n").reset_index()
+    counts = counts.sort_values([by, "n", column], ascending=[True, False, True], kind="stable")
+    return counts.drop_duplicates(by).set_index(by)[column]
+
+
+class CountrySummary:
+    """Country tables per basis, whole (``table``) and by continent (``region``)."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.regions = {basis: {continent: frame for continent, frame in table.groupby("continent")}
+                        for basis, table in tables.items()}
+
+    @classmethod
+    def build(cls, dataset):
+        df = dataset.df
+        cube = get_cube(dataset)
+        tables = {}
+        for basis in BASES:
+            rollup = cube.rollup([basis])
+            rollup = rollup[rollup["rows"] > 0]
+            top_paid = df.loc[df.groupby(basis, observed=True)[VALUE].idxmax(), [basis, "job_title"]]
+            table = pd.DataFrame({name: _by_code(values) for name, values in {
+                "count": rollup["rows"],
+                "mean": rollup["mean"],
+                "median": get_percentiles(dataset, basis).table()["p50"],
+                "top_paid_title": top_paid.set_index(basis)["job_title"],
+                "top_title": modes(df, basis, "job_title"),
+                "top_experience": modes(df, basis, "experience_level"),
+            }.items()})
+            table = table.join(resolve(table.index.to_series()))
+            tables[basis] = table[COLUMNS].astype({name: object for name in COLUMNS[3:]})
+        return cls(tables)
+
+    def table(self, basis):
+        return self.tables[basis]
+
+    def region(self, basis, continent):
+        """Countries of one continent; empty when none are in the data."""
+        empty = self.tables[basis].iloc[:0]
+        return self.regions[basis].get(continent, empty)
+
+    def country(self, basis, code):
+        """One country's row as a Series, or None."""
+        table = self.tables[basis]
+        return table.loc[code] if code in table.index else None
+
+
+def _by_code(values):
+    """``values`` re-indexed by plain alpha-2 strings (categorical labels otherwise)."""
+    return pd.Series(values.to_numpy(), index=values.index.astype(str))
+
+
+def get_country_summary(dataset):
+    """The summary store for a ``data_store.Dataset``, built once per version."""
+    return dataset.derived("country_summary", CountrySummary.build)
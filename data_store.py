@@ -0,0 +1,220 @@
+"""Shared, typed access to the cleaned salary dataset.
+
+Pages call ``get_dataset()`` instead of ``pd.read_csv``. The data is loaded
+once per process into compact dtypes and handed out as a versioned ``Dataset``
+handle, so a widget change on any page reuses the same columns.
+
+``preprocessing.py`` writes an Arrow IPC snapshot next to the clean CSV. When it
+is present and up to date it is memory-mapped instead of parsing the CSV.
+Either way ``version`` is the CSV's digest, so adding or removing the
+snapshot does not invalidate anything keyed on it (e.g. model artifacts).
+"""
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLEAN_CSV = os.path.join(ROOT_DIR, "salaries_cyber_clean.csv")
+
+# ----------- Column dtypes -----------
+CATEGORY_COLS = [
+    "experience_level",
+    "employment_type",
+    "job_title",
+    "salary_currency",
+    "employee_residence",
+    "company_location",
+    "company_size",
+]
+
+DTYPES = {
+    "work_year": "int16",
+    "remote_ratio": "int8",
+    "salary": "float64",
+    "salary_in_usd": "float64",
+    **{col: "category" for col in CATEGORY_COLS},
+}
+
+
+# ----------- Dataset handle -----------
+class Dataset:
+    """Read-only view of the cleaned data plus a content ``version``.
+
+    ``df`` is shared by every page in the process: take a shallow copy
+    (``df.copy(deep=False)``) before adding columns. Anything derived from
+    the frame should be built through ``derived`` so it is computed once per
+    version instead of once per rerun.
+    """
+
+    def __init__(self, df, version, source):
+        self.df = df
+        self.version = version
+        self.source = source
+        self._derived = {}
+        # Re-entrant: a builder may itself use other derived values
+        self._lock = threading.RLock()
+
+    def derived(self, name, build):
+        """Return ``build(self)``, memoised on this handle under ``name``."""
+        if name not in self._derived:
+            with self._lock:
+                if name not in self._derived:
+                    self._derived[name] = build(self)
+        return self._derived[name]
+
+    def __repr__(self):
+        return f"Dataset(rows={len(self.df)}, version={self.version!r}, source={self.source!r})"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Short sha256 of a file's bytes, used as the dataset version."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def read_clean_csv(path=CLEAN_CSV):
+    """Parse the cleaned CSV straight into the compact dtypes."""
+    return pd.read_csv(path, dtype=DTYPES)
+
+
+# ----------- Binary snapshot -----------
+def snapshot_paths(csv_path=CLEAN_CSV):
+    """``(snapshot, manifest)`` paths that belong to a clean CSV."""
+    snapshot = os.path.splitext(csv_path)[0] + ".arrow"
+    return snapshot, snapshot + ".json"
+
+
+def write_snapshot(df, csv_path=CLEAN_CSV):
+    """Write ``df`` as an uncompressed Arrow IPC file beside ``csv_path``.
+
+    Categorical columns are stored dictionary-encoded. The manifest records a
+    sha256 of the snapshot plus the size and digest of the CSV it was built
+    alongside, so a CSV edited afterwards is not shadowed by a stale snapshot
+    and both loads report the same ``version``.
+    """
+    return write_snapshot_chunks([df], csv_path)
+
+
+def write_snapshot_chunks(chunks, csv_path=CLEAN_CSV, dtypes=None):
+    """Stream DataFrame chunks into one snapshot (see ``write_snapshot``).
+
+    The IPC file format needs one dictionary per column, so when chunks are
+    cleaned separately ``dtypes`` must pin each categorical column to a
+    ``pd.CategoricalDtype`` with the full category list.
+    """
+    dtypes = DTYPES if dtypes is None else dtypes
+    snapshot, manifest = snapshot_paths(csv_path)
+    writer, schema, rows = None, None, 0
+    with pa.OSFile(snapshot, "wb") as sink:
+        for chunk in chunks:
+            chunk = cast_columns(chunk, dtypes)
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(sink, schema)
+            writer.write_table(table)
+            rows += table.num_rows
+        if writer is not None:
+            writer.close()
+
+    info = {
+        "sha256": file_digest(snapshot),
+        "rows": rows,
+        "columns": schema.names if schema is not None else [],
+        "source_size": os.path.getsize(csv_path) if os.path.exists(csv_path) else None,
+        "source_sha256": file_digest(csv_path) if os.path.exists(csv_path) else None,
+    }
+    with open(manifest, "w") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def cast_columns(df, dtypes):
+    """``df.astype(dtypes)`` for the columns present, honouring category order.
+
+    ``astype`` treats unordered categoricals with the same categories as equal
+    and keeps the old order, which would give each chunk its own dictionary.
+    """
+    casts = {}
+    for col, dtype in dtypes.items():
+        if col not in df:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype) and isinstance(df[col].dtype, pd.CategoricalDtype):
+            casts[col] = df[col].cat.set_categories(dtype.categories)
+        else:
+            casts[col] = df[col].astype(dtype)
+    return df.assign(**casts)
+
+
+def read_snapshot(csv_path=CLEAN_CSV):
+    """Memory-map the snapshot; return ``(df, manifest)`` or ``None``.
+
+    ``None`` means the snapshot is missing or older than the CSV, and the
+    caller should fall back to ``read_clean_csv``. Numeric columns come back
+    as read-only, zero-copy views of the mapped file.
+    """
+    snapshot, manifest = snapshot_paths(csv_path)
+    if not (os.path.exists(snapshot) and os.path.exists(manifest)):
+        return None
+    with open(manifest) as f:
+        info = json.load(f)
+    if os.path.exists(csv_path):
+        csv_stat = os.stat(csv_path)
+        if (csv_stat.st_size != info.get("source_size")
+                or csv_stat.st_mtime_ns > os.stat(snapshot).st_mtime_ns):
+            return None
+
+    source = pa.memory_map(snapshot, "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True), info
+
+
+# ----------- Process-wide cache -----------
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_dataset(path=CLEAN_CSV):
+    """Return the shared ``Dataset`` for ``path``, loading it at most once.
+
+    The data is re-read only when the CSV or its snapshot changes on disk,
+    which also bumps ``version``.
+    """
+    stamp = _stamp(path)
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        snap = read_snapshot(path)
+        if snap is not None:
+            df, info = snap
+            # Manifests written before source_sha256 was recorded: hash the CSV itself
+            version = info.get("source_sha256") or (file_digest(path) if os.path.exists(path) else info["sha256"])
+            dataset = Dataset(df, version, snapshot_paths(path)[0])
+        else:
+            dataset = Dataset(read_clean_csv(path), file_digest(path), path)
+        _cache[path] = (stamp, dataset)
+        return dataset
+
+
+def _stamp(path):
+    stamp = []
+    for p in (path, *snapshot_paths(path)):
+        try:
+            st_ = os.stat(p)
+            stamp.append((st_.st_mtime_ns, st_.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
@@ -0,0 +1,229 @@
+"""Pre-binned salary distributions for the violin and histogram charts.
+
+``px.violin`` and ``go.Histogram`` ship every salary to the browser and let
+Plotly bin them there, so the payload grows with the data. ``GroupDensity``
+bins each group's salaries once per dataset version on a fine grid
+(``GRID_BINS`` bins spanning the group's range, one ``bincount`` over all
+rows) and keeps only what the charts draw:
+
+- a Gaussian KDE evaluated from the binned counts, with Plotly's default
+  bandwidth (Silverman's rule) and "soft" span;
+- quartiles and the whisker ends (the most extreme salaries within 1.5 IQR);
+- the salaries beyond the whiskers, thinned to ``MAX_OUTLIERS`` per group;
+- histogram counts, by merging adjacent grid bins.
+
+``violin_figure`` and ``histogram_trace`` turn those into traces whose size
+depends on the number of groups and points, not rows.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from percentiles import VALUE, get_percentiles
+
+GRID_BINS = 400
+KDE_POINTS = 100
+HIST_BINS = 40
+MAX_OUTLIERS = 100
+QUARTILES = (0.25, 0.5, 0.75)
+ALL = "All"
+
+
+class GroupDensity:
+    """Binned salaries per group; ``density``, ``box``, ``outliers`` and ``histogram`` read from it.
+
+    ``grid[i]`` counts group ``groups[i]`` in ``GRID_BINS`` equal bins from
+    ``lo[i]`` to ``hi[i]``. Outliers are stored like ``ExactPercentiles``
+    values: ``outlier_values[outlier_offsets[i]:outlier_offsets[i + 1]]``.
+    """
+
+    def __init__(self, groups, grid, lo, hi, std, quartiles, fences, outlier_values, outlier_offsets):
+        self.groups = groups
+        self.grid = grid
+        self.lo = lo
+        self.hi = hi
+        self.std = std
+        self.quartiles = quartiles
+        self.fences = fences
+        self.outlier_values = outlier_values
+        self.outlier_offsets = outlier_offsets
+
+    @classmethod
+    def build(cls, keys, values, quartiles, max_outliers=MAX_OUTLIERS):
+        """Bin ``values`` by ``keys``; ``quartiles`` is (groups, 3), Q1/median/Q3 per category."""
+        keys = pd.Series(keys)
+        if not isinstance(keys.dtype, pd.CategoricalDtype):
+            keys = keys.astype("category")
+        groups = keys.cat.categories
+        codes = keys.cat.codes.to_numpy()
+        values = np.asarray(values, dtype=float)
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[valid].astype(np.int64), values[valid]
+        n_groups = len(groups)
+
+        counts = np.bincount(codes, minlength=n_groups)
+        lo = np.full(n_groups, np.nan)
+        hi = np.full(n_groups, np.nan)
+        np.fmin.at(lo, codes, values)
+        np.fmax.at(hi, codes, values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(codes, values, minlength=n_groups) / counts
+            sq = np.bincount(codes, (values - mean[codes]) ** 2, minlength=n_groups)
+            std = np.sqrt(sq / np.maximum(counts - 1, 1))
+
+        width = (hi - lo) / GRID_BINS
+        with np.errstate(invalid="ignore", divide="ignore"):
+            position = np.where(width[codes] > 0, (values - lo[codes]) / width[codes], 0)
+        bins = np.minimum(position.astype(np.int64), GRID_BINS - 1)
+        grid = np.bincount(codes * GRID_BINS + bins, minlength=n_groups * GRID_BINS).reshape(n_groups, GRID_BINS)
+
+        quartiles = np.asarray(quartiles, dtype=float)
+
+        # Whiskers end at the most extreme salaries inside the 1.5 IQR limits
+        iqr = quartiles[:, 2] - quartiles[:, 0]
+        low_limit = quartiles[:, 0] - 1.5 * iqr
+        high_limit = quartiles[:, 2] + 1.5 * iqr
+        inside = (values >= low_limit[codes]) & (values <= high_limit[codes])
+        fences = np.column_stack([np.full(n_groups, np.nan), np.full(n_groups, np.nan)])
+        np.fmin.at(fences[:, 0], codes[inside], values[inside])
+        np.fmax.at(fences[:, 1], codes[inside], values[inside])
+
+        outlier_values, outlier_offsets = _thin(codes[~inside], values[~inside], n_groups, max_outliers)
+        return cls(groups, grid, lo, hi, std, quartiles, fences, outlier_values, outlier_offsets)
+
+    @property
+    def counts(self):
+        return self.grid.sum(axis=1)
+
+    def _index(self, key):
+        return self.groups.get_loc(key)
+
+    def bandwidth(self, key):
+        """Plotly's default KDE bandwidth: 1.059 * min(std, IQR / 1.349) * n^(-1/5)."""
+        i = self._index(key)
+        q1, _, q3 = self.quartiles[i]
+        spread = min(self.std[i], (q3 - q1) / 1.349) or self.std[i]
+        bandwidth = 1.059 * spread * self.counts[i] ** -0.2
+        # Constant groups still get a visible (narrow) shape
+        return bandwidth if bandwidth > 0 else max(abs(self.lo[i]) * 0.01, 1.0)
+
+    def density(self, key, points=KDE_POINTS):
+        """``(salaries, pdf)`` of group ``key``'s KDE at ``points`` salaries."""
+        i = self._index(key)
+        bandwidth = self.bandwidth(key)
+        width = (self.hi[i] - self.lo[i]) / GRID_BINS
+        centers = self.lo[i] + width * (np.arange(GRID_BINS) + 0.5)
+        weights = self.grid[i]
+        used = weights > 0
+        centers, weights = centers[used], weights[used]
+        y = np.linspace(self.lo[i] - 2 * bandwidth, self.hi[i] + 2 * bandwidth, points)
+        z = (y[:, None] - centers[None, :]) / bandwidth
+        pdf = np.exp(-0.5 * z ** 2) @ weights / (weights.sum() * bandwidth * np.sqrt(2 * np.pi))
+        return y, pdf
+
+    def box(self, key):
+        """Quartiles and whisker ends of group ``key``."""
+        i = self._index(key)
+        q1, median, q3 = self.quartiles[i]
+        lowerfence, upperfence = self.fences[i]
+        return {"q1": q1, "median": median, "q3": q3, "lowerfence": lowerfence, "upperfence": upperfence}
+
+    def outliers(self, key):
+        """Salaries beyond the whiskers, ascending, at most ``MAX_OUTLIERS`` of them."""
+        i = self._index(key)
+        return self.outlier_values[self.outlier_offsets[i]:self.outlier_offsets[i + 1]]
+
+    def histogram(self, key=ALL, bins=HIST_BINS):
+        """``(edges, counts)`` of ``bins`` equal bins over group ``key``'s range.
+
+        ``bins`` must divide ``GRID_BINS``.
+        """
+        if GRID_BINS % bins:
+            raise ValueError(f"bins must divide {GRID_BINS}, got {bins}")
+        i = self._index(key)
+        counts = self.grid[i].reshape(bins, -1).sum(axis=1)
+        return np.linspace(self.lo[i], self.hi[i], bins + 1), counts
+
+    def __repr__(self):
+        return f"GroupDensity(groups={len(self.groups)}, rows={int(self.grid.sum()):,})"
+
+
+def _thin(codes, values, n_groups, limit):
+    """``values`` sorted within groups, each group cut to ``limit`` evenly ranked values incl. both ends."""
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    offsets = np.searchsorted(codes, np.arange(n_groups + 1))
+    keep = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        if end - start > limit:
+            keep.append(np.unique(np.linspace(start, end - 1, limit).round().astype(np.int64)))
+        else:
+            keep.append(np.arange(start, end))
+    keep = np.concatenate(keep) if keep else np.empty(0, dtype=np.int64)
+    return values[keep], np.searchsorted(keep, offsets)
+
+
+def build_density(dataset, by=None):
+    """``GroupDensity`` of salaries by column ``by``, or of the whole column when ``by`` is None."""
+    df = dataset.df
+    if by is None:
+        keys = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [ALL])
+        quartiles = np.nanquantile(df[VALUE].to_numpy(dtype=float), QUARTILES)[None, :]
+        return GroupDensity.build(keys, df[VALUE], quartiles)
+    # Quartiles from the shared percentile tables, so boxes match the other pages
+    table = get_percentiles(dataset, by).table(QUARTILES)
+    keys = df[by]
+    groups = keys.cat.categories if isinstance(keys.dtype, pd.CategoricalDtype) else keys.astype("category").cat.categories
+    quartiles = table.drop(columns="count").reindex(groups).to_numpy()
+    return GroupDensity.build(keys, df[VALUE], quartiles)
+
+
+def get_density(dataset, by=None):
+    """The ``GroupDensity`` for a ``data_store.Dataset``, built once per version."""
+    return dataset.derived(f"density:{by or ALL}", lambda ds: build_density(ds, by))
+
+
+def violin_figure(density, keys, colors, half_width=0.4):
+    """Violins (KDE outline, box, outliers) for ``keys`` at x positions 0, 1, ...
+
+    Every violin is scaled to the same maximum width, like Plotly's default
+    ``scalemode="width"``.
+    """
+    fig = go.Figure()
+    for x, key in enumerate(keys):
+        color = colors[x % len(colors)]
+        y, pdf = density.density(key)
+        offset = half_width * pdf / pdf.max()
+        # float32 halves the outline's payload; still sub-dollar on the salary axis
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([x - offset, (x + offset)[::-1]]).astype(np.float32),
+            y=np.concatenate([y, y[::-1]]).astype(np.float32),
+            fill="toself", mode="lines", line=dict(color=color, width=1), fillcolor=color,
+            opacity=0.5, hoverinfo="skip", name=str(key)
+        ))
+        box = density.box(key)
+        fig.add_trace(go.Box(
+            x=[x], **{stat: [value] for stat, value in box.items()},
+            width=0.08, marker_color=color, line_color=color, fillcolor="white", name=str(key),
+            boxpoints=False
+        ))
+        outliers = density.outliers(key)
+        if len(outliers):
+            fig.add_trace(go.Scatter(
+                x=np.full(len(outliers), x), y=outliers, mode="markers",
+                marker=dict(color=color, size=4), name=str(key),
+                hovertemplate=f"{key}<br>$%{{y:,.0f}}<extra></extra>"
+            ))
+    fig.update_xaxes(tickmode="array", tickvals=list(range(len(keys))), ticktext=[str(key) for key in keys])
+    return fig
+
+
+def histogram_trace(density, key=ALL, bins=HIST_BINS, **style):
+    """A ``go.Bar`` of pre-binned counts that draws like ``go.Histogram``."""
+    edges, counts = density.histogram(key, bins)
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="$%{customdata[0]:,.0f}–$%{customdata[1]:,.0f}<br>Count: %{y:,}<extra></extra>",
+        **style
+    )
@@ -0,0 +1,237 @@
+"""K-fold model comparison and hyperparameter search for the salary model.
+
+    python evaluate_models.py --folds 5 --workers 4
+    python evaluate_models.py --families rf --output models/rf_search.csv
+
+Scripted version of ``model_evaluation.ipynb``: the same model families
+(Linear Regression, Random Forest and XGBoost when it is installed) on the
+features and log target of ``salary_model.py``, except that every candidate
+in ``SEARCH_SPACE`` is scored on every fold, in a process pool.
+
+The one-hot design matrix is encoded once per dataset version and handed to
+each worker once, when the pool starts, so a task is only a
+``(family, params, fold)`` triple. The encoder is fitted on all rows; for
+these models that is the same as refitting it per fold with
+``handle_unknown="ignore"``, since a category missing from a training fold
+is an all-zero column there and no split or coefficient can use it.
+
+The leaderboard (CSV plus JSON) has one row per candidate with the mean
+RMSE / R² over folds, fit time, predict latency (per 1,000 rows and for a
+single row, as the Predictive Model page scores it) and memory, as the
+pickled model size: tree arrays are allocated in C, out of sight of
+``tracemalloc``, and the fitted model is what a server keeps resident.
+``is_current`` marks ``salary_model.RF_PARAMS``.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid
+from sklearn.preprocessing import OneHotEncoder
+
+from data_store import CLEAN_CSV, get_dataset
+from salary_model import FEATURES, MODEL_DIR, RF_PARAMS, SPLIT_SEED, TARGET
+
+FOLDS = 5
+LEADERBOARD = os.path.join(MODEL_DIR, "leaderboard.csv")
+# Single-row predictions timed per fold for ``predict_row_ms``
+ROW_REPEATS = 20
+
+
+def _xgb_regressor(**params):
+    from xgboost import XGBRegressor
+    return XGBRegressor(objective="reg:squarederror", verbosity=0, **params)
+
+
+# Family -> (label, estimator factory, takes n_jobs)
+FAMILIES = {
+    "linear": ("Linear Regression", LinearRegression, False),
+    "rf": ("Random Forest", RandomForestRegressor, True),
+    "xgb": ("XGBoost", _xgb_regressor, True),
+}
+
+SEARCH_SPACE = {
+    "linear": {},
+    "rf": {
+        "n_estimators": [100, 300],
+        "max_depth": [12, 18, None],
+        "min_samples_split": [2, 4],
+        "min_samples_leaf": [1, 2],
+        "random_state": [42],
+    },
+    "xgb": {
+        "n_estimators": [300],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [4, 6],
+        "subsample": [0.8],
+        "colsample_bytree": [0.8],
+        "random_state": [42],
+    },
+}
+
+
+def available_families():
+    """Families whose estimator can be imported here (XGBoost is optional)."""
+    return [name for name in FAMILIES
+            if name != "xgb" or importlib.util.find_spec("xgboost") is not None]
+
+
+def candidates(families):
+    """``(family, params)`` for every grid point of the requested families."""
+    return [(family, params) for family in families for params in ParameterGrid(SEARCH_SPACE[family])]
+
+
+# ----------- Design matrix -----------
+def design_matrix(dataset):
+    """``(X, y)``: sparse one-hot features and log salary, built once per dataset version."""
+    def build(ds):
+        X = OneHotEncoder(handle_unknown="ignore").fit_transform(ds.df[FEATURES]).tocsr()
+        return X, np.log1p(ds.df[TARGET].to_numpy(dtype=np.float64))
+    return dataset.derived("design_matrix", build)
+
+
+def fold_indices(n_rows, folds=FOLDS, seed=SPLIT_SEED):
+    return list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(np.arange(n_rows)))
+
+
+# ----------- Worker -----------
+_WORKER = {}
+
+
+def _init_worker(X, y, folds):
+    """Keep the shared design matrix and folds for every task this process runs."""
+    _WORKER.update(X=X, y=y, folds=folds)
+
+
+def evaluate(family, params, fold):
+    """Fit one candidate on one fold; returns a dict of metrics."""
+    X, y = _WORKER["X"], _WORKER["y"]
+    train, test = _WORKER["folds"][fold]
+    _, factory, parallel = FAMILIES[family]
+    model = factory(**params, **({"n_jobs": 1} if parallel else {}))
+    X_train, X_test = X[train], X[test]
+
+    start = time.perf_counter()
+    model.fit(X_train, y[train])
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    row = X_test[:1]
+    row_s = []
+    for _ in range(ROW_REPEATS):
+        start = time.perf_counter()
+        model.predict(row)
+        row_s.append(time.perf_counter() - start)
+
+    return {
+        "family": family,
+        "params": params,
+        "fold": fold,
+        "rmse": float(np.sqrt(mean_squared_error(y[test], y_pred))),
+        "r2": float(r2_score(y[test], y_pred)),
+        "fit_s": fit_s,
+        "predict_ms_per_1k": predict_s * 1e6 / len(test),
+        "predict_row_ms": float(np.median(row_s)) * 1e3,
+        "model_mb": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 2**20,
+    }
+
+
+# ----------- Runner -----------
+def run_search(dataset, families=None, folds=FOLDS, workers=None, progress=None):
+    """Score every candidate on every fold; returns the per-fold results."""
+    families = families or available_families()
+    X, y = design_matrix(dataset)
+    splits = fold_indices(X.shape[0], folds)
+    tasks = [(family, params, fold) for family, params in candidates(families) for fold in range(folds)]
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    if workers == 1:
+        _init_worker(X, y, splits)
+        for task in tasks:
+            results.append(evaluate(*task))
+            if progress:
+                progress(len(results), len(tasks))
+        return results
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, splits)) as pool:
+        for future in as_completed([pool.submit(evaluate, *task) for task in tasks]):
+            results.append(future.result())
+            if progress:
+                progress(len(results), len(tasks))
+    return results
+
+
+def leaderboard(results):
+    """One row per candidate, best mean RMSE first."""
+    frame = pd.DataFrame(results)
+    frame["params"] = frame["params"].map(lambda p: json.dumps(p, sort_keys=True))
+    board = frame.groupby(["family", "params"], sort=False).agg(
+        folds=("fold", "size"),
+        rmse_mean=("rmse", "mean"),
+        rmse_std=("rmse", "std"),
+        r2_mean=("r2", "mean"),
+        fit_s=("fit_s", "mean"),
+        predict_ms_per_1k=("predict_ms_per_1k", "mean"),
+        predict_row_ms=("predict_row_ms", "median"),
+        model_mb=("model_mb", "mean"),
+    ).reset_index()
+    board.insert(1, "model", board["family"].map(lambda f: FAMILIES[f][0]))
+    board["is_current"] = (board["family"] == "rf") & (board["params"] == json.dumps(RF_PARAMS, sort_keys=True))
+    board = board.sort_values("rmse_mean", kind="stable").reset_index(drop=True)
+    board.insert(0, "rank", np.arange(1, len(board) + 1))
+    return board
+
+
+def write_leaderboard(board, path=LEADERBOARD):
+    """Save ``board`` as ``path`` (CSV) and the same name with ``.json``."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    board.to_csv(path, index=False, float_format="%.6g")
+    records = board.assign(params=board["params"].map(json.loads)).to_dict("records")
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump(records, f, indent=2, default=lambda v: v.item())
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate and compare salary model candidates.")
+    parser.add_argument("--data", default=CLEAN_CSV, help="cleaned CSV (its Arrow snapshot is used when present)")
+    parser.add_argument("--families", nargs="+", choices=list(FAMILIES), help="default: every installed family")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default=LEADERBOARD, help="leaderboard CSV; a .json copy is written next to it")
+    args = parser.parse_args(argv)
+
+    families = args.families or available_families()
+    missing = [name for name in families if name not in available_families()]
+    if missing:
+        parser.error(f"not installed: {', '.join(missing)}")
+    if args.families is None and "xgb" not in families:
+        print("xgboost is not installed; skipping the XGBoost family")
+
+    dataset = get_dataset(args.data)
+    n_candidates = len(candidates(families))
+    print(f"{n_candidates} candidates x {args.folds} folds on {len(dataset.df):,} rows (dataset {dataset.version})")
+    results = run_search(dataset, families, args.folds, args.workers,
+                         progress=lambda done, total: print(f"\r{done}/{total} fits", end="", flush=True))
+    print()
+    board = leaderboard(results)
+    write_leaderboard(board, args.output)
+    columns = ["rank", "model", "params", "rmse_mean", "r2_mean", "fit_s", "predict_row_ms", "model_mb", "is_current"]
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(board[columns].head(10).to_string(index=False))
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
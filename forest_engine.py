@@ -0,0 +1,339 @@
+"""Flat-array inference for the one-hot Random Forest salary model.
+
+``FlatForest.from_pipeline`` turns the fitted ``Pipeline`` (``OneHotEncoder``
+over every feature, then ``RandomForestRegressor``) into a few contiguous
+NumPy arrays:
+
+* every tree's nodes concatenated, children as global node ids;
+* one lookup table per feature from raw value to one-hot column.
+
+An input row is then just the index of its active one-hot column for each
+feature (-1 for an unseen value). Because one-hot inputs are 0 or 1, every
+split resolves to a fixed child per input bit, so a level of all trees for a
+block of rows is three flat gathers, with no pandas, sparse matrices or
+per-tree Python calls. Identical rows in a batch are scored once. Tree
+outputs are summed in tree order and divided by the tree count, exactly like
+``RandomForestRegressor.predict``, so results are bit-identical.
+
+``contributions`` splits a prediction into per-feature parts along the same
+traversal (Saabas' path decomposition): each step from a node to its child
+changes the node value, and the change is credited to the split's feature.
+
+The arrays are saved as a directory of ``.npy`` files and loaded memory-mapped,
+so several worker processes share one copy. ``quantize`` narrows them further
+(float32/float16 node values, int32 node ids, int16 column ids) for a
+smaller shared footprint at a bounded loss of precision; one-hot splits need
+no thresholds, so node values are the only floats stored.
+"""
+import json
+import os
+
+import numpy as np
+
+META_FILE = "meta.json"
+ARRAYS = ["split_column", "children", "value", "roots", "importances"]
+
+# Rows scored per traversal block; bounds the (rows x trees) working arrays
+BLOCK_ROWS = 1024
+# Batches at least this large are de-duplicated before scoring
+DEDUP_ROWS = 64
+
+
+class FlatForest:
+    """Contiguous node arrays plus one-hot lookup tables.
+
+    ``split_column[i]`` is node ``i``'s one-hot column (``n_columns`` for a
+    leaf, a column that is never set) and ``children[i]`` its next node when
+    that column is 0 / 1; leaves point to themselves. Indices are stored as
+    int64 so traversal indexes with them directly. Predictions are on the
+    model's target scale (log salary for the page model).
+    """
+
+    def __init__(self, features, categories, arrays, max_depth):
+        self.features = list(features)
+        self.categories = [_as_lookup_array(values) for values in categories]
+        sizes = [len(values) for values in self.categories]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int32)
+        self.lookups = [{_key(v): int(self.offsets[f] + i) for i, v in enumerate(values)}
+                        for f, values in enumerate(self.categories)]
+        # Feature of each one-hot column, plus one past the last for the leaf column
+        self.column_feature = np.append(np.repeat(np.arange(len(self.features)), sizes), len(self.features))
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.max_depth = int(max_depth)
+
+    # ----------- Building -----------
+    @classmethod
+    def from_pipeline(cls, model):
+        """Flatten a fitted ``prep`` (one-hot) + ``rf`` pipeline."""
+        prep = model.named_steps["prep"]
+        ohe = prep.named_transformers_["cat"]
+        features = list(prep.transformers_[0][2])
+        n_columns = sum(len(values) for values in ohe.categories_)
+        owner = np.repeat(np.arange(len(features)), [len(values) for values in ohe.categories_])
+        if n_columns != model.named_steps["rf"].n_features_in_:
+            raise ValueError("FlatForest expects every model input to come from the one-hot encoder")
+        return cls.from_trees([est.tree_ for est in model.named_steps["rf"].estimators_],
+                              features, ohe.categories_, owner,
+                              model.named_steps["rf"].feature_importances_)
+
+    @classmethod
+    def from_trees(cls, trees, features, categories, owner, importances):
+        """Concatenate sklearn ``Tree`` objects over one-hot columns ``owner``."""
+        n_columns = len(owner)
+        counts = np.array([tree.node_count for tree in trees])
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        split, children, value = [], [], []
+        for tree, start in zip(trees, starts):
+            ids = np.arange(tree.node_count) + start
+            leaf = tree.children_left < 0
+            left = np.where(leaf, ids, tree.children_left + start)
+            right = np.where(leaf, ids, tree.children_right + start)
+            # X <= threshold goes left; inputs are 0 or 1 so each split has a fixed child per bit
+            children.append(np.column_stack([np.where(0.0 <= tree.threshold, left, right),
+                                             np.where(1.0 <= tree.threshold, left, right)]))
+            split.append(np.where(leaf, n_columns, tree.feature))
+            value.append(tree.value[:, 0, 0])
+        arrays = {
+            "split_column": np.concatenate(split).astype(np.int64),
+            "children": np.concatenate(children).astype(np.int64),
+            "value": np.concatenate(value).astype(np.float64),
+            "roots": starts.astype(np.int64),
+            "importances": np.asarray(importances, dtype=np.float64),
+        }
+        return cls(features, categories, arrays, max(tree.max_depth for tree in trees))
+
+    def with_categories(self, categories):
+        """This forest on a wider one-hot space; ``categories`` must contain every current value.
+
+        Columns are renumbered (``split_column`` remapped), so existing trees
+        keep their predictions and simply never split on the added values.
+        """
+        categories = [_as_lookup_array(values) for values in categories]
+        offsets = np.concatenate([[0], np.cumsum([len(values) for values in categories])])
+        column_map = np.empty(self.n_columns + 1, dtype=np.int64)
+        for f, values in enumerate(self.categories):
+            pos = np.searchsorted(categories[f], values)
+            if len(values) and (pos.max() >= len(categories[f]) or np.any(categories[f][pos] != values)):
+                raise ValueError(f"New categories for {self.features[f]!r} do not contain the current ones")
+            column_map[self.offsets[f]:self.offsets[f + 1]] = offsets[f] + pos
+        column_map[-1] = offsets[-1]
+        importances = np.zeros(offsets[-1])
+        importances[column_map[:-1]] = self.importances
+        arrays = {name: getattr(self, name) for name in ARRAYS}
+        arrays.update(split_column=column_map[self.split_column], importances=importances)
+        return FlatForest(self.features, categories, arrays, self.max_depth)
+
+    def quantize(self, value_dtype="float32"):
+        """Copy with node values stored as ``value_dtype`` and the narrowest index types that fit.
+
+        Leaf values are widened back to float64 before they are summed, so
+        the only error is the rounding of each stored value.
+        """
+        # Traversal indexes children[2 * node + bit], so 2 * n_nodes must fit too
+        index_dtype = np.int32 if self.n_nodes < 2**30 else np.int64
+        column_dtype = np.int16 if self.n_columns < 2**15 else np.int32
+        arrays = {
+            "split_column": np.asarray(self.split_column, dtype=column_dtype),
+            "children": np.asarray(self.children, dtype=index_dtype),
+            "value": np.asarray(self.value, dtype=value_dtype),
+            "roots": np.asarray(self.roots, dtype=index_dtype),
+            "importances": np.asarray(self.importances, dtype=np.float32),
+        }
+        return FlatForest(self.features, self.categories, arrays, self.max_depth)
+
+    def merge(self, other, drop=0):
+        """This forest without its first ``drop`` trees, followed by all of ``other``'s.
+
+        Both must share features and categories (see ``with_categories``).
+        Importances are combined weighted by tree count, an approximation
+        where trees are dropped since per-tree importances are not kept.
+        """
+        if self.features != other.features or not all(
+                len(a) == len(b) and np.all(a == b) for a, b in zip(self.categories, other.categories)):
+            raise ValueError("Forests must share features and categories to be merged")
+        start = int(self.roots[drop]) if drop < self.n_trees else self.n_nodes
+        kept = self.n_trees - drop
+        arrays = {
+            "split_column": np.concatenate([self.split_column[start:], other.split_column]),
+            "children": np.concatenate([self.children[start:] - start, other.children + (self.n_nodes - start)]),
+            "value": np.concatenate([self.value[start:], other.value]),
+            "roots": np.concatenate([self.roots[drop:] - start, other.roots + (self.n_nodes - start)]),
+            "importances": (self.importances * kept + other.importances * other.n_trees) / (kept + other.n_trees),
+        }
+        return FlatForest(self.features, self.categories, arrays, max(self.max_depth, other.max_depth))
+
+    # ----------- Encoding -----------
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.value)
+
+    @property
+    def n_columns(self):
+        return int(self.offsets[-1])
+
+    @property
+    def nbytes(self):
+        """Size of the node arrays (what a memory map shares between processes)."""
+        return sum(np.asarray(getattr(self, name)).nbytes for name in ARRAYS)
+
+    def encode_row(self, row):
+        """Active one-hot column per feature for one mapping of raw values."""
+        return np.array([[lookup.get(_key(row[name]), -1) for name, lookup in zip(self.features, self.lookups)]],
+                        dtype=np.int32)
+
+    def encode(self, columns):
+        """Active one-hot columns, shape (rows, features), from a mapping of column arrays.
+
+        Works on a dict of lists/arrays or a DataFrame; unseen values map to -1.
+        """
+        return np.column_stack([self.encode_column(f, columns[name]) for f, name in enumerate(self.features)])
+
+    def encode_column(self, f, values):
+        """Active one-hot column of feature ``f`` for an array of raw values (-1 if unseen)."""
+        cats = self.categories[f]
+        values = np.asarray(values).astype(cats.dtype, copy=False)
+        pos = np.minimum(np.searchsorted(cats, values), len(cats) - 1)
+        hit = cats[pos] == values
+        return np.where(hit, self.offsets[f] + pos, -1).astype(np.int32)
+
+    # ----------- Scoring -----------
+    def _dense(self, active):
+        """Flattened dense 0/1 rows plus each row's offset into them."""
+        active = np.asarray(active, dtype=np.int32)
+        n, width = len(active), self.n_columns + 1
+        # One spare, never-set column that leaves point at
+        dense = np.zeros((n, width), dtype=bool)
+        rows, cols = np.nonzero(active >= 0)
+        dense[rows, active[rows, cols]] = True
+        return dense.ravel(), (np.arange(n, dtype=np.int64) * width)[:, None]
+
+    def leaves(self, active):
+        """Leaf node id per (row, tree) for encoded rows."""
+        dense, base = self._dense(active)
+        children = self.children.ravel()
+        nodes = np.repeat(np.asarray(self.roots)[None, :], len(base), axis=0)
+        for _ in range(self.max_depth):
+            bit = dense[base + self.split_column[nodes]]
+            nodes = children[2 * nodes + bit]
+        return nodes
+
+    def tree_values(self, active):
+        """Per-tree predictions, shape (rows, trees)."""
+        return self.value[self.leaves(active)].astype(np.float64, copy=False)
+
+    def _score(self, active, q=None):
+        """Forest mean and, when ``q`` is given, quantiles of the per-tree values."""
+        if len(active) >= DEDUP_ROWS:
+            unique, inverse = np.unique(active, axis=0, return_inverse=True)
+            if len(unique) < len(active):
+                mean, bands = self._score(unique, q)
+                inverse = inverse.ravel()
+                return mean[inverse], None if bands is None else bands[inverse]
+        mean = np.empty(len(active))
+        bands = None if q is None else np.empty((len(active), len(q)))
+        for start in range(0, len(active), BLOCK_ROWS):
+            values = self.tree_values(active[start:start + BLOCK_ROWS])
+            # Sequential sum in tree order, as RandomForestRegressor accumulates
+            mean[start:start + BLOCK_ROWS] = np.cumsum(values, axis=1)[:, -1] / self.n_trees
+            if q is not None:
+                bands[start:start + BLOCK_ROWS] = np.quantile(values, q, axis=1).T
+        return mean, bands
+
+    def predict_encoded(self, active):
+        return self._score(np.asarray(active, dtype=np.int32))[0]
+
+    def predict_intervals_encoded(self, active, q=(0.1, 0.9)):
+        """``(mean, bands)``: the prediction plus per-tree quantiles ``q``, shape (rows, len(q))."""
+        return self._score(np.asarray(active, dtype=np.int32), list(q))
+
+    def predict(self, columns):
+        """Predictions for a mapping of column arrays (dict or DataFrame)."""
+        return self.predict_encoded(self.encode(columns))
+
+    def predict_one(self, row):
+        """Prediction for a single mapping of feature -> raw value."""
+        return float(self.predict_encoded(self.encode_row(row))[0])
+
+    def predict_intervals(self, columns, q=(0.1, 0.9)):
+        """``predict_intervals_encoded`` for a mapping of column arrays."""
+        return self.predict_intervals_encoded(self.encode(columns), q)
+
+    def predict_intervals_one(self, row, q=(0.1, 0.9)):
+        """``(prediction, bands)`` for one row; ``bands`` holds one per-tree quantile per ``q``."""
+        mean, bands = self.predict_intervals_encoded(self.encode_row(row), q)
+        return float(mean[0]), bands[0]
+
+    def contributions_encoded(self, active):
+        """``(bias, contributions)``: the forest's root mean and a (rows, features) split of the rest.
+
+        ``bias + contributions.sum(axis=1)`` equals the prediction up to float
+        rounding. Values are on the model's target scale.
+        """
+        dense, base = self._dense(active)
+        n, n_features = len(base), len(self.features)
+        children = self.children.ravel()
+        nodes = np.repeat(np.asarray(self.roots)[None, :], n, axis=0)
+        # Leaf steps stay in place (zero change) and land in the spare last slot
+        slots = np.arange(n, dtype=np.int64)[:, None] * (n_features + 1)
+        totals = np.zeros(n * (n_features + 1))
+        for _ in range(self.max_depth):
+            split = self.split_column[nodes]
+            following = children[2 * nodes + dense[base + split]]
+            totals += np.bincount((slots + self.column_feature[split]).ravel(),
+                                  weights=(self.value[following].astype(np.float64) - self.value[nodes]).ravel(),
+                                  minlength=len(totals))
+            nodes = following
+        bias = float(np.asarray(self.value)[self.roots].astype(np.float64).mean())
+        return bias, totals.reshape(n, n_features + 1)[:, :n_features] / self.n_trees
+
+    def contributions_one(self, row):
+        """``(bias, contributions)`` for one mapping of feature -> raw value; one entry per ``features``."""
+        bias, contributions = self.contributions_encoded(self.encode_row(row))
+        return bias, contributions[0]
+
+    def feature_importances(self):
+        """Random Forest importances summed over each feature's one-hot columns."""
+        return np.bincount(self.column_feature[:-1], weights=self.importances, minlength=len(self.features))
+
+    # ----------- Persistence -----------
+    def save(self, path):
+        """Write the arrays as ``.npy`` files plus ``meta.json`` into directory ``path``."""
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, name + ".npy"), getattr(self, name))
+        meta = {
+            "features": self.features,
+            "categories": [values.tolist() for values in self.categories],
+            "max_depth": self.max_depth,
+        }
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump(meta, f)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Load a saved forest; with ``mmap_mode`` the node arrays are memory-mapped."""
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(meta["features"], meta["categories"], arrays, meta["max_depth"])
+
+    def __repr__(self):
+        return (f"FlatForest(trees={self.n_trees}, nodes={self.n_nodes}, columns={self.offsets[-1]}, "
+                f"value={np.asarray(self.value).dtype})")
+
+
+def _as_lookup_array(values):
+    """Sorted categories as float64 (numeric features) or object (text) for searchsorted."""
+    values = np.asarray(values)
+    return values.astype(np.float64) if values.dtype.kind in "iuf" else values.astype(object)
+
+
+def _key(value):
+    """Lookup key: numpy scalars and Python numbers of equal value collide."""
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,221 @@
+"""Data prep behind each page, without Streamlit.
+
+Each function takes the shared ``data_store.Dataset`` and returns the frames
+a page charts or tables, reading from the derived stores (aggregate cube,
+percentiles, densities, country summary). The pages only format and render
+what these return, and ``benchmarks/run_benchmarks.py`` times these same
+functions, so a change to a page's data path shows up in the benchmarks.
+
+Batch scoring and the What-if slice live with their engines
+(``batch_predict.predict_frame``, ``PredictionGrid.what_if``).
+"""
+import numpy as np
+import pandas as pd
+
+from aggregates import VALUE, get_cube
+from countries import label_map
+from country_summary import get_country_summary
+from density import get_density
+from percentiles import get_percentiles
+
+
+# ----------- Homepage -----------
+
+def home_overview(dataset):
+    """Numbers behind the "Dataset at a Glance" metrics."""
+    cube = get_cube(dataset)
+    years = cube.rollup(["work_year"]).index
+    return {
+        "records": len(dataset.df),
+        "job_titles": len(cube.rollup(["job_title"])),
+        "years": (years.min(), years.max()),
+        "countries": len(cube.rollup(["company_location"])),
+    }
+
+
+def salary_trend(dataset):
+    """Average salary per ``work_year``."""
+    return get_cube(dataset).rollup(["work_year"])["mean"].rename(VALUE).reset_index()
+
+
+def top_job_titles(dataset, n=5):
+    """The ``n`` most common job titles with their ``count``."""
+    top = get_cube(dataset).rollup(["job_title"])["rows"].nlargest(n).reset_index()
+    top.columns = ["job_title", "count"]
+    return top
+
+
+def experience_distribution(dataset):
+    """Rows per experience level, most common first."""
+    dist = get_cube(dataset).rollup(["experience_level"])["rows"].sort_values(ascending=False).reset_index()
+    dist.columns = ["experience_level", "count"]
+    return dist
+
+
+# ----------- Salary Descriptive -----------
+
+EMPLOYMENT_LABELS = {
+    "FT": "FT (Full Time)", "PT": "PT (Part Time)",
+    "CT": "CT (Contract)", "FL": "FL (Freelance)"
+}
+EXPERIENCE_LABELS = {
+    "EN": "EN (Entry)", "MI": "MI (Mid)",
+    "SE": "SE (Senior)", "EX": "EX (Executive)"
+}
+# Chart type -> (cube dimension, labels, x column) of the comparison bar chart
+COMPARISONS = {
+    "Remote Type": ("remote_mode", None, "remote_mode"),
+    "Experience Level": ("experience_level", EXPERIENCE_LABELS, "experience_level_full"),
+    "Employment Type": ("employment_type", EMPLOYMENT_LABELS, "employment_type_full"),
+}
+HEATMAP_SIZES = {"S": "Small", "M": "Medium", "L": "Large"}
+HEATMAP_EXPERIENCE = {"EN": "Entry", "MI": "Mid", "SE": "Senior", "EX": "Exec"}
+
+
+def mean_salary(dataset, dim, labels=None, label_col=None):
+    """Average ``salary_in_usd`` per ``dim`` from the cube, optionally relabelled."""
+    plot_data = get_cube(dataset).rollup([dim])["mean"].rename(VALUE).reset_index()
+    plot_data[dim] = plot_data[dim].astype(str)
+    if labels:
+        plot_data[label_col] = plot_data[dim].map(labels)
+    return plot_data
+
+
+def top_paid_titles(dataset, n=15):
+    """The ``n`` titles with the highest average salary, with a ``$123k`` label."""
+    top = mean_salary(dataset, "job_title").sort_values(VALUE, ascending=False).head(n)
+    return top.assign(salary_label=top[VALUE].apply(lambda x: f"${int(x / 1000)}k"))
+
+
+def match_titles(title_index, query, titles):
+    """``(mask, close_only)``: which of ``titles`` match ``query``, and whether those are only typo-tolerant matches."""
+    ids, is_fuzzy = title_index.search(query)
+    mask = pd.Index(titles).isin(title_index.titles[ids])
+    return mask, bool(is_fuzzy and mask.any())
+
+
+def violin_groups(dataset, n=10):
+    """``(density, titles)`` of the violin plot: the binned salaries and the ``n`` most common titles."""
+    titles = get_cube(dataset).rollup(["job_title"])["rows"].nlargest(n).index.astype(str)
+    return get_density(dataset, "job_title"), titles
+
+
+def salary_heatmap(dataset):
+    """Average salary by company size (rows) and experience level (columns), labelled and ordered."""
+    heatmap = get_cube(dataset).rollup(["company_size", "experience_level"])["mean"].unstack("experience_level")
+    heatmap.index = heatmap.index.astype(str).map(HEATMAP_SIZES).rename("Company Size")
+    heatmap.columns = heatmap.columns.astype(str).map(HEATMAP_EXPERIENCE).rename("Experience")
+    heatmap = heatmap.reindex(index=list(HEATMAP_SIZES.values()))
+    return heatmap[list(HEATMAP_EXPERIENCE.values())]
+
+
+def salary_comparison(dataset, chart_type):
+    """``(plot_data, x column)`` of the comparison bar chart for one of ``COMPARISONS``."""
+    dim, labels, x_col = COMPARISONS[chart_type]
+    return mean_salary(dataset, dim, labels, x_col), x_col
+
+
+def title_stats(dataset):
+    """Average, median and count per job title seen in the data, indexed by title.
+
+    Built once per version and shared; do not modify.
+    """
+    def build(ds):
+        by_title = get_cube(ds).rollup(["job_title"])
+        titles = by_title.index.astype(str)
+        stats = pd.DataFrame({
+            "avg_salary": by_title["mean"].to_numpy(),
+            "median_salary": get_percentiles(ds, "job_title").table()["p50"].reindex(titles).to_numpy(),
+            "count": by_title["count"].to_numpy(),
+        }, index=titles)
+        return stats[stats["count"] > 0]
+    return dataset.derived("page:title_stats", build)
+
+
+def most_common_titles(dataset, n=25):
+    """``title_stats`` of the ``n`` most common titles, ``job_title`` as a column."""
+    return title_stats(dataset).sort_values(by="count", ascending=False).head(n).reset_index()
+
+
+# ----------- Cyber Expert Map -----------
+
+# Metric -> (country basis, summary column, colour axis title)
+MAP_METRICS = {
+    "Average Salary by Company Location": ("company_location", "mean", "Average Salary (USD)"),
+    "Number of Employees by Residence": ("employee_residence", "count", "Number of Employees"),
+}
+MAP_REGIONS = {"NA": "North America", "EU": "Europe", "SA": "South America", "AF": "Africa", "AS": "Asia"}
+
+
+def region_map(dataset, metric, region):
+    """Countries of ``region`` with the ``metric`` value, alpha-3 code and name, as the globe plots them."""
+    basis, value_col, color_col = MAP_METRICS[metric]
+    region_df = get_country_summary(dataset).region(basis, region)
+    return pd.DataFrame({
+        "Country": region_df.index,
+        color_col: region_df[value_col].to_numpy(),
+        "Country_Code": region_df["alpha_3"].to_numpy(),
+        "Country_Name": region_df["name"].to_numpy()
+    })
+
+
+def country_overview(dataset, metric, code):
+    """Metric / Value table for one country (alpha-2 ``code``) under ``metric``."""
+    basis = MAP_METRICS[metric][0]
+    country = get_country_summary(dataset).country(basis, code)
+    total_records = int(country["count"])
+    if basis == "company_location":
+        rows = {
+            "Total records": f"{total_records:,}",
+            "Average salary (USD)": f"${country['mean']:,.2f}",
+            "Median salary (USD)": f"${country['median']:,.2f}",
+            "Highest-paying role": country["top_paid_title"],
+            "Most common job title": country["top_title"],
+            "Most common experience level": country["top_experience"],
+        }
+    else:
+        rows = {
+            "Total records (residence)": f"{total_records:,}",
+            "Average salary (USD)": f"${country['mean']:,.2f}",
+            "Most common job title": country["top_title"],
+            "Most common experience level": country["top_experience"],
+        }
+    return pd.DataFrame({"Metric": list(rows), "Value": list(rows.values())})
+
+
+# ----------- Predictive Model -----------
+
+def prediction_inputs(dataset):
+    """Selectbox options of the predictor: titles, country labels and remote ratios.
+
+    Built once per version and shared; do not modify.
+    """
+    def build(ds):
+        df = ds.df
+        return {
+            "job_titles": sorted(df["job_title"].unique()),
+            "company_locations": label_map(df["company_location"]),
+            "employee_residences": label_map(df["employee_residence"]),
+            "remote_ratios": sorted(df["remote_ratio"].unique()),
+        }
+    return dataset.derived("page:prediction_inputs", build)
+
+
+def predict_profile(engine, profile, q=(0.1, 0.5, 0.9)):
+    """``(salary, quantiles)`` in USD for one profile: the forest mean and per-tree quantiles ``q``.
+
+    ``expm1`` is monotonic, so the log-scale quantiles map straight to salary quantiles.
+    """
+    log_pred, log_bands = engine.predict_intervals_one(profile, q)
+    return np.expm1(log_pred), np.expm1(log_bands)
+
+
+def contributions_table(engine, profile):
+    """``(bias, table)``: the baseline log salary and each feature's contribution, smallest first."""
+    bias, contributions = engine.contributions_one(profile)
+    table = pd.DataFrame({
+        "feature": engine.features,
+        "value": [str(profile[f]) for f in engine.features],
+        "contribution": contributions
+    })
+    return bias, table.reindex(table["contribution"].abs().sort_values().index)
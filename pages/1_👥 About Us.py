@@ -1,22 +1,11 @@
 import streamlit as st
-import base64
 from pathlib import Path
-import os 
+from assets import data_uri, load_asset
+from rerun_timing import start_page, end_page
 
 # --- Page Configuration ---
 st.set_page_config(page_title="About Us", page_icon="👥")
-
-# --- Function to encode image to Base64 ---
-def get_image_as_base64(path):
-    """Loads the image at the specified path as a Base64 string."""
-    if not Path(path).exists():
-        return None
-    try:
-        with open(path, "rb") as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    except Exception as e:
-        return None
+start_page("about")
 
 # --- Project Root Directory Setup ---
 # Gets the directory of the script (1_👥 About Us.py) and resolves its parent (Assignment folder).
@@ -34,11 +23,10 @@ with col1:
     st.subheader("Who We Are")
     # Build the absolute path to the university logo
     uni_logo_filename = "UOWM_Logo.png"
-    uni_logo_path = Path("images/UOWM_Logo.png")
+    uni_logo = load_asset(uni_logo_filename)
     
-    if uni_logo_path.exists():
-        # st.image handles Pathlib objects correctly
-        st.image(str(uni_logo_path), width=150)
+    if uni_logo is not None:
+        st.image(uni_logo.data, width=150)
     else:
         st.warning(f"University Logo image ({uni_logo_filename}) not found. Please ensure it is in the Assignment folder.")
 
@@ -111,19 +99,17 @@ cols = st.columns(len(team_members))
 
 for i, member in enumerate(team_members):
     with cols[i]:
-        avatar_path  = Path(f"images/{member['image_filename']}")
-        
-        # Check existence and get Base64 string
-        b64_image = get_image_as_base64(str(avatar_path)) 
+        # Check existence and get the cached data URI
+        avatar_uri = data_uri(member['image_filename'])
         
-        if b64_image:
+        if avatar_uri:
             st.markdown(
                 f"""
                 <div style="width:100%; text-align:center;">
                     <a href="{member['github']}" target="_blank"
                     title="View GitHub for {member['name']}"
                     style="text-decoration:none; color:inherit; display:inline-block;">
-                        <img src="data:image/png;base64,{b64_image}" alt="{member['name']}"
+                        <img src="{avatar_uri}" alt="{member['name']}"
                             style="width:120px; height:120px; border-radius:50%;
                                     object-fit:cover; border:2px solid #4CAF50;">
                         <div style="margin-top:10px;">
@@ -190,4 +176,6 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+end_page()
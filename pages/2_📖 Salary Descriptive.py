@@ -1,13 +1,20 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import pycountry
 import plotly.graph_objects as go
 from streamlit_lottie import st_lottie
-import json
+from data_store import get_dataset
+from search_index import get_title_index
+from figure_cache import cached_figure
+from density import violin_figure
+from page_data import (COMPARISONS, match_titles, most_common_titles, salary_comparison, salary_heatmap,
+                       title_stats, top_paid_titles, violin_groups)
+from assets import lottie
+from rerun_timing import fragment, start_page, end_page
 
 # ------------- PAGE CONFIG -------------
 st.set_page_config(page_title="Salary Descriptive in Cybersecurity Workforce", page_icon="📈", layout="wide")
+# Widgets below live in fragments, which rerun on their own (rerun_timing.py)
+start_page("descriptive")
 
 
 # ----------- Title & Intro -----------
@@ -17,13 +24,9 @@ st.markdown("""
 Explore salary patterns, job distribution, and structural insights in the cybersecurity industry.
 """)
 
-# Load your first Lottie animation
-with open("images/Data Extraction.json", "r") as f:
-    lottie_1 = json.load(f)
-
-# Load your second Lottie animation
-with open("images/illustration graph.json", "r") as f:
-    lottie_2 = json.load(f)
+# Load the Lottie animations (minified, parsed once per process)
+lottie_1 = lottie("Data Extraction.json")
+lottie_2 = lottie("illustration graph.json")
 
 # Create 3 columns: empty | animation 1 | animation 2 | empty
 col_left, col_mid1, col_mid2, col_right = st.columns([1, 2, 2, 1])
@@ -35,30 +38,23 @@ with col_mid2:
     st_lottie(lottie_2, speed=1, loop=True, width=250, height=250, key="lottie2")
 
 # ----------- Load Data -----------
-df = pd.read_csv('salaries_cyber_clean.csv')
-
-# ----------- MAPPING LABELS -----------
-employment_map = {
-    'FT': 'FT (Full Time)', 'PT': 'PT (Part Time)',
-    'CT': 'CT (Contract)', 'FL': 'FL (Freelance)'
-}
-experience_map = {
-    'EN': 'EN (Entry)', 'MI': 'MI (Mid)',
-    'SE': 'SE (Senior)', 'EX': 'EX (Executive)'
-}
-df['employment_type_full'] = df['employment_type'].map(employment_map)
-df['experience_level_full'] = df['experience_level'].map(experience_map)
-
-def remote_mode(ratio):
-    if ratio == 0: return "Onsite"
-    elif ratio == 100: return "Remote"
-    else: return "Hybrid"
-df['remote_mode'] = df['remote_ratio'].apply(remote_mode)
-
-size_map = {"S": "Small", "M": "Medium", "L": "Large"}
-exp_map = {"EN": "Entry", "MI": "Mid", "SE": "Senior", "EX": "Exec"}
-df['Company Size'] = df['company_size'].map(size_map)
-df['Experience'] = df['experience_level'].map(exp_map)
+data = get_dataset()
+df = data.df
+# Tables come from page_data.py (cube, percentile and density stores), the
+# same calls the benchmarks time
+title_index = get_title_index(data)
+# Figures are cached as JSON per chart, selection and dataset version (figure_cache.py)
+PAGE = "descriptive"
+
+def search_titles(title_index, query, titles):
+    """Mask of the ``titles`` shown that match ``query`` in the prebuilt index.
+
+    Notes when the matches left after the mask are only typo-tolerant ones.
+    """
+    mask, close_only = match_titles(title_index, query, titles)
+    if close_only:
+        st.caption(f"No exact matches for “{query}”, showing close matches.")
+    return mask
 
 # ----------- TABS FOR NAVIGATION -----------
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
@@ -79,29 +75,32 @@ with tab1:
     </ul>
     """, unsafe_allow_html=True)
     
-    avg_salary_job = df.groupby('job_title', as_index=False)['salary_in_usd'].mean()
-    avg_salary_job = avg_salary_job.sort_values('salary_in_usd', ascending=False).head(15)
-    avg_salary_job['salary_label'] = avg_salary_job['salary_in_usd'].apply(lambda x: f"${int(x/1000)}k")
-    fig_barh = px.bar(
-        avg_salary_job,
-        y='job_title',
-        x='salary_in_usd',
-        orientation='h',
-        color='salary_in_usd',
-        color_continuous_scale='teal',
-        labels={'job_title': 'Job Title', 'salary_in_usd': 'Average Salary (USD)'},
-        text='salary_label'
-    )
-    fig_barh.update_traces(
-        textposition='auto', textfont_size=14,
-        marker_line_color='#39FF14', marker_line_width=0.2
-    )
-    fig_barh.update_layout(
-        yaxis=dict(categoryorder='total ascending', tickfont=dict(size=13)),
-        xaxis=dict(title="Average Salary (USD)", tickfont=dict(size=13)),
-        margin=dict(l=180, r=30, t=60, b=40), height=650,
-        coloraxis_colorbar=dict(title="Average Salary (USD)")
-    )
+    avg_salary_job = top_paid_titles(data, 15)
+
+    def build_barh():
+        fig_barh = px.bar(
+            avg_salary_job,
+            y='job_title',
+            x='salary_in_usd',
+            orientation='h',
+            color='salary_in_usd',
+            color_continuous_scale='teal',
+            labels={'job_title': 'Job Title', 'salary_in_usd': 'Average Salary (USD)'},
+            text='salary_label'
+        )
+        fig_barh.update_traces(
+            textposition='auto', textfont_size=14,
+            marker_line_color='#39FF14', marker_line_width=0.2
+        )
+        fig_barh.update_layout(
+            yaxis=dict(categoryorder='total ascending', tickfont=dict(size=13)),
+            xaxis=dict(title="Average Salary (USD)", tickfont=dict(size=13)),
+            margin=dict(l=180, r=30, t=60, b=40), height=650,
+            coloraxis_colorbar=dict(title="Average Salary (USD)")
+        )
+        return fig_barh
+
+    fig_barh = cached_figure(PAGE, "top15_barh", data.version, build_barh)
     st.plotly_chart(fig_barh, use_container_width=True)
 
     st.markdown("""
@@ -121,23 +120,27 @@ with tab1:
     <p>Type a job title (or part of one) to quickly find details!</p>
     """, unsafe_allow_html=True)
 
-    search = st.text_input("Search job title in Top 15...", value="", key="top15_search")
-    filtered = avg_salary_job[avg_salary_job['job_title'].str.contains(search, case=False, na=False)]
+    @fragment("top15_search")
+    def top15_search(avg_salary_job, title_index):
+        search = st.text_input("Search job title in Top 15...", value="", key="top15_search")
+        filtered = avg_salary_job[search_titles(title_index, search, avg_salary_job['job_title'])]
+
+        # Format for display
+        df_table = filtered.copy()
+        df_table['salary_in_usd'] = df_table['salary_in_usd'].map('${:,.0f}'.format)
+        df_table = df_table.rename(columns={
+            'job_title': 'Job Title',
+            'salary_in_usd': 'Average Salary',
+            'salary_label': 'Salary Label'
+        })
+        # Only show relevant columns
+        st.dataframe(
+            df_table[['Job Title', 'Average Salary']],
+            hide_index=True,
+            use_container_width=True
+        )
 
-    # Format for display
-    df_table = filtered.copy()
-    df_table['salary_in_usd'] = df_table['salary_in_usd'].map('${:,.0f}'.format)
-    df_table = df_table.rename(columns={
-        'job_title': 'Job Title',
-        'salary_in_usd': 'Average Salary',
-        'salary_label': 'Salary Label'
-    })
-    # Only show relevant columns
-    st.dataframe(
-        df_table[['Job Title', 'Average Salary']],
-        hide_index=True,
-        use_container_width=True
-    )
+    top15_search(avg_salary_job, title_index)
 
 
 
@@ -151,17 +154,17 @@ with tab2:
     </ul>
     """, unsafe_allow_html=True)
     
-    top_titles = df['job_title'].value_counts().nlargest(10).index
-    df_top_jobs = df[df['job_title'].isin(top_titles)]
-    fig_violin_job = px.violin(
-        df_top_jobs,
-        x="job_title", y="salary_in_usd", color="job_title",
-        box=True, points="outliers", color_discrete_sequence=px.colors.qualitative.Vivid
-    )
-    fig_violin_job.update_layout(
-        xaxis_title="Job Title", yaxis_title="Salary (USD)", showlegend=False
-    )
-    fig_violin_job.update_xaxes(tickangle=-45)
+    def build_violin():
+        # Pre-binned KDE, box and thinned outliers instead of every salary row
+        density, top_titles = violin_groups(data, 10)
+        fig_violin_job = violin_figure(density, top_titles, px.colors.qualitative.Vivid)
+        fig_violin_job.update_layout(
+            xaxis_title="Job Title", yaxis_title="Salary (USD)", showlegend=False
+        )
+        fig_violin_job.update_xaxes(tickangle=-45)
+        return fig_violin_job
+
+    fig_violin_job = cached_figure(PAGE, "top10_violin", data.version, build_violin)
     st.plotly_chart(fig_violin_job, use_container_width=True)
 
     st.markdown("""
@@ -181,23 +184,17 @@ with tab3:
     </ul>
     """, unsafe_allow_html=True)
     
-    # Create average salary pivot
-    heatmap_data = df.pivot_table(
-        index='Company Size',
-        columns='Experience',
-        values='salary_in_usd',
-        aggfunc='mean'
-    )
-    heatmap_data = heatmap_data.reindex(index=["Small", "Medium", "Large"])
-    heatmap_data = heatmap_data[["Entry", "Mid", "Senior", "Exec"]]
-    
-    fig_heatmap = px.imshow(
-        heatmap_data,
-        text_auto=True,
-        color_continuous_scale='viridis',
-        aspect='auto',
-        labels=dict(x="Experience Level", y="Company Size", color="Avg Salary (USD)"),
-    )
+    def build_heatmap():
+        # Average salary pivot, Small..Large x Entry..Exec
+        return px.imshow(
+            salary_heatmap(data),
+            text_auto=True,
+            color_continuous_scale='viridis',
+            aspect='auto',
+            labels=dict(x="Experience Level", y="Company Size", color="Avg Salary (USD)"),
+        )
+
+    fig_heatmap = cached_figure(PAGE, "size_exp_heatmap", data.version, build_heatmap)
     st.plotly_chart(fig_heatmap, use_container_width=True)
 
     st.markdown("""
@@ -218,65 +215,53 @@ with tab4:
     </ul>
     """, unsafe_allow_html=True)
     
-    chart_type = st.selectbox(
-        "Compare Average Salary by...",
-        ["Remote Type", "Experience Level", "Employment Type"],
-        index=0
-    )
-
-    if chart_type == "Remote Type":
-        plot_data = df.groupby('remote_mode')['salary_in_usd'].mean().reset_index()
-        fig = px.bar(
-            plot_data, x='remote_mode', y='salary_in_usd',
-            text='salary_in_usd',
-            color='remote_mode',
-            color_discrete_sequence=px.colors.qualitative.Set2,
-            labels={'remote_mode': "Remote Type", 'salary_in_usd': "Average Salary (USD)"}
-        )
-        fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig.update_layout(showlegend=False, yaxis_title="Average Salary (USD)", xaxis_title=None, height=400)
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown("""
-        <span style='color: #888; font-size: 1.05em'>
-        <b>Insight:</b> Remote and hybrid roles tend to offer higher average salaries compared to onsite roles, reflecting the global demand and flexibility for remote cybersecurity professionals.
-        </span>
-        """, unsafe_allow_html=True)
-
-    elif chart_type == "Experience Level":
-        plot_data = df.groupby('experience_level_full')['salary_in_usd'].mean().reset_index()
-        fig = px.bar(
-            plot_data, x='experience_level_full', y='salary_in_usd',
-            text='salary_in_usd',
-            color='experience_level_full',
-            color_discrete_sequence=px.colors.qualitative.Set2,
-            labels={'experience_level_full': "Experience Level", 'salary_in_usd': "Average Salary (USD)"}
-        )
-        fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig.update_layout(showlegend=False, yaxis_title="Average Salary (USD)", xaxis_title=None, height=400)
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown("""
-        <span style='color: #888; font-size: 1.05em'>
-        <b>Insight:</b> Salary increases significantly with experience level. Executive and senior roles command the highest pay, while entry-level positions start much lower.
-        </span>
-        """, unsafe_allow_html=True)
-
-    else:  # Employment Type
-        plot_data = df.groupby('employment_type_full')['salary_in_usd'].mean().reset_index()
-        fig = px.bar(
-            plot_data, x='employment_type_full', y='salary_in_usd',
-            text='salary_in_usd',
-            color='employment_type_full',
-            color_discrete_sequence=px.colors.qualitative.Set2,
-            labels={'employment_type_full': "Employment Type", 'salary_in_usd': "Average Salary (USD)"}
+    @fragment("comparison")
+    def comparison_section(data):
+        # Column shown and its labels for each comparison: page_data.COMPARISONS
+        chart_type = st.selectbox(
+            "Compare Average Salary by...",
+            list(COMPARISONS),
+            index=0
         )
-        fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig.update_layout(showlegend=False, yaxis_title="Average Salary (USD)", xaxis_title=None, height=400)
+
+        def build_comparison():
+            plot_data, x_col = salary_comparison(data, chart_type)
+            fig = px.bar(
+                plot_data, x=x_col, y='salary_in_usd',
+                text='salary_in_usd',
+                color=x_col,
+                color_discrete_sequence=px.colors.qualitative.Set2,
+                labels={x_col: chart_type, 'salary_in_usd': "Average Salary (USD)"}
+            )
+            fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+            fig.update_layout(showlegend=False, yaxis_title="Average Salary (USD)", xaxis_title=None, height=400)
+            return fig
+
+        fig = cached_figure(PAGE, "comparison_bar", data.version, build_comparison, chart_type=chart_type)
         st.plotly_chart(fig, use_container_width=True)
-        st.markdown("""
-        <span style='color: #888; font-size: 1.05em'>
-        <b>Insight:</b> Full-time jobs offer the highest average salary, followed by contract and freelance roles. Part-time work pays significantly less, as expected in the cybersecurity sector.
-        </span>
-        """, unsafe_allow_html=True)
+
+        if chart_type == "Remote Type":
+            st.markdown("""
+            <span style='color: #888; font-size: 1.05em'>
+            <b>Insight:</b> Remote and hybrid roles tend to offer higher average salaries compared to onsite roles, reflecting the global demand and flexibility for remote cybersecurity professionals.
+            </span>
+            """, unsafe_allow_html=True)
+
+        elif chart_type == "Experience Level":
+            st.markdown("""
+            <span style='color: #888; font-size: 1.05em'>
+            <b>Insight:</b> Salary increases significantly with experience level. Executive and senior roles command the highest pay, while entry-level positions start much lower.
+            </span>
+            """, unsafe_allow_html=True)
+
+        else:  # Employment Type
+            st.markdown("""
+            <span style='color: #888; font-size: 1.05em'>
+            <b>Insight:</b> Full-time jobs offer the highest average salary, followed by contract and freelance roles. Part-time work pays significantly less, as expected in the cybersecurity sector.
+            </span>
+            """, unsafe_allow_html=True)
+
+    comparison_section(data)
 
 
 # ----------- TAB 5: Job Distribution Treemap -----------
@@ -291,47 +276,41 @@ with tab5:
     </ul>
     """, unsafe_allow_html=True)
 
-    # ---- Prepare Top 25 Only ----
-    job_counts = (
-        df.dropna(subset=['salary_in_usd'])
-        .groupby('job_title')
-        .agg(
-            avg_salary=('salary_in_usd', 'mean'),
-            median_salary=('salary_in_usd', 'median'),
-            count=('salary_in_usd', 'count')
+    # ---- Per-title stats (all titles), then Top 25 Only ----
+    full_jobs = title_stats(data)
+
+    def build_treemap():
+        job_counts = most_common_titles(data, 25)                      # ← LIMIT TO TOP 25
+
+        # ---- TREEMAP ----
+        palette = px.colors.qualitative.Vivid + px.colors.qualitative.Pastel
+
+        fig_tree = px.treemap(
+            job_counts,
+            path=['job_title'],
+            values='count',
+            color='count',                      # simple clean color scale
+            color_continuous_scale='Tealgrn',
+            custom_data=['job_title', 'avg_salary', 'median_salary', 'count']
         )
-        .sort_values(by='count', ascending=False)
-        .head(25)                      # ← LIMIT TO TOP 25
-        .reset_index()
-    )
-
-    # ---- TREEMAP ----
-    palette = px.colors.qualitative.Vivid + px.colors.qualitative.Pastel
-
-    fig_tree = px.treemap(
-        job_counts,
-        path=['job_title'],
-        values='count',
-        color='count',                      # simple clean color scale
-        color_continuous_scale='Tealgrn',
-        custom_data=['job_title', 'avg_salary', 'median_salary', 'count']
-    )
-
-    fig_tree.update_traces(
-        texttemplate="<b>%{label}</b><br>n=%{customdata[3]:,}",     # SHOW COUNT ONLY
-        hovertemplate=(
-            "<b>%{customdata[0]}</b><br><br>"
-            "Avg Salary: $%{customdata[1]:,.0f}<br>"
-            "Median Salary: $%{customdata[2]:,.0f}<br>"
-            "Count: %{customdata[3]:,}<extra></extra>"
+
+        fig_tree.update_traces(
+            texttemplate="<b>%{label}</b><br>n=%{customdata[3]:,}",     # SHOW COUNT ONLY
+            hovertemplate=(
+                "<b>%{customdata[0]}</b><br><br>"
+                "Avg Salary: $%{customdata[1]:,.0f}<br>"
+                "Median Salary: $%{customdata[2]:,.0f}<br>"
+                "Count: %{customdata[3]:,}<extra></extra>"
+            )
         )
-    )
 
-    fig_tree.update_layout(
-        height=600,
-        margin=dict(l=40, r=40, t=40, b=40)     # ← CLEAN MARGINS
-    )
+        fig_tree.update_layout(
+            height=600,
+            margin=dict(l=40, r=40, t=40, b=40)     # ← CLEAN MARGINS
+        )
+        return fig_tree
 
+    fig_tree = cached_figure(PAGE, "top25_treemap", data.version, build_treemap)
     st.plotly_chart(fig_tree, use_container_width=True)
 
     st.markdown("""
@@ -359,32 +338,27 @@ with tab5:
     <p>Use the search bar to instantly find salary statistics for any cybersecurity role across the dataset.</p>
     """, unsafe_allow_html=True)
 
-    search = st.text_input("Search by job title...", value="", key="job_search")
+    @fragment("title_search")
+    def title_search(full_jobs, title_index):
+        search = st.text_input("Search by job title...", value="", key="job_search")
 
-    # Table uses FULL dataset, not only top 25
-    full_jobs = (
-        df.dropna(subset=['salary_in_usd'])
-        .groupby('job_title')
-        .agg(
-            avg_salary=('salary_in_usd', 'mean'),
-            median_salary=('salary_in_usd', 'median'),
-            count=('salary_in_usd', 'count')
-        )
-        .reset_index()
-    )
+        # Table uses FULL dataset, not only top 25
+        filtered = full_jobs[search_titles(title_index, search, full_jobs.index)].reset_index()
+
+        # Format for table
+        df_table = filtered.copy()
+        df_table['avg_salary'] = df_table['avg_salary'].map('${:,.0f}'.format)
+        df_table['median_salary'] = df_table['median_salary'].map('${:,.0f}'.format)
 
-    filtered = full_jobs[full_jobs['job_title'].str.contains(search, case=False, na=False)]
+        df_table = df_table.rename(columns={
+            'job_title': 'Job Title',
+            'avg_salary': 'Avg Salary',
+            'median_salary': 'Median Salary',
+            'count': 'Records'
+        })
 
-    # Format for table
-    df_table = filtered.copy()
-    df_table['avg_salary'] = df_table['avg_salary'].map('${:,.0f}'.format)
-    df_table['median_salary'] = df_table['median_salary'].map('${:,.0f}'.format)
+        st.dataframe(df_table.reset_index(drop=True), hide_index=True, use_container_width=True)
 
-    df_table = df_table.rename(columns={
-        'job_title': 'Job Title',
-        'avg_salary': 'Avg Salary',
-        'median_salary': 'Median Salary',
-        'count': 'Records'
-    })
+    title_search(full_jobs, title_index)
 
-    st.dataframe(df_table.reset_index(drop=True), hide_index=True, use_container_width=True)
+end_page()
@@ -1,13 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pycountry
+from data_store import get_dataset
+from salary_model import load_engine, load_metrics
+from prediction_grid import load_grid
+from density import get_density, histogram_trace
+from figure_cache import cached_figure
+from rerun_timing import fragment, start_page, end_page
+from batch_predict import BatchValidationError, predict_frame
+from page_data import contributions_table, predict_profile, prediction_inputs
 import plotly.graph_objects as go
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
 
 # ---------------------------------------------------------
 # PAGE CONFIG
@@ -17,6 +19,8 @@ st.set_page_config(
     layout="wide",
     page_icon="💼"
 )
+# Each interactive section below reruns as a fragment (rerun_timing.py)
+start_page("predict")
 
 # HEADER
 st.markdown("""
@@ -36,24 +40,17 @@ st.markdown('<h1 class="main-header">💼 Cybersecurity Salary Prediction</h1>',
 # ---------------------------------------------------------
 # LOAD DATA
 # ---------------------------------------------------------
-@st.cache_data
-def load_data():
-    return pd.read_csv("salaries_cyber_clean.csv")
-
-df = load_data()
+data = get_dataset()
+df = data.df
 
 # ---------------------------------------------------------
-# COUNTRY NAME EXPANSION
+# INPUT OPTIONS
 # ---------------------------------------------------------
-def expand_country(code):
-    try:
-        country = pycountry.countries.get(alpha_2=code)
-        return f"{code} — {country.name}" if country else f"{code} — Unknown"
-    except:
-        return f"{code} — Unknown"
-
-company_location_map = {c: expand_country(c) for c in df["company_location"].unique()}
-employee_residence_map = {c: expand_country(c) for c in df["employee_residence"].unique()}
+# Titles, remote ratios and "US — United States" country labels, built once
+# per dataset version (page_data.py, countries.py)
+inputs = prediction_inputs(data)
+company_location_map = inputs["company_locations"]
+employee_residence_map = inputs["employee_residences"]
 
 # ---------------------------------------------------------
 # LABEL MAPPINGS
@@ -75,50 +72,16 @@ employment_map = {
 size_map = {"S": "S — Small", "M": "M — Medium", "L": "L — Large"}
 
 # ---------------------------------------------------------
-# TRAIN RANDOM FOREST MODEL (LOG TARGET)
+# RANDOM FOREST MODEL (LOG TARGET)
 # ---------------------------------------------------------
-FEATURES = [
-    "job_title",
-    "experience_level",
-    "employment_type",
-    "company_location",
-    "company_size",
-    "employee_residence",
-    "remote_ratio"
-]
-
+# Flat inference arrays memory-mapped from the versioned artifact in models/
+# (see salary_model.py and forest_engine.py); the model is trained only when
+# no artifact matches this dataset and these hyperparameters
 @st.cache_resource
-def train_final_rf(data):
-
-    X = data[FEATURES]
-    y_log = np.log1p(data["salary_in_usd"])
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y_log, test_size=0.2, random_state=42
-    )
-
-    preprocessor = ColumnTransformer(
-        [("cat", OneHotEncoder(handle_unknown="ignore"), FEATURES)],
-        remainder="passthrough"
-    )
-
-    rf = RandomForestRegressor(
-        n_estimators=300,
-        max_depth=18,
-        min_samples_split=4,
-        min_samples_leaf=2,
-        random_state=42
-    )
+def load_final_rf(_data, version):
+    return load_engine(_data)
 
-    model = Pipeline([
-        ("prep", preprocessor),
-        ("rf", rf)
-    ])
-
-    model.fit(X_train, y_train)
-    return model
-
-rf_model = train_final_rf(df)
+rf_engine = load_final_rf(data, data.version)
 
 # ---------------------------------------------------------
 # SIDEBAR
@@ -136,172 +99,391 @@ st.sidebar.markdown(f"""
 - **Average Salary:** ${df['salary_in_usd'].mean():,.0f}  
 """)
 
+# Test-split metrics recorded in the loaded artifact's manifest (log target)
 st.sidebar.subheader("📊 Model Performance")
-st.sidebar.success("**MSE:** 0.198034")
-st.sidebar.success("**RMSE:** 0.445010")
-st.sidebar.success("**R²:** 0.527677")
+model_metrics = load_metrics(data)
+if model_metrics:
+    st.sidebar.success(f"**MSE:** {model_metrics['mse']:.6f}")
+    st.sidebar.success(f"**RMSE:** {model_metrics['rmse']:.6f}")
+    st.sidebar.success(f"**R²:** {model_metrics['r2']:.6f}")
+else:
+    st.sidebar.info("No test metrics recorded for this model; run `python salary_model.py train`.")
 
 # ---------------------------------------------------------
-# USER INPUTS
+# WHAT-IF EXPLORER (PRECOMPUTED GRID)
 # ---------------------------------------------------------
-st.markdown("---")
-st.subheader("🔮 Predict Cybersecurity Salary")
+# Every experience x size x remote x employment combination of every job /
+# location pair in the data, scored once per model (see prediction_grid.py)
+@st.cache_resource
+def load_what_if_grid(_data, _engine, version):
+    return load_grid(_data, _engine)
 
-col1, col2, col3 = st.columns(3)
-with col1:
-    job = st.selectbox("👔 Job Title", sorted(df["job_title"].unique()))
+what_if_grid = load_what_if_grid(data, rf_engine, data.version)
 
-with col2:
-    exp_label = st.selectbox(
-        "📈 Experience Level",
-        [experience_map[e] for e in sorted(experience_map.keys())]
+# ---------------------------------------------------------
+# WHAT-IF EXPLORER UI
+# ---------------------------------------------------------
+# Its two selectboxes rerun only this fragment; the prediction inputs rerun
+# it together with the prediction
+@fragment("what_if")
+def what_if_section(what_if_grid, rf_engine, job, comp_loc, emp_res, remote, emp_type):
+    st.markdown("---")
+    st.subheader("🧪 What-if Explorer")
+    st.caption(
+        f"How the predicted salary for a {job} in {company_location_map.get(comp_loc, comp_loc)} changes with "
+        "experience and company size. Remote ratio and employment type can be changed here without re-running the model."
     )
-    exp = exp_label.split(" — ")[0]
 
-with col3:
-    emp_type_label = st.selectbox(
-        "💼 Employment Type",
-        [employment_map[e] for e in sorted(employment_map.keys())]
+    wcol1, wcol2 = st.columns(2)
+    with wcol1:
+        remote_options = [int(r) for r in what_if_grid.axes["remote_ratio"]]
+        wi_remote = st.selectbox(
+            "🧑‍💻 Remote Ratio (%)", remote_options,
+            index=remote_options.index(remote) if remote in remote_options else 0,
+            key="what_if_remote"
+        )
+    with wcol2:
+        emp_options = what_if_grid.axes["employment_type"]
+        wi_emp_label = st.selectbox(
+            "💼 Employment Type", [employment_map.get(e, e) for e in emp_options],
+            index=emp_options.index(emp_type) if emp_type in emp_options else 0,
+            key="what_if_employment"
+        )
+        wi_emp = wi_emp_label.split(" — ")[0]
+
+    what_if = what_if_grid.what_if(
+        job, comp_loc, rf_engine, emp_res,
+        remote_ratio=wi_remote, employment_type=wi_emp
     )
-    emp_type = emp_type_label.split(" — ")[0]
+    exp_labels = [experience_map.get(e, e) for e in what_if.index]
+    size_labels = [size_map.get(s, s) for s in what_if.columns]
+
+    wcol3, wcol4 = st.columns(2)
+    with wcol3:
+        fig_wi = go.Figure(go.Heatmap(
+            z=what_if.to_numpy(),
+            x=size_labels,
+            y=exp_labels,
+            colorscale="Purples",
+            text=[[f"${v:,.0f}" for v in row] for row in what_if.to_numpy()],
+            texttemplate="%{text}",
+            hovertemplate="%{y}<br>%{x}<br>%{text}<extra></extra>",
+            colorbar=dict(title="USD")
+        ))
+        fig_wi.update_layout(
+            title="Predicted Salary by Experience and Company Size",
+            template="plotly_white",
+            height=420
+        )
+        st.plotly_chart(fig_wi, use_container_width=True)
+
+    with wcol4:
+        fig_wi_line = go.Figure()
+        for size, label in zip(what_if.columns, size_labels):
+            fig_wi_line.add_trace(go.Scatter(
+                x=exp_labels,
+                y=what_if[size],
+                mode="lines+markers",
+                name=label
+            ))
+        fig_wi_line.update_layout(
+            title="Salary Progression by Experience",
+            xaxis_title="Experience Level",
+            yaxis_title="Predicted Salary (USD)",
+            template="plotly_white",
+            height=420
+        )
+        st.plotly_chart(fig_wi_line, use_container_width=True)
+
+    if (job, comp_loc) in what_if_grid.index:
+        residence = what_if_grid.residences[what_if_grid.index[(job, comp_loc)]]
+        st.caption(f"Employee residence is fixed at {employee_residence_map.get(residence, residence)}, "
+                   "the most common one for this job and location.")
+
+
+# Inputs, prediction and explanation rerun together as one fragment;
+# the sidebar, data and model loading above do not
+@fragment("prediction")
+def prediction_section(data, df, rf_engine, what_if_grid):
+    # ---------------------------------------------------------
+    # USER INPUTS
+    # ---------------------------------------------------------
+    st.markdown("---")
+    st.subheader("🔮 Predict Cybersecurity Salary")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        job = st.selectbox("👔 Job Title", inputs["job_titles"])
+
+    with col2:
+        exp_label = st.selectbox(
+            "📈 Experience Level",
+            [experience_map[e] for e in sorted(experience_map.keys())]
+        )
+        exp = exp_label.split(" — ")[0]
+
+    with col3:
+        emp_type_label = st.selectbox(
+            "💼 Employment Type",
+            [employment_map[e] for e in sorted(employment_map.keys())]
+        )
+        emp_type = emp_type_label.split(" — ")[0]
+
+    col4, col5, col6 = st.columns(3)
+    with col4:
+        comp_loc_label = st.selectbox(
+            "🌍 Company Location",
+            [company_location_map[c] for c in sorted(company_location_map.keys())]
+        )
+        comp_loc = comp_loc_label.split(" — ")[0]
+
+    with col5:
+        emp_res_label = st.selectbox(
+            "🏡 Employee Residence",
+            [employee_residence_map[c] for c in sorted(employee_residence_map.keys())]
+        )
+        emp_res = emp_res_label.split(" — ")[0]
+
+    with col6:
+        remote = st.selectbox("🧑‍💻 Remote Ratio (%)", inputs["remote_ratios"])
+
+    size_label = st.selectbox(
+        "🏢 Company Size",
+        [size_map[s] for s in sorted(size_map.keys())]
+    )
+    company_size = size_label.split(" — ")[0]
+
+    # ---------------------------------------------------------
+    # AUTO PREDICTION
+    # ---------------------------------------------------------
+    user_input = {
+        "job_title": job,
+        "experience_level": exp,
+        "employment_type": emp_type,
+        "company_location": comp_loc,
+        "company_size": company_size,
+        "employee_residence": emp_res,
+        "remote_ratio": remote
+    }
 
-col4, col5, col6 = st.columns(3)
-with col4:
-    comp_loc_label = st.selectbox(
-        "🌍 Company Location",
-        [company_location_map[c] for c in sorted(company_location_map.keys())]
+    # Forest mean plus P10/P50/P90 of the individual trees' predictions, from
+    # the same traversal (page_data.predict_profile)
+    salary_pred, (salary_p10, salary_p50, salary_p90) = predict_profile(rf_engine, user_input)
+
+    # DISPLAY RESULT (Gradient Highlight Box)
+    st.markdown(f"""
+    <div style="
+        padding: 22px;
+        border-radius: 14px;
+        background: linear-gradient(135deg, #667eea20, #764ba220);
+        border-left: 6px solid #667eea;
+        box-shadow: 0 3px 10px rgba(0,0,0,0.12);
+        margin-bottom: 25px;
+    ">
+        <h3 style="margin: 0; font-weight: 600;">💰 Predicted Salary</h3>
+        <p style="font-size: 2rem; font-weight: bold; margin-top: 8px;">
+            ${salary_pred:,.2f}
+        </p>
+        <p style="margin: 0; opacity: 0.8;">
+            Likely range (P10–P90): <b>${salary_p10:,.0f}</b> – <b>${salary_p90:,.0f}</b>
+            &nbsp;·&nbsp; Median tree (P50): <b>${salary_p50:,.0f}</b>
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+
+    # ---------------------------------------------------------
+    # SALARY DISTRIBUTION COMPARISON
+    # ---------------------------------------------------------
+    st.subheader("📊 Salary Distribution Comparison")
+
+    st.caption("This chart compares your predicted salary with the real salary distribution in the dataset. The red line shows your predicted value and the shaded band the P10–P90 range of the forest's individual trees.")
+
+    fig_dist = go.Figure()
+
+    # Bin counts computed once per dataset version, not the whole salary column
+    fig_dist.add_trace(histogram_trace(
+        get_density(data),
+        marker=dict(color="#667eea"),
+        opacity=0.75,
+        name="Training Salary Distribution"
+    ))
+
+    fig_dist.add_vrect(
+        x0=salary_p10,
+        x1=salary_p90,
+        fillcolor="red",
+        opacity=0.12,
+        line_width=0,
+        annotation_text="P10–P90",
+        annotation_position="top left"
     )
-    comp_loc = comp_loc_label.split(" — ")[0]
 
-with col5:
-    emp_res_label = st.selectbox(
-        "🏡 Employee Residence",
-        [employee_residence_map[c] for c in sorted(employee_residence_map.keys())]
+    fig_dist.add_vline(
+        x=salary_p50,
+        line_width=2,
+        line_dash="dot",
+        line_color="red"
     )
-    emp_res = emp_res_label.split(" — ")[0]
 
-with col6:
-    remote = st.selectbox("🧑‍💻 Remote Ratio (%)", sorted(df["remote_ratio"].unique()))
+    fig_dist.add_vline(
+        x=salary_pred,
+        line_width=3,
+        line_color="red",
+        annotation_text="Predicted Salary",
+        annotation_position="top"
+    )
 
-size_label = st.selectbox(
-    "🏢 Company Size",
-    [size_map[s] for s in sorted(size_map.keys())]
-)
-company_size = size_label.split(" — ")[0]
+    fig_dist.update_layout(
+        xaxis_title="Salary (USD)",
+        yaxis_title="Count",
+        template="plotly_white",
+        height=450
+    )
 
-# ---------------------------------------------------------
-# AUTO PREDICTION
-# ---------------------------------------------------------
-user_input = pd.DataFrame([{
-    "job_title": job,
-    "experience_level": exp,
-    "employment_type": emp_type,
-    "company_location": comp_loc,
-    "company_size": company_size,
-    "employee_residence": emp_res,
-    "remote_ratio": remote
-}])
-
-log_pred = rf_model.predict(user_input)[0]
-salary_pred = np.expm1(log_pred)
-
-# DISPLAY RESULT (Gradient Highlight Box)
-st.markdown(f"""
-<div style="
-    padding: 22px;
-    border-radius: 14px;
-    background: linear-gradient(135deg, #667eea20, #764ba220);
-    border-left: 6px solid #667eea;
-    box-shadow: 0 3px 10px rgba(0,0,0,0.12);
-    margin-bottom: 25px;
-">
-    <h3 style="margin: 0; font-weight: 600;">💰 Predicted Salary</h3>
-    <p style="font-size: 2rem; font-weight: bold; margin-top: 8px;">
-        ${salary_pred:,.2f}
-    </p>
-</div>
-""", unsafe_allow_html=True)
+    st.plotly_chart(fig_dist, use_container_width=True)
+
+    # ---------------------------------------------------------
+    # WHY THIS PREDICTION (PER-PREDICTION CONTRIBUTIONS)
+    # ---------------------------------------------------------
+    st.subheader("🧭 Why This Prediction")
+    st.caption(
+        "How much each of your inputs moved this prediction away from the baseline, the forest's average over its training data. "
+        "Contributions are on the log-salary scale the model predicts, so +0.10 is roughly +10.5% salary."
+    )
 
+    # Path decomposition along the same forest traversal as the prediction
+    bias, contrib_df = contributions_table(rf_engine, user_input)
+
+    fig_contrib = go.Figure()
+
+    fig_contrib.add_trace(go.Bar(
+        x=contrib_df["contribution"],
+        y=contrib_df["feature"] + " = " + contrib_df["value"],
+        orientation="h",
+        marker=dict(
+            color=np.where(contrib_df["contribution"] >= 0, "#2ca02c", "#d62728"),
+            line=dict(color="black", width=1)
+        ),
+        customdata=np.expm1(contrib_df["contribution"]) * 100,
+        hovertemplate="%{y}<br>%{x:+.3f} log-salary (≈ %{customdata:+.1f}%)<extra></extra>"
+    ))
+
+    fig_contrib.add_vline(x=0, line_width=1, line_color="gray")
+
+    fig_contrib.update_layout(
+        xaxis_title="Contribution to log(salary)",
+        yaxis_title="Feature",
+        template="plotly_white",
+        height=450
+    )
 
+    st.plotly_chart(fig_contrib, use_container_width=True)
+    st.caption(f"Baseline ${np.expm1(bias):,.0f} + contributions → your prediction ${salary_pred:,.0f}")
 
-# ---------------------------------------------------------
-# SALARY DISTRIBUTION COMPARISON
-# ---------------------------------------------------------
-st.subheader("📊 Salary Distribution Comparison")
-
-st.caption("This chart compares your predicted salary with the real salary distribution in the dataset. The red line shows your predicted value.")
-
-fig_dist = go.Figure()
-
-fig_dist.add_trace(go.Histogram(
-    x=df["salary_in_usd"],
-    nbinsx=40,
-    marker=dict(color="#667eea"),
-    opacity=0.75,
-    name="Training Salary Distribution"
-))
-
-fig_dist.add_vline(
-    x=salary_pred,
-    line_width=3,
-    line_color="red",
-    annotation_text="Predicted Salary",
-    annotation_position="top"
-)
+    # ---------------------------------------------------------
+    # FEATURE IMPORTANCE (FIXED)
+    # ---------------------------------------------------------
+    st.subheader("📌 Feature Importance (Random Forest)")
+    st.caption("This chart shows which input features the model relies on most overall, across all predictions.")
 
-fig_dist.update_layout(
-    xaxis_title="Salary (USD)",
-    yaxis_title="Count",
-    template="plotly_white",
-    height=450
-)
+    # Same for every prediction: built once per model (figure_cache.py)
+    def build_importance():
+        # Importances summed over each feature's one-hot columns
+        importance_dict = dict(zip(rf_engine.features, rf_engine.feature_importances()))
 
-st.plotly_chart(fig_dist, use_container_width=True)
+        # Plot importances
+        imp_df = pd.DataFrame({
+            "feature": list(importance_dict.keys()),
+            "importance": list(importance_dict.values())
+        }).sort_values("importance", ascending=False)
+
+        fig_imp = go.Figure()
+
+        fig_imp.add_trace(go.Bar(
+            x=imp_df["importance"],
+            y=imp_df["feature"],
+            orientation="h",
+            marker=dict(
+                color=imp_df["importance"],
+                colorscale="Blues",
+                line=dict(color="black", width=1)
+            )
+        ))
+
+        fig_imp.update_layout(
+            xaxis_title="Importance Score",
+            yaxis_title="Feature",
+            template="plotly_white",
+            height=450
+        )
+        return fig_imp
+
+    fig_imp = cached_figure("predict", "feature_importance", data.version, build_importance)
+    st.plotly_chart(fig_imp, use_container_width=True)
+
+    what_if_section(what_if_grid, rf_engine, job, comp_loc, emp_res, remote, emp_type)
+
+
+prediction_section(data, df, rf_engine, what_if_grid)
 
 # ---------------------------------------------------------
-# FEATURE IMPORTANCE (FIXED)
+# BATCH PREDICTION (CSV UPLOAD)
 # ---------------------------------------------------------
-st.subheader("📌 Feature Importance (Random Forest)")
-st.caption("This chart shows which input features influenced the salary prediction the most.")
-
-rf = rf_model.named_steps["rf"]
-ohe = rf_model.named_steps["prep"].named_transformers_["cat"]
-
-# Number of OHE outputs per feature
-category_sizes = [len(ohe.categories_[i]) for i in range(len(FEATURES))]
-
-# Aggregate importances
-importances = rf.feature_importances_
-importance_dict = {}
-index = 0
-for feat, size in zip(FEATURES, category_sizes):
-    importance_dict[feat] = importances[index:index+size].sum()
-    index += size
-
-# Plot importances
-imp_df = pd.DataFrame({
-    "feature": list(importance_dict.keys()),
-    "importance": list(importance_dict.values())
-}).sort_values("importance", ascending=False)
-
-fig_imp = go.Figure()
-
-fig_imp.add_trace(go.Bar(
-    x=imp_df["importance"],
-    y=imp_df["feature"],
-    orientation="h",
-    marker=dict(
-        color=imp_df["importance"],
-        colorscale="Blues",
-        line=dict(color="black", width=1)
+# Uploads rerun only this fragment
+@fragment("batch")
+def batch_section(rf_engine, template):
+    st.markdown("---")
+    st.subheader("📂 Batch Prediction")
+    st.caption(
+        "Upload a CSV with the columns " + ", ".join(f"`{c}`" for c in rf_engine.features) +
+        " to score many profiles at once. Each row gets a predicted salary and a P10–P90 range "
+        "from the spread of the forest's individual trees."
     )
-))
 
-fig_imp.update_layout(
-    xaxis_title="Importance Score",
-    yaxis_title="Feature",
-    template="plotly_white",
-    height=450
-)
+    st.download_button(
+        "Download CSV template",
+        template.to_csv(index=False),
+        file_name="salary_batch_template.csv",
+        mime="text/csv"
+    )
 
-st.plotly_chart(fig_imp, use_container_width=True)
+    uploaded = st.file_uploader("Upload profiles (CSV)", type="csv")
+    if uploaded is not None:
+        profiles = pd.read_csv(uploaded, dtype=str, keep_default_na=False)
+        try:
+            progress = st.progress(0.0, text="Scoring...")
+            results = predict_frame(
+                rf_engine, profiles, chunksize=20_000,
+                progress=lambda done, total: progress.progress(done / total, text=f"Scored {done:,} of {total:,} rows")
+            )
+        except BatchValidationError as err:
+            progress.empty()
+            st.error(str(err))
+        else:
+            if results is None:
+                st.warning("The uploaded file has no rows.")
+            else:
+                flagged = int((results["status"] != "ok").sum())
+
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Profiles scored", f"{results['predicted_salary'].notna().sum():,}")
+                m2.metric("Median predicted salary", f"${results['predicted_salary'].median():,.0f}")
+                m3.metric("Rows flagged", f"{flagged:,}")
+                if flagged:
+                    st.caption("Flagged rows have an empty value (not scored) or a value the model has never seen "
+                               "(scored with that field ignored); see the `status` column.")
+
+                st.dataframe(results.head(1000), use_container_width=True)
+                st.download_button(
+                    "Download predictions",
+                    results.to_csv(index=False, float_format="%.2f"),
+                    file_name="salary_predictions.csv",
+                    mime="text/csv"
+                )
+
+
+batch_section(rf_engine, df[rf_engine.features].head(1))
+
+end_page()
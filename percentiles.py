@@ -0,0 +1,164 @@
+"""Per-group salary percentiles for the dashboard tables.
+
+``ExactPercentiles`` keeps every salary sorted within its group (one values
+array plus group offsets), so medians and P10/P25/P75/P90 for all groups are
+a handful of vectorized lookups. ``ApproxPercentiles`` keeps one
+``QuantileSketch`` per group instead: memory is bounded by the number of
+groups, not rows, and it can be fed chunk by chunk. ``get_percentiles`` picks
+one per dataset version and caches it on the ``Dataset`` handle.
+"""
+import numpy as np
+import pandas as pd
+
+from sketches import QuantileSketch
+
+VALUE = "salary_in_usd"
+PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+# Above this many rows get_percentiles switches to sketches by default
+APPROXIMATE_ABOVE = 5_000_000
+SKETCH_K = 400
+CHUNKSIZE = 1_000_000
+
+
+def column_name(q):
+    """Table column for quantile ``q``: 0.5 -> ``p50``."""
+    return f"p{round(q * 100):g}"
+
+
+def _codes(keys, groups=None):
+    """Integer group codes for ``keys`` (-1 for missing) and the group labels."""
+    keys = pd.Series(keys)
+    if not isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = keys.astype("category")
+    codes = keys.cat.codes.to_numpy()
+    if groups is None:
+        return codes, keys.cat.categories
+    mapping = groups.get_indexer(keys.cat.categories)
+    return np.where(codes >= 0, mapping[codes], -1), groups
+
+
+class _PercentileTable:
+    """Shared ``table`` for both engines; subclasses provide ``counts`` and ``quantiles``."""
+
+    def table(self, q=PERCENTILES):
+        """``count`` and one ``pNN`` column per quantile, for every non-empty group."""
+        q = tuple(q)
+        if q not in self._tables:
+            table = pd.DataFrame(self.quantiles(q), index=self.groups, columns=[column_name(x) for x in q])
+            table.insert(0, "count", self.counts)
+            self._tables[q] = table[table["count"] > 0]
+        return self._tables[q]
+
+
+class ExactPercentiles(_PercentileTable):
+    """Salaries sorted within each group; percentiles match ``Series.quantile``.
+
+    ``values[offsets[i]:offsets[i + 1]]`` is group ``groups[i]`` in ascending
+    order, so a quantile is two reads and a linear interpolation per group.
+    """
+
+    approximate = False
+
+    def __init__(self, keys, values):
+        codes, self.groups = _codes(keys)
+        values = np.asarray(values, dtype=float)
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        order = np.lexsort((values, codes))
+        self.values = values[order]
+        self.offsets = np.searchsorted(codes[order], np.arange(len(self.groups) + 1))
+        self._tables = {}
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def group_values(self, key):
+        """Sorted salaries of one group."""
+        i = self.groups.get_loc(key)
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def quantiles(self, q):
+        """Array of shape (groups, len(q)); NaN for empty groups."""
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        last = np.maximum(self.counts - 1, 0)[:, None]
+        pos = q[None, :] * last
+        lo = np.floor(pos).astype(np.int64)
+        frac = pos - lo
+        hi = np.minimum(lo + 1, last)
+        if not len(self.values):
+            return np.full((len(self.groups), len(q)), np.nan)
+        start = self.offsets[:-1, None]
+        end = len(self.values) - 1
+        low = self.values[np.minimum(start + lo, end)]
+        high = self.values[np.minimum(start + hi, end)]
+        out = low + (high - low) * frac
+        out[self.counts == 0] = np.nan
+        return out
+
+
+class ApproxPercentiles(_PercentileTable):
+    """One ``QuantileSketch`` per group, fed chunk by chunk with ``update``.
+
+    Memory is O(groups * k) whatever the number of rows; groups with at most
+    ``k`` values stay exact.
+    """
+
+    approximate = True
+
+    def __init__(self, groups=(), k=SKETCH_K):
+        self.k = k
+        self.groups = pd.Index(groups)
+        self.sketches = [QuantileSketch(k=k, seed=i) for i in range(len(self.groups))]
+        self._tables = {}
+
+    def update(self, keys, values):
+        labels = pd.Series(keys).astype("category").cat.categories
+        new = labels[self.groups.get_indexer(labels) < 0]
+        if len(new):
+            self.groups = self.groups.append(new)
+            self.sketches += [QuantileSketch(k=self.k, seed=len(self.sketches) + i) for i in range(len(new))]
+        codes, _ = _codes(keys, self.groups)
+        values = np.asarray(values, dtype=float)
+        order = np.argsort(codes, kind="stable")
+        codes, values = codes[order], values[order]
+        bounds = np.searchsorted(codes, np.arange(len(self.groups) + 1))
+        for i, sketch in enumerate(self.sketches):
+            if bounds[i + 1] > bounds[i]:
+                sketch.update(values[bounds[i]:bounds[i + 1]])
+        self._tables = {}
+        return self
+
+    @property
+    def counts(self):
+        return np.array([sketch.n for sketch in self.sketches], dtype=np.int64)
+
+    def quantiles(self, q):
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if not self.sketches:
+            return np.empty((0, len(q)))
+        return np.vstack([np.atleast_1d(sketch.quantile(q)) for sketch in self.sketches])
+
+
+def build_percentiles(df, by, value=VALUE, approximate=False, chunksize=CHUNKSIZE):
+    """Percentile engine for ``df[value]`` grouped by column ``by``."""
+    if not approximate:
+        return ExactPercentiles(df[by], df[value])
+    keys = df[by]
+    engine = ApproxPercentiles(keys.cat.categories if isinstance(keys.dtype, pd.CategoricalDtype) else ())
+    for start in range(0, len(df), chunksize):
+        engine.update(keys.iloc[start:start + chunksize], df[value].iloc[start:start + chunksize])
+    return engine
+
+
+def get_percentiles(dataset, by, approximate=None):
+    """Percentiles over ``by`` for a ``data_store.Dataset``, built once per version.
+
+    ``approximate=None`` uses sketches only above ``APPROXIMATE_ABOVE`` rows.
+    """
+    if approximate is None:
+        approximate = len(dataset.df) > APPROXIMATE_ABOVE
+    mode = "approx" if approximate else "exact"
+    return dataset.derived(f"percentiles:{by}:{mode}",
+                           lambda ds: build_percentiles(ds.df, by, approximate=approximate))
@@ -0,0 +1,155 @@
+"""Precomputed salary predictions for what-if exploration.
+
+For every ``(job_title, company_location)`` pair in the data, the forest is
+scored once over the full grid of ``GRID_AXES`` (experience x company size x
+remote ratio x employment type) and the results are kept as one dense
+float32 array, shape ``(pairs, 4, 3, 3, 4)``. Questions such as "how does
+pay move with experience and company size" are then array slices, not
+forest calls.
+
+Employee residence is not a grid axis; each pair uses its most common
+residence in the data. The grid is saved next to the model artifact it was
+computed from (``salary_rf_{key}.grid.npz``) and rebuilt when the model is.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from salary_model import MODEL_DIR, RF_PARAMS, artifact_key, load_engine
+
+GRID_AXES = ["experience_level", "company_size", "remote_ratio", "employment_type"]
+PAIR_COLUMNS = ["job_title", "company_location"]
+# Display order along an axis; values the model knows but that are not listed go last
+AXIS_ORDER = {
+    "experience_level": ["EN", "MI", "SE", "EX"],
+    "company_size": ["S", "M", "L"],
+    "employment_type": ["FT", "PT", "CT", "FL"],
+}
+
+
+def grid_axes(engine):
+    """Values of each ``GRID_AXES`` feature the model was trained on, in display order."""
+    axes = {}
+    for name in GRID_AXES:
+        known = engine.categories[engine.features.index(name)].tolist()
+        order = [v for v in AXIS_ORDER.get(name, []) if v in known]
+        axes[name] = order + [v for v in known if v not in order]
+    return axes
+
+
+def encode_grid(engine, jobs, locations, residences, axes):
+    """Encoded rows for every pair x grid cell, pair-major then ``GRID_AXES`` in C order."""
+    shape = [len(jobs)] + [len(axes[name]) for name in GRID_AXES]
+    fixed = {"job_title": jobs, "company_location": locations, "employee_residence": residences}
+    active = np.empty(shape + [len(engine.features)], dtype=np.int32)
+    for f, name in enumerate(engine.features):
+        if name in fixed:
+            dim, values = 0, np.asarray(fixed[name], dtype=object)
+        elif name in axes:
+            dim, values = GRID_AXES.index(name) + 1, np.asarray(axes[name])
+        else:
+            raise ValueError(f"Model feature {name!r} is neither a grid axis nor fixed per pair")
+        view = [1] * len(shape)
+        view[dim] = -1
+        active[..., f] = engine.encode_column(f, values).reshape(view)
+    return active.reshape(-1, len(engine.features))
+
+
+class PredictionGrid:
+    """Predicted salary (USD) per pair and grid cell.
+
+    ``values[p]`` is pair ``p``'s cube with one axis per ``GRID_AXES`` entry,
+    labelled by ``axes``.
+    """
+
+    def __init__(self, jobs, locations, residences, axes, values):
+        self.jobs = list(jobs)
+        self.locations = list(locations)
+        self.residences = list(residences)
+        self.axes = axes
+        self.values = values
+        self.index = {pair: p for p, pair in enumerate(zip(self.jobs, self.locations))}
+
+    @classmethod
+    def build(cls, engine, df):
+        """Score every seen pair over the whole grid in one forest call."""
+        residence = (df.groupby(PAIR_COLUMNS, observed=True)["employee_residence"]
+                     .agg(lambda s: s.value_counts().index[0]))
+        jobs = residence.index.get_level_values(0).astype(str).tolist()
+        locations = residence.index.get_level_values(1).astype(str).tolist()
+        residences = residence.astype(str).tolist()
+        axes = grid_axes(engine)
+        values = predict_cells(engine, jobs, locations, residences, axes)
+        return cls(jobs, locations, residences, axes, values)
+
+    @property
+    def shape(self):
+        return tuple(len(self.axes[name]) for name in GRID_AXES)
+
+    def cube(self, job, location, engine=None, residence=None):
+        """The pair's cube; pairs not in the grid are scored with ``engine`` (None without one)."""
+        p = self.index.get((job, location))
+        if p is not None:
+            return self.values[p]
+        if engine is None:
+            return None
+        return predict_cells(engine, [job], [location], [residence or location], self.axes)[0]
+
+    def table(self, cube, rows, columns, **fixed):
+        """2-D slice of ``cube`` as a DataFrame; every other axis is pinned by ``fixed``."""
+        index = tuple(slice(None) if name in (rows, columns) else self.axes[name].index(fixed[name])
+                      for name in GRID_AXES)
+        values = cube[index]
+        if GRID_AXES.index(rows) > GRID_AXES.index(columns):
+            values = values.T
+        return pd.DataFrame(values, index=self.axes[rows], columns=self.axes[columns])
+
+    def what_if(self, job, location, engine=None, residence=None, **fixed):
+        """The What-if Explorer's experience x company size table for a pair; ``fixed`` pins the other axes."""
+        return self.table(self.cube(job, location, engine, residence), "experience_level", "company_size", **fixed)
+
+    # ----------- Persistence -----------
+    def save(self, path):
+        """Write the grid as one uncompressed ``.npz`` (written to a temp file, then renamed)."""
+        meta = {"axes": self.axes, "jobs": self.jobs, "locations": self.locations, "residences": self.residences}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, values=self.values, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            meta = json.loads(str(saved["meta"]))
+            values = saved["values"]
+        return cls(meta["jobs"], meta["locations"], meta["residences"], meta["axes"], values)
+
+    def __repr__(self):
+        return f"PredictionGrid(pairs={len(self.jobs)}, cells={self.shape}, {self.values.nbytes / 2**20:.1f} MB)"
+
+
+def predict_cells(engine, jobs, locations, residences, axes):
+    """float32 salaries, shape ``(pairs, *axis sizes)``."""
+    active = encode_grid(engine, jobs, locations, residences, axes)
+    shape = [len(jobs)] + [len(axes[name]) for name in GRID_AXES]
+    return np.expm1(engine.predict_encoded(active)).astype(np.float32).reshape(shape)
+
+
+def grid_path(key, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, f"salary_rf_{key}.grid.npz")
+
+
+def load_grid(dataset, engine=None, params=RF_PARAMS, model_dir=MODEL_DIR):
+    """The grid for the current model, computed and saved on a miss."""
+    path = grid_path(artifact_key(dataset.version, params), model_dir)
+    if os.path.exists(path):
+        return PredictionGrid.load(path)
+    grid = PredictionGrid.build(engine or load_engine(dataset, params, model_dir), dataset.df)
+    try:
+        grid.save(path)
+    except OSError:
+        pass  # read-only deployment: keep the in-memory grid
+    return grid
@@ -0,0 +1,350 @@
+"""Standalone HTTP salary prediction service (asyncio, standard library only).
+
+    python prediction_service.py serve --port 8765
+    python prediction_service.py loadtest --requests 5000 --concurrency 64
+
+Uses the same model as the Predictive Model page (``salary_model.load_engine``).
+
+* ``POST /predict``: one profile object, or ``{"profiles": [...]}``. Returns
+  ``{"predictions": [{predicted_salary, salary_p10, salary_p90, status}, ...]}``.
+* ``GET /metrics``: request counts, batch sizes and p50/p99 latency.
+* ``GET /health``
+
+Requests arriving within ``--window-ms`` of each other are scored together in
+one forest evaluation (micro-batching), so throughput under concurrent load
+is bounded by traversal work, not per-request overhead. ``loadtest`` starts
+the service in-process (or targets ``--host/--port``), drives it from many
+keep-alive connections and checks every answer against a direct prediction.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from batch_predict import INTERVAL, BatchValidationError, prepare_records
+from data_store import get_dataset
+from salary_model import FEATURES, load_engine
+
+HOST = "127.0.0.1"
+PORT = 8765
+BATCH_WINDOW_MS = 2.0
+MAX_BATCH_ROWS = 4096
+MAX_BODY_BYTES = 8 << 20
+LATENCY_WINDOW = 10_000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+# ----------- Micro-batching -----------
+class MicroBatcher:
+    """Collects encoded rows from concurrent requests and scores them in one call."""
+
+    def __init__(self, engine, window_ms=BATCH_WINDOW_MS, max_rows=MAX_BATCH_ROWS, interval=INTERVAL):
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self.interval = list(interval)
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.rows = 0
+        self.largest = 0
+
+    async def predict(self, active):
+        """``(mean, bands)`` for encoded rows, once their batch has been scored."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((active, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            # Let requests that arrive within the window join this batch
+            await asyncio.sleep(self.window)
+            rows = len(items[0][0])
+            while rows < self.max_rows and not self.queue.empty():
+                items.append(self.queue.get_nowait())
+                rows += len(items[-1][0])
+            active = np.concatenate([rows_ for rows_, _ in items])
+            try:
+                mean, bands = await loop.run_in_executor(
+                    None, self.engine.predict_intervals_encoded, active, self.interval)
+            except Exception as err:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(err)
+                continue
+            self.batches += 1
+            self.rows += len(active)
+            self.largest = max(self.largest, len(active))
+            start = 0
+            for rows_, future in items:
+                stop = start + len(rows_)
+                if not future.done():
+                    future.set_result((mean[start:stop], bands[start:stop]))
+                start = stop
+
+
+# ----------- Service -----------
+class PredictionService:
+    """HTTP front end: parses requests, validates profiles, feeds the batcher."""
+
+    def __init__(self, engine, window_ms=BATCH_WINDOW_MS, max_rows=MAX_BATCH_ROWS):
+        self.engine = engine
+        self.batcher = MicroBatcher(engine, window_ms, max_rows)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+        self._tasks = []
+
+    async def start(self, host=HOST, port=PORT):
+        self._tasks.append(asyncio.create_task(self.batcher.run()))
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def predict(self, payload):
+        profiles = payload.get("profiles", [payload]) if isinstance(payload, dict) else payload
+        if not isinstance(profiles, list) or not all(isinstance(p, dict) for p in profiles):
+            raise BatchValidationError("Expected a profile object or {\"profiles\": [objects]}")
+        if not profiles:
+            return {"predictions": []}
+        active, valid, status = prepare_records(self.engine, profiles)
+        mean, bands = await self.batcher.predict(active)
+        predictions = []
+        for i in range(len(profiles)):
+            ok = bool(valid[i])
+            predictions.append({
+                "predicted_salary": float(np.expm1(mean[i])) if ok else None,
+                "salary_p10": float(np.expm1(bands[i, 0])) if ok else None,
+                "salary_p90": float(np.expm1(bands[i, -1])) if ok else None,
+                "status": status[i],
+            })
+        return {"predictions": predictions}
+
+    def metrics(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "uptime_s": round(time.time() - self.started, 1),
+            "batches": self.batcher.batches,
+            "rows_scored": self.batcher.rows,
+            "mean_batch_rows": self.batcher.rows / self.batcher.batches if self.batcher.batches else 0.0,
+            "largest_batch_rows": self.batcher.largest,
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "p99": float(np.percentile(latencies, 99)) if len(latencies) else None,
+                "window": len(latencies),
+            },
+        }
+
+    async def route(self, method, path, body):
+        if path == "/predict":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                return 200, await self.predict(json.loads(body or b"null"))
+            except (ValueError, BatchValidationError) as err:
+                return 400, {"error": str(err)}
+        if path in ("/metrics", "/health"):
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, self.metrics() if path == "/metrics" else {"status": "ok", "model_trees": self.engine.n_trees}
+        return 404, {"error": f"no route {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_message(reader)
+                if request is None:
+                    break
+                (method, path, _), headers, body = request
+                start = time.perf_counter()
+                if body is None:
+                    status, payload = 413, {"error": f"body over {MAX_BODY_BYTES} bytes"}
+                elif body is INVALID_LENGTH:
+                    status, payload = 400, {"error": f"invalid Content-Length {headers['content-length']!r}"}
+                else:
+                    try:
+                        status, payload = await self.route(method, path.split("?")[0], body)
+                    except Exception as err:
+                        status, payload = 500, {"error": repr(err)}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if path.startswith("/predict"):
+                    self.requests += 1
+                    self.errors += status != 200
+                    self.latencies.append(time.perf_counter() - start)
+                # Without a usable length the rest of the stream cannot be framed
+                if not keep_alive or body is None or body is INVALID_LENGTH:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# ----------- HTTP helpers -----------
+INVALID_LENGTH = object()
+
+
+async def read_message(reader):
+    """``(start_line_parts, headers, body)`` of one HTTP/1.1 message, or None at EOF.
+
+    ``body`` is None when it exceeds ``MAX_BODY_BYTES``, and ``INVALID_LENGTH``
+    when Content-Length is not a non-negative integer.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    start = line.decode("latin-1").split(None, 2)
+    if len(start) != 3:
+        raise ConnectionError(f"malformed start line {line[:80]!r}")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length", "0")
+    if not (length.isascii() and length.isdigit()):
+        return start, headers, INVALID_LENGTH
+    length = int(length)
+    if length > MAX_BODY_BYTES:
+        return start, headers, None
+    body = await reader.readexactly(length) if length else b""
+    return start, headers, body
+
+
+def encode_response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+def encode_request(method, path, payload=None, host=HOST):
+    body = b"" if payload is None else json.dumps(payload).encode()
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+# ----------- Load test client -----------
+async def load_test(host, port, profiles, expected, requests=2000, concurrency=64):
+    """Fire ``requests`` single-profile calls over ``concurrency`` connections.
+
+    ``expected[i]`` is the directly computed salary for ``profiles[i]``; any
+    answer that differs is counted as a mismatch.
+    """
+    latencies, mismatches, failures = [], 0, 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal mismatches, failures
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in counter:
+                i = random.randrange(len(profiles))
+                start = time.perf_counter()
+                writer.write(encode_request("POST", "/predict", profiles[i], host))
+                await writer.drain()
+                (_, status, _), _, body = await read_message(reader)
+                latencies.append(time.perf_counter() - start)
+                if status != "200":
+                    failures += 1
+                elif json.loads(body)["predictions"][0]["predicted_salary"] != expected[i]:
+                    mismatches += 1
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode_request("GET", "/metrics", host=host))
+    await writer.drain()
+    _, _, body = await read_message(reader)
+    writer.close()
+    await writer.wait_closed()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "client_latency_ms": {"p50": float(np.percentile(ms, 50)), "p99": float(np.percentile(ms, 99))},
+        "failures": failures,
+        "mismatches": mismatches,
+        "server": json.loads(body),
+    }
+
+
+def sample_profiles(dataset, n=500, seed=0):
+    """Real feature rows as JSON-ready dicts."""
+    rows = dataset.df[FEATURES].sample(n=min(n, len(dataset.df)), random_state=seed)
+    return [{name: (value.item() if hasattr(value, "item") else value) for name, value in row.items()}
+            for row in rows.to_dict("records")]
+
+
+async def _serve(args):
+    service = PredictionService(load_engine(get_dataset()), args.window_ms, args.max_rows)
+    server = await service.start(args.host, args.port)
+    print(f"Serving salary predictions on http://{args.host}:{args.port} (POST /predict, GET /metrics)")
+    async with server:
+        await server.serve_forever()
+
+
+async def _load_test(args):
+    dataset = get_dataset()
+    engine = load_engine(dataset)
+    profiles = sample_profiles(dataset)
+    expected = [float(np.expm1(engine.predict_one(p))) for p in profiles]
+    server = None
+    if args.port is None:
+        service = PredictionService(engine, args.window_ms, args.max_rows)
+        server = await service.start(args.host, 0)
+        args.port = server.sockets[0].getsockname()[1]
+    try:
+        return await load_test(args.host, args.port, profiles, expected, args.requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Salary prediction HTTP service.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("serve", "loadtest"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--host", default=HOST)
+        cmd.add_argument("--port", type=int, default=PORT if name == "serve" else None,
+                         help=None if name == "serve" else "target a running service (default: start one in-process)")
+        cmd.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+        cmd.add_argument("--max-rows", type=int, default=MAX_BATCH_ROWS)
+        if name == "loadtest":
+            cmd.add_argument("--requests", type=int, default=2000)
+            cmd.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        asyncio.run(_serve(args))
+    else:
+        print(json.dumps(asyncio.run(_load_test(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,522 @@
-import pandas as pd
-import numpy as np
+import argparse
+import hashlib
+import io
+import itertools
+import json
 import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from data_store import DTYPES, write_snapshot, write_snapshot_chunks
+from sketches import QuantileSketch
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+RAW_PATH = os.path.join(script_dir, "salaries_cyber.csv")
+CLEAN_PATH = os.path.join(script_dir, "salaries_cyber_clean.csv")
+STATE_PATH = os.path.join(script_dir, "preprocessing_state.json")
+
+MISSING_THRESHOLD = 0.5          # drop columns/rows with more than 50% missing
+CLIP_QUANTILES = (0.01, 0.99)    # outlier clipping bounds
+SKETCH_K = 2048                  # sketch size: exact up to this many rows, ~0.1% rank error beyond
+DRIFT_TOLERANCE = 0.02           # incremental mode: max stat change (share of clip range) before a full recompute
+
+
+# =====================================================================
+# CLEANING KERNELS (shared by every mode)
+# =====================================================================
+def read_raw(file_path, **kwargs):
+    """``pd.read_csv`` with text columns parsed straight into categoricals.
+
+    The parser then factorizes each text column while reading, so the kernels
+    below work on codes and a handful of categories instead of row strings.
+    """
+    sample = pd.read_csv(file_path, nrows=1000)
+    text_cols = sample.select_dtypes(exclude=[np.number]).columns
+    return pd.read_csv(file_path, dtype=dict.fromkeys(text_cols, 'category'), **kwargs)
+
+
+def normalize_text(values, fill=np.nan):
+    """Fill, strip and uppercase a text column, touching each distinct value once.
+
+    Codes come from the categorical (or from ``pd.factorize``); only the
+    uniques are transformed, then the codes are remapped onto the cleaned,
+    possibly merged, uniques. Missing entries take ``fill``; a missing value
+    left unfilled becomes "NAN" as ``astype(str)`` would. Returns a Categorical.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    # Code -1 (missing) indexes the trailing fill slot
+    uniques = np.append(np.asarray(uniques, dtype=object), fill)
+    cleaned = pd.Index(uniques.astype(str)).str.strip().str.upper()
+    remap, categories = pd.factorize(cleaned)
+    return pd.Categorical.from_codes(remap[codes], categories)
+
+
+def prepare_frame(df, num_cols, cat_cols, fill):
+    """Fill, coerce, round and normalise text with whole-frame operations."""
+    num_fill = {col: fill[col] for col in num_cols if df[col].hasnans}
+    if num_fill:
+        df = df.fillna(num_fill)
+    # Columns that already parsed as numbers skip the to_numeric round-trip
+    unparsed = [col for col in num_cols if not pd.api.types.is_numeric_dtype(df[col])]
+    if unparsed:
+        df[unparsed] = df[unparsed].apply(pd.to_numeric, errors='coerce')
+    df = df.round(dict.fromkeys(num_cols, 2))
+    return df.assign(**{col: normalize_text(df[col], fill[col]) for col in cat_cols})
+
+
+def clip_frame(df, num_cols, low, high):
+    """Clip every numeric column in one ``np.clip`` against per-column bound arrays.
+
+    Integer columns stay integers when both of their bounds are whole numbers,
+    matching what a per-column ``Series.clip`` does.
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    values = np.clip(df[num_cols].to_numpy(dtype=float), low, high)
+    clipped = {}
+    for i, col in enumerate(num_cols):
+        if (pd.api.types.is_integer_dtype(df[col])
+                and low[i].is_integer() and high[i].is_integer()):
+            clipped[col] = values[:, i].astype('int64')
+        else:
+            clipped[col] = values[:, i]
+    return df.assign(**clipped)
+
+
+# =====================================================================
+# FULL MODE (whole file in memory)
+# =====================================================================
+def run_full(file_path=RAW_PATH, clean_path=CLEAN_PATH):
+    # === 1. Load dataset safely ===
+    df = read_raw(file_path)
+    print("File loaded successfully!")
+    print("Rows:", len(df))
+    print("Columns:", df.columns.tolist())
+    print("\n--- Sample Data ---")
+    print(df.head())
+
+    # === 2. Basic cleaning (minimal but refined) ===
+    df.drop_duplicates(inplace=True)
+
+    # Drop columns/rows with >50% missing
+    df.dropna(axis=1, thresh=len(df)*MISSING_THRESHOLD, inplace=True)
+    df.dropna(axis=0, thresh=len(df.columns)*MISSING_THRESHOLD, inplace=True)
+
+    # Identify numeric and categorical columns
+    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    cat_cols = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
+
+    # Fill values: medians for numbers, modes for text
+    fill = {**df[num_cols].median().to_dict(), **df[cat_cols].mode().iloc[0].to_dict()}
+
+    # === 3-5. Fill, type corrections, rounding and text cleanup ===
+    df = prepare_frame(df, num_cols, cat_cols, fill)
+
+    # === 6. Handle outliers (clip extreme values) ===
+    bounds = df[num_cols].quantile(list(CLIP_QUANTILES))
+    df = clip_frame(df, num_cols, bounds.iloc[0], bounds.iloc[1])
+
+    # === 7. Save cleaned dataset ===
+    df.to_csv(clean_path, index=False, float_format="%.2f")  # keep 2 decimal places clean
+
+    # Typed binary snapshot (memory-mapped by the app instead of re-parsing the CSV)
+    snapshot_info = write_snapshot(df.round(2), clean_path)
+
+    print("\nCleaning complete!")
+    print("Saved as:", clean_path)
+    print("Final shape:", df.shape)
+    print("Snapshot sha256:", snapshot_info["sha256"])
+
+
+# =====================================================================
+# STREAMING MODE (bounded memory, two passes over the raw file)
+# =====================================================================
+class RowHashFilter:
+    """Drops rows whose 64-bit content hash has been seen before.
+
+    Hashes are kept in sorted runs that are merged like a binary counter, so a
+    lookup is a handful of ``searchsorted`` calls. Memory grows by 8 bytes per
+    distinct row, an order of magnitude below the rows themselves.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def unseen(self, chunk):
+        """Boolean mask of rows in ``chunk`` that are not duplicates."""
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        mask = ~pd.Series(hashes).duplicated().to_numpy()
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            mask &= run[pos] != hashes
+
+        fresh = np.unique(hashes[mask])
+        if len(fresh):
+            self.runs.append(fresh)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            newest = self.runs.pop()
+            self.runs[-1] = np.union1d(self.runs[-1], newest)
+        return mask
+
+    def to_array(self):
+        return np.unique(np.concatenate(self.runs)) if self.runs else np.empty(0, dtype=np.uint64)
+
+    @classmethod
+    def from_array(cls, hashes):
+        dedup = cls()
+        if len(hashes):
+            dedup.runs = [np.asarray(hashes, dtype=np.uint64)]
+        return dedup
+
+
+def coerce_chunk(chunk, num_cols):
+    """Give every chunk the same dtypes so row hashes agree across chunks."""
+    for col in chunk.columns:
+        if col in num_cols:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(float)
+        elif pd.api.types.is_numeric_dtype(chunk[col]):
+            chunk[col] = chunk[col].astype(object)
+    return chunk
+
+
+def read_chunks(file_path, chunksize, num_cols, text_cols=()):
+    """Yield raw chunks, text columns parsed as categoricals (see ``read_raw``)."""
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=dict.fromkeys(text_cols, 'category')):
+        yield coerce_chunk(chunk, num_cols)
+
+
+class CleaningStats:
+    """Running statistics behind the streaming and incremental modes.
+
+    ``observe`` folds in de-duplicated raw chunks; ``finalize`` turns the
+    sketches and counters into fill values, clip bounds and categories. The
+    whole accumulator round-trips through JSON for the incremental state file.
+    """
+
+    def __init__(self, columns, num_cols, int_cols):
+        self.columns = list(columns)
+        self.num_cols = [col for col in self.columns if col in num_cols]
+        self.cat_cols = [col for col in self.columns if col not in num_cols]
+        self.int_cols = set(int_cols)
+        self.rows = 0
+        self.non_null = dict.fromkeys(self.columns, 0)
+        self.nulls = dict.fromkeys(self.num_cols, 0)
+        self.sketches = {col: QuantileSketch(k=SKETCH_K, seed=0) for col in self.num_cols}
+        self.counts = {col: Counter() for col in self.cat_cols}
+
+    @classmethod
+    def from_sample(cls, sample):
+        """Pick numeric/integer columns from the dtypes of a raw sample."""
+        num_cols = sample.select_dtypes(include=[np.number]).columns
+        int_cols = sample.select_dtypes(include=['integer']).columns
+        return cls(sample.columns, num_cols, int_cols)
+
+    def observe(self, chunk):
+        self.rows += len(chunk)
+        for col, n in chunk.notna().sum().items():
+            self.non_null[col] += int(n)
+        chunk = chunk.dropna(thresh=len(self.columns)*MISSING_THRESHOLD)
+
+        for col in self.num_cols:
+            values = chunk[col].to_numpy(dtype=float)
+            self.sketches[col].update(values)
+            self.nulls[col] += int(np.isnan(values).sum())
+            if col in self.int_cols and not np.all(np.isnan(values) | (values % 1 == 0)):
+                self.int_cols.discard(col)
+        for col in self.cat_cols:
+            counts = chunk[col].value_counts()
+            self.counts[col].update(counts[counts > 0].to_dict())
+
+    def finalize(self):
+        """Cleaning statistics as a JSON-friendly dict (see ``clean_chunk``)."""
+        keep_cols = [col for col in self.columns if self.non_null[col] >= self.rows*MISSING_THRESHOLD]
+        fill, clip, categories = {}, {}, {}
+        for col in self.num_cols:
+            if col not in keep_cols:
+                continue
+            median = float(self.sketches[col].quantile(0.5))
+            fill[col] = median
+            # Filled values take part in the clip quantiles, as in full mode
+            sketch = self.sketches[col].copy().add(median, self.nulls[col])
+            low, high = sketch.quantile(list(CLIP_QUANTILES))
+            clip[col] = [float(low), float(high)]
+        for col in self.cat_cols:
+            if col not in keep_cols:
+                continue
+            top = max(self.counts[col].values(), default=0)
+            fill[col] = min((v for v, c in self.counts[col].items() if c == top), default="")
+            categories[col] = sorted({str(v).strip().upper() for v in self.counts[col]}
+                                     | {str(fill[col]).strip().upper()})
+
+        integral = [col for col in self.num_cols if col in self.int_cols and col in keep_cols]
+        return {
+            "rows": self.rows,
+            "columns": keep_cols,
+            "num_cols": [col for col in self.num_cols if col in keep_cols],
+            "cat_cols": [col for col in self.cat_cols if col in keep_cols],
+            "integral_cols": integral,
+            "int_cols": [col for col in integral if all(float(b).is_integer() for b in clip[col])],
+            "fill": fill,
+            "clip": clip,
+            "categories": categories,
+        }
+
+    def to_dict(self):
+        return {
+            "columns": self.columns,
+            "num_cols": self.num_cols,
+            "int_cols": sorted(self.int_cols),
+            "rows": self.rows,
+            "non_null": self.non_null,
+            "nulls": self.nulls,
+            "sketches": {col: sketch.to_dict() for col, sketch in self.sketches.items()},
+            "counts": {col: dict(counter) for col, counter in self.counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        acc = cls(state["columns"], state["num_cols"], state["int_cols"])
+        acc.rows = state["rows"]
+        acc.non_null = state["non_null"]
+        acc.nulls = state["nulls"]
+        acc.sketches = {col: QuantileSketch.from_dict(s) for col, s in state["sketches"].items()}
+        acc.counts = {col: Counter(c) for col, c in state["counts"].items()}
+        return acc
+
+
+def scan_stats(file_path, chunksize):
+    """Pass 1: gather fill values, clip bounds and categories in one read.
+
+    Returns ``(acc, dedup, keep_masks)``: the ``CleaningStats`` accumulator,
+    the row-hash filter and one packed duplicate mask per chunk for pass 2.
+    The row-missing threshold is judged on the raw column set because the
+    final one is only known at the end of the pass.
+    """
+    acc = CleaningStats.from_sample(pd.read_csv(file_path, nrows=chunksize))
+    dedup = RowHashFilter()
+    keep_masks = []
+    for chunk in read_chunks(file_path, chunksize, acc.num_cols, acc.cat_cols):
+        mask = dedup.unseen(chunk)
+        keep_masks.append((len(mask), np.packbits(mask)))
+        acc.observe(chunk[mask])
+    return acc, dedup, keep_masks
+
+
+def clean_chunk(chunk, stats):
+    """Apply the full-mode cleaning steps to one chunk with fixed statistics."""
+    chunk = chunk[stats["columns"]].dropna(thresh=len(stats["columns"])*MISSING_THRESHOLD)
+    chunk = prepare_frame(chunk, stats["num_cols"], stats["cat_cols"], stats["fill"])
+    low, high = zip(*(stats["clip"][col] for col in stats["num_cols"])) if stats["num_cols"] else ((), ())
+    chunk = clip_frame(chunk, stats["num_cols"], low, high)
+    return chunk.astype(dict.fromkeys(stats["int_cols"], 'int64'))
+
+
+def snapshot_dtypes(stats):
+    """Snapshot dtypes with categories pinned so every chunk shares one dictionary."""
+    dtypes = dict(DTYPES)
+    for col, values in stats["categories"].items():
+        if dtypes.get(col) == "category":
+            dtypes[col] = pd.CategoricalDtype(values)
+    return dtypes
+
+
+def run_stream(file_path=RAW_PATH, clean_path=CLEAN_PATH, chunksize=100_000):
+    print("Pass 1: scanning", file_path, "in chunks of", chunksize)
+    acc, dedup, keep_masks = scan_stats(file_path, chunksize)
+    stats = acc.finalize()
+    print("Distinct rows:", stats["rows"])
+    print("Columns kept:", stats["columns"])
+    print("Clip bounds:", stats["clip"])
+
+    def cleaned_chunks():
+        chunks = read_chunks(file_path, chunksize, acc.num_cols, acc.cat_cols)
+        for i, (chunk, (n, packed)) in enumerate(zip(chunks, keep_masks)):
+            chunk = clean_chunk(chunk[np.unpackbits(packed, count=n).astype(bool)], stats)
+            chunk.to_csv(clean_path, mode="w" if i == 0 else "a", header=i == 0,
+                         index=False, float_format="%.2f")
+            yield chunk
+
+    print("Pass 2: writing", clean_path)
+    snapshot_info = write_snapshot_chunks(cleaned_chunks(), clean_path, snapshot_dtypes(stats))
+
+    print("\nCleaning complete!")
+    print("Saved as:", clean_path)
+    print("Final rows:", snapshot_info["rows"])
+    print("Snapshot sha256:", snapshot_info["sha256"])
+    return acc, dedup, stats
+
+
+# =====================================================================
+# INCREMENTAL MODE (clean only rows appended since the last run)
+# =====================================================================
+def complete_length(file_path):
+    """Bytes up to and including the last newline (a half-written row is left for later)."""
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        pos = size
+        while pos > 0:
+            step = min(pos, 1 << 16)
+            f.seek(pos - step)
+            i = f.read(step).rfind(b"\n")
+            if i >= 0:
+                return pos - step + i + 1
+            pos -= step
+    return 0
+
+
+def raw_fingerprint(file_path, offset, size=4096):
+    """Hash of the bytes just before ``offset``: detects a rewritten raw file."""
+    with open(file_path, "rb") as f:
+        f.seek(max(0, offset - size))
+        return hashlib.sha256(f.read(min(offset, size))).hexdigest()
+
+
+def read_appended(file_path, start, end, columns, num_cols, chunksize):
+    """Yield the rows stored between byte offsets ``start`` and ``end``."""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = b"".join(itertools.islice(f, chunksize))[:remaining]
+            if not data:
+                break
+            remaining -= len(data)
+            chunk = pd.read_csv(io.BytesIO(data), header=None, names=columns,
+                                dtype={col: 'category' for col in columns if col not in num_cols})
+            yield coerce_chunk(chunk, num_cols)
+
+
+def stats_drift(applied, fresh):
+    """Largest change of a fill value or clip bound, as a share of the old clip range.
+
+    A different column set, a new categorical mode or a column that is no
+    longer integral cannot be patched in place and counts as infinite drift.
+    """
+    if (applied["columns"] != fresh["columns"]
+            or not set(applied["int_cols"]) <= set(fresh["integral_cols"])
+            or any(applied["fill"][col] != fresh["fill"][col] for col in applied["cat_cols"])):
+        return float("inf")
+
+    drift = 0.0
+    for col in applied["num_cols"]:
+        low, high = applied["clip"][col]
+        scale = (high - low) or 1.0
+        pairs = [(applied["fill"][col], fresh["fill"][col]), *zip(applied["clip"][col], fresh["clip"][col])]
+        drift = max(drift, *(abs(a - b) / scale for a, b in pairs))
+    return drift
+
+
+def hashes_path(state_path):
+    return os.path.splitext(state_path)[0] + ".hashes.npy"
+
+
+def load_state(state_path):
+    if not (os.path.exists(state_path) and os.path.exists(hashes_path(state_path))):
+        return None
+    with open(state_path) as f:
+        state = json.load(f)
+    state["dedup"] = RowHashFilter.from_array(np.load(hashes_path(state_path)))
+    return state
+
+
+def save_state(state_path, file_path, offset, applied, acc, dedup):
+    state = {
+        "raw": {
+            "path": os.path.abspath(file_path),
+            "offset": offset,
+            "fingerprint": raw_fingerprint(file_path, offset),
+        },
+        "applied": applied,
+        "accumulator": acc.to_dict(),
+    }
+    with open(state_path, "w") as f:
+        json.dump(state, f)
+    np.save(hashes_path(state_path), dedup.to_array())
+
+
+def rebuild_with_state(file_path, clean_path, state_path, chunksize):
+    end = complete_length(file_path)
+    acc, dedup, stats = run_stream(file_path, clean_path, chunksize)
+    save_state(state_path, file_path, end, stats, acc, dedup)
+
+
+def run_incremental(file_path=RAW_PATH, clean_path=CLEAN_PATH, state_path=STATE_PATH,
+                    tolerance=DRIFT_TOLERANCE, chunksize=100_000):
+    state = load_state(state_path)
+    end = complete_length(file_path)
+    raw = state["raw"] if state else None
+    if (state is None or not os.path.exists(clean_path)
+            or raw["path"] != os.path.abspath(file_path) or end < raw["offset"]
+            or raw_fingerprint(file_path, raw["offset"]) != raw["fingerprint"]):
+        print("No usable state for", file_path, "- running a full streaming rebuild")
+        return rebuild_with_state(file_path, clean_path, state_path, chunksize)
+
+    if end == raw["offset"]:
+        print("No new rows since the last run.")
+        return
+
+    # Pass A: fold the appended rows into the persisted statistics
+    acc = CleaningStats.from_dict(state["accumulator"])
+    dedup, applied = state["dedup"], state["applied"]
+    keep_masks = []
+    for chunk in read_appended(file_path, raw["offset"], end, acc.columns, acc.num_cols, chunksize):
+        mask = dedup.unseen(chunk)
+        keep_masks.append(mask)
+        acc.observe(chunk[mask])
+
+    fresh = acc.finalize()
+    drift = stats_drift(applied, fresh)
+    print(f"New distinct rows: {fresh['rows'] - applied['rows']:,} (drift {drift:.2%}, tolerance {tolerance:.2%})")
+    if drift > tolerance:
+        print("Statistics drifted past the tolerance - running a full recompute")
+        return rebuild_with_state(file_path, clean_path, state_path, chunksize)
+
+    # Pass B: clean the new rows with the statistics already applied to the output
+    applied["rows"] = fresh["rows"]
+    applied["categories"] = {col: sorted(set(applied["categories"][col]) | set(fresh["categories"][col]))
+                             for col in applied["categories"]}
+    chunks = read_appended(file_path, raw["offset"], end, acc.columns, acc.num_cols, chunksize)
+    for chunk, mask in zip(chunks, keep_masks):
+        clean_chunk(chunk[mask], applied).to_csv(clean_path, mode="a", header=False,
+                                                 index=False, float_format="%.2f")
+
+    # Arrow IPC files cannot be appended to; re-stream the already-clean CSV instead
+    snapshot_info = write_snapshot_chunks(pd.read_csv(clean_path, chunksize=chunksize),
+                                          clean_path, snapshot_dtypes(applied))
+    save_state(state_path, file_path, end, applied, acc, dedup)
+    print("Appended to:", clean_path)
+    print("Final rows:", snapshot_info["rows"])
+    print("Snapshot sha256:", snapshot_info["sha256"])
+
+
+# =====================================================================
+# ENTRY POINT
+# =====================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the raw cybersecurity salary dataset.")
+    parser.add_argument("--mode", choices=["full", "stream", "incremental"], default="full",
+                        help="'stream' reads the raw file in chunks and keeps memory bounded; "
+                             "'incremental' cleans only rows appended since the last run")
+    parser.add_argument("--input", default=RAW_PATH)
+    parser.add_argument("--output", default=CLEAN_PATH)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--state", default=STATE_PATH, help="incremental mode state file")
+    parser.add_argument("--tolerance", type=float, default=DRIFT_TOLERANCE,
+                        help="incremental mode: allowed drift before a full recompute")
+    args = parser.parse_args(argv)
+
+    if args.mode == "stream":
+        run_stream(args.input, args.output, args.chunksize)
+    elif args.mode == "incremental":
+        run_incremental(args.input, args.output, args.state, args.tolerance, args.chunksize)
+    else:
+        run_full(args.input, args.output)
+
 
-# === 1. Load dataset safely ===
-script_dir = os.path.dirname(__file__)
-file_path = os.path.join(script_dir, "salaries_cyber.csv")
-
-df = pd.read_csv(file_path)
-print("File loaded successfully!")
-print("Rows:", len(df))
-print("Columns:", df.columns.tolist())
-print("\n--- Sample Data ---")
-print(df.head())
-
-# === 2. Basic cleaning (minimal but refined) ===
-df.drop_duplicates(inplace=True)
-
-# Drop columns/rows with >50% missing
-df.dropna(axis=1, thresh=len(df)*0.5, inplace=True)
-df.dropna(axis=0, thresh=len(df.columns)*0.5, inplace=True)
-
-# Identify numeric and categorical columns
-num_cols = df.select_dtypes(include=[np.number]).columns
-cat_cols = df.select_dtypes(include=['object', 'category']).columns
-
-# Fill missing values
-for col in num_cols:
-    df[col].fillna(df[col].median(), inplace=True)
-for col in cat_cols:
-    df[col].fillna(df[col].mode()[0], inplace=True)
-
-# === 3. Data type corrections ===
-for col in num_cols:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-# === 4. Round numeric columns to remove long decimals ===
-# (Change 2 to 0 if you prefer no decimal points at all)
-df[num_cols] = df[num_cols].round(2)
-
-# === 5. Clean text columns ===
-# Uppercase, strip spaces
-for col in cat_cols:
-    df[col] = df[col].astype(str).str.strip().str.upper()
-
-# === 6. Handle outliers (clip extreme values) ===
-for col in num_cols:
-    low, high = df[col].quantile([0.01, 0.99])
-    df[col] = df[col].clip(lower=low, upper=high)
-
-# === 7. Save cleaned dataset ===
-clean_path = os.path.join(script_dir, "salaries_cyber_clean.csv")
-df.to_csv(clean_path, index=False, float_format="%.2f")  # keep 2 decimal places clean
-
-print("\nCleaning complete!")
-print("Saved as:", clean_path)
-print("Final shape:", df.shape)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Per-rerun timings of the pages: full script runs vs fragment reruns.
+
+Streamlit reruns a page's whole script on any widget change, except for
+widgets inside an ``st.fragment``, which rerun only their fragment.
+``fragment(name)`` is ``st.fragment`` plus a timer; ``start_page`` and
+``end_page`` bracket the full script. Each run is recorded in the session
+(the last ``HISTORY``) with its scope:
+
+- ``"page"``: a full script run;
+- ``"section"``: a fragment executed as part of a full run or of its
+  enclosing fragment;
+- ``"fragment"``: a fragment rerun on its own after one of its widgets
+  changed.
+
+Add ``?timings`` to the URL to see them: a summary per scope in the sidebar
+after full runs, and each fragment rerun's time under the fragment.
+"""
+import time
+from collections import deque
+from functools import wraps
+
+import pandas as pd
+import streamlit as st
+
+HISTORY = 100
+QUERY_PARAM = "timings"
+
+_RECORDS = "_rerun_timings"
+_PAGE = "_rerun_timing_page"
+_PAGE_START = "_rerun_timing_start"
+_DEPTH = "_rerun_timing_depth"
+
+
+def enabled():
+    """Whether the timings are shown (``?timings`` in the URL)."""
+    return QUERY_PARAM in st.query_params
+
+
+def records():
+    """This session's most recent timing records, oldest first."""
+    if _RECORDS not in st.session_state:
+        st.session_state[_RECORDS] = deque(maxlen=HISTORY)
+    return st.session_state[_RECORDS]
+
+
+def record(page, scope, name, seconds):
+    records().append({"page": page, "scope": scope, "name": name, "ms": seconds * 1000})
+
+
+def summary(page):
+    """Runs, mean and last milliseconds per scope and name on ``page``."""
+    frame = pd.DataFrame(list(records()), columns=["page", "scope", "name", "ms"])
+    frame = frame[frame["page"] == page]
+    return (frame.groupby(["scope", "name"], sort=False)["ms"]
+            .agg(runs="size", mean_ms="mean", last_ms="last")
+            .round(1))
+
+
+def start_page(page):
+    """Call right after ``st.set_page_config``: starts timing a full run of ``page``."""
+    st.session_state[_PAGE] = page
+    st.session_state[_PAGE_START] = time.perf_counter()
+    st.session_state[_DEPTH] = 0
+
+
+def end_page():
+    """Call at the end of the script: records the full run (and shows the summary)."""
+    start = st.session_state.pop(_PAGE_START, None)
+    if start is None:
+        return
+    page = st.session_state[_PAGE]
+    record(page, "page", page, time.perf_counter() - start)
+    if enabled():
+        with st.sidebar.expander("⏱️ Rerun timings", expanded=True):
+            st.dataframe(summary(page), use_container_width=True)
+
+
+def fragment(name):
+    """``st.fragment`` that records how long each run of the decorated function takes.
+
+    Pass what the section reads as arguments: a fragment rerun reuses the
+    arguments of the last full run (or enclosing fragment run).
+    """
+    def decorate(func):
+        @wraps(func)
+        def run(*args, **kwargs):
+            nested = _PAGE_START in st.session_state or st.session_state.get(_DEPTH, 0) > 0
+            st.session_state[_DEPTH] = st.session_state.get(_DEPTH, 0) + 1
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                st.session_state[_DEPTH] -= 1
+            seconds = time.perf_counter() - start
+            page = st.session_state.get(_PAGE)
+            record(page, "section" if nested else "fragment", name, seconds)
+            if not nested and enabled():
+                full = [r["ms"] for r in records() if r["page"] == page and r["scope"] == "page"]
+                last = f" (last full run {full[-1]:.0f} ms)" if full else ""
+                st.caption(f"⏱️ {name}: {seconds * 1000:.0f} ms fragment rerun{last}")
+            return result
+        return st.fragment(run)
+    return decorate
@@ -0,0 +1,414 @@
+"""Random Forest salary model: definition, training and persisted artifacts.
+
+The Predictive Model page loads a fitted ``Pipeline`` from ``models/`` instead
+of training in-process. Artifacts are keyed by a hash of the dataset version,
+the hyperparameters and the scikit-learn version, so a stale one is never
+loaded; on a miss the page trains once and saves the result.
+
+Train offline (e.g. as a deploy step) with::
+
+    python salary_model.py train
+
+When rows are appended to the cleaned CSV, the flat engine can be updated
+incrementally offline instead: ``UPDATE_TREES`` trees are fitted on the
+training split and either replace the oldest ones ("rotate", on all of it)
+or are added ("grow", on its most recent rows). Values never seen before
+extend the one-hot space of the existing trees. A full refit happens once
+the staleness budget is spent (``MAX_NEW_ROW_FRACTION``, ``MAX_UPDATES``) or
+when earlier rows changed.
+
+    python salary_model.py update --mode rotate
+
+``train`` replaces an updated engine with the flattened artifact again, so
+the served engine always matches the model whose metrics are reported.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from data_store import CLEAN_CSV, ROOT_DIR, get_dataset
+from forest_engine import META_FILE, FlatForest
+
+MODEL_DIR = os.path.join(ROOT_DIR, "models")
+ARTIFACT_FORMAT = 1
+
+FEATURES = [
+    "job_title",
+    "experience_level",
+    "employment_type",
+    "company_location",
+    "company_size",
+    "employee_residence",
+    "remote_ratio"
+]
+TARGET = "salary_in_usd"
+
+RF_PARAMS = {
+    "n_estimators": 300,
+    "max_depth": 18,
+    "min_samples_split": 4,
+    "min_samples_leaf": 2,
+    "random_state": 42,
+}
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+
+# Node value precision of the flat engine the app loads; "float32" halves the
+# node arrays for < $0.05 of error per prediction (python -m benchmarks.bench_quantized)
+ENGINE_VALUE_DTYPE = "float64"
+
+# Incremental updates: trees fitted per update, and the staleness budget
+# after which the next change triggers a full refit
+LINEAGE_FILE = "lineage.json"
+UPDATE_MODES = ["rotate", "grow"]
+UPDATE_TREES = 50
+MAX_NEW_ROW_FRACTION = 0.25     # rows appended since the last full fit, relative to its rows
+MAX_UPDATES = 5
+RECENT_FRACTION = 0.25          # "grow" fits on at least this share of the latest rows
+
+
+# ----------- Model definition -----------
+def build_pipeline(params=RF_PARAMS):
+    """One-hot encode every feature, then a Random Forest on the log target."""
+    preprocessor = ColumnTransformer(
+        [("cat", OneHotEncoder(handle_unknown="ignore"), FEATURES)],
+        remainder="passthrough"
+    )
+    return Pipeline([
+        ("prep", preprocessor),
+        ("rf", RandomForestRegressor(**params))
+    ])
+
+
+def split(df):
+    """Train/test split used for the page model and its reported metrics."""
+    return train_test_split(df[FEATURES], np.log1p(df[TARGET]), test_size=TEST_SIZE, random_state=SPLIT_SEED)
+
+
+def train_pipeline(df, params=RF_PARAMS):
+    """Fit the pipeline on the training split; returns ``(model, metrics)``."""
+    X_train, X_test, y_train, y_test = split(df)
+    model = build_pipeline(params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    mse = mean_squared_error(y_test, y_pred)
+    metrics = {
+        "mse": float(mse),
+        "rmse": float(np.sqrt(mse)),
+        "r2": float(r2_score(y_test, y_pred)),
+        "fit_seconds": round(fit_seconds, 3),
+    }
+    return model, metrics
+
+
+# ----------- Artifacts -----------
+def artifact_key(version, params=RF_PARAMS):
+    """Hash of everything that changes the fitted model."""
+    spec = {
+        "format": ARTIFACT_FORMAT,
+        "dataset": version,
+        "features": FEATURES,
+        "params": params,
+        "split": [TEST_SIZE, SPLIT_SEED],
+        "sklearn": sklearn.__version__,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def artifact_paths(key, model_dir=MODEL_DIR):
+    """``(model, manifest)`` paths for an artifact key."""
+    base = os.path.join(model_dir, f"salary_rf_{key}")
+    return base + ".joblib", base + ".json"
+
+
+def save_artifact(model, key, info=None, model_dir=MODEL_DIR):
+    """Write the model uncompressed (so it can be memory-mapped) plus a manifest."""
+    os.makedirs(model_dir, exist_ok=True)
+    model_path, manifest_path = artifact_paths(key, model_dir)
+    tmp = f"{model_path}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, model_path)
+    with open(manifest_path, "w") as f:
+        json.dump({"key": key, "sklearn": sklearn.__version__, **(info or {})}, f, indent=2)
+    return model_path
+
+
+def load_artifact(key, model_dir=MODEL_DIR, mmap_mode="r"):
+    """The saved model for ``key``, or None when there is none."""
+    model_path, _ = artifact_paths(key, model_dir)
+    if not os.path.exists(model_path):
+        return None
+    return joblib.load(model_path, mmap_mode=mmap_mode)
+
+
+def load_metrics(dataset, params=RF_PARAMS, model_dir=MODEL_DIR):
+    """Held-out metrics saved with the artifact the current engine was flattened from, or None.
+
+    None when no manifest was saved (read-only deployment) or the engine was
+    updated incrementally since, so its trees no longer match the metrics.
+    """
+    key = artifact_key(dataset.version, params)
+    lineage = read_lineage(engine_path(key, model_dir))
+    if lineage and lineage["updates"]:
+        return None
+    try:
+        with open(artifact_paths(key, model_dir)[1]) as f:
+            return json.load(f).get("metrics")
+    except (OSError, ValueError):
+        return None
+
+
+def engine_path(key, model_dir=MODEL_DIR, value_dtype="float64"):
+    """Directory of the flat inference arrays for an artifact key (and quantized precision)."""
+    suffix = "" if value_dtype == "float64" else f".{value_dtype}"
+    return os.path.join(model_dir, f"salary_rf_{key}{suffix}.flat")
+
+
+def save_engine(model, key, model_dir=MODEL_DIR, lineage=None, value_dtype="float64"):
+    """Flatten ``model`` (a Pipeline or a ``FlatForest``) and write it next to the joblib artifact."""
+    path = engine_path(key, model_dir, value_dtype)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    engine = model if isinstance(model, FlatForest) else FlatForest.from_pipeline(model)
+    engine.save(tmp)
+    if lineage is not None:
+        with open(os.path.join(tmp, LINEAGE_FILE), "w") as f:
+            json.dump(lineage, f, indent=2)
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # another process got there first
+    return path
+
+
+def remove_derived(key, model_dir=MODEL_DIR):
+    """Delete everything built from an artifact's model (flat engines, quantized copies, What-if grid)."""
+    keep = set(artifact_paths(key, model_dir))
+    for path in glob.glob(os.path.join(model_dir, f"salary_rf_{key}.*")):
+        if path not in keep:
+            shutil.rmtree(path, ignore_errors=True) if os.path.isdir(path) else os.remove(path)
+
+
+def load_or_train(dataset, params=RF_PARAMS, model_dir=MODEL_DIR):
+    """Load the artifact matching ``dataset.version``; train and save it on a miss."""
+    key = artifact_key(dataset.version, params)
+    model = load_artifact(key, model_dir)
+    if model is None:
+        model, metrics = train_pipeline(dataset.df, params)
+        try:
+            save_artifact(model, key, {"dataset": dataset.version, "params": params, "metrics": metrics}, model_dir)
+        except OSError:
+            pass  # read-only deployment: keep the in-memory model
+    return model
+
+
+def load_engine(dataset, params=RF_PARAMS, model_dir=MODEL_DIR, incremental=False,
+                value_dtype=ENGINE_VALUE_DTYPE):
+    """Memory-mapped ``FlatForest`` for the current model, built on a miss.
+
+    A miss trains the full model. With ``incremental`` it first tries
+    ``update_engine`` from an engine trained on a prefix of this data; the
+    app leaves that to ``python salary_model.py update``.
+    A ``value_dtype`` other than float64 loads (or writes) the quantized copy.
+    """
+    key = artifact_key(dataset.version, params)
+    if value_dtype != "float64":
+        path = engine_path(key, model_dir, value_dtype)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            return FlatForest.load(path)
+        engine = load_engine(dataset, params, model_dir, incremental).quantize(value_dtype)
+        try:
+            return FlatForest.load(save_engine(engine, key, model_dir, value_dtype=value_dtype))
+        except OSError:
+            return engine
+    path = engine_path(key, model_dir)
+    if os.path.exists(os.path.join(path, META_FILE)):
+        return FlatForest.load(path)
+    if incremental:
+        engine, _ = update_engine(dataset, params, model_dir)
+        if engine is not None:
+            return engine
+    model = load_or_train(dataset, params, model_dir)
+    try:
+        return FlatForest.load(save_engine(model, key, model_dir, full_lineage(dataset, params)))
+    except OSError:
+        return FlatForest.from_pipeline(model)
+
+
+# ----------- Incremental updates -----------
+def row_hashes(df):
+    """One uint64 per training row (features and target), for prefix checks."""
+    return pd.util.hash_pandas_object(df[FEATURES + [TARGET]], index=False).to_numpy()
+
+
+def prefix_digest(hashes, rows):
+    return hashlib.sha256(hashes[:rows].tobytes()).hexdigest()[:16]
+
+
+def full_lineage(dataset, params=RF_PARAMS):
+    """Lineage of an engine fitted from scratch on ``dataset``."""
+    rows = len(dataset.df)
+    fit = {"dataset": dataset.version, "rows": rows}
+    return {**fit, "digest": prefix_digest(row_hashes(dataset.df), rows), "params": params,
+            "updates": 0, "full_fit": fit}
+
+
+def read_lineage(path):
+    try:
+        with open(os.path.join(path, LINEAGE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def find_base(dataset, params=RF_PARAMS, model_dir=MODEL_DIR):
+    """``(path, lineage)`` of the saved engine fitted on the longest prefix of ``dataset``, or None."""
+    hashes = row_hashes(dataset.df)
+    best = None
+    try:
+        names = os.listdir(model_dir)
+    except OSError:
+        return None
+    for name in names:
+        if not name.endswith(".flat"):
+            continue
+        path = os.path.join(model_dir, name)
+        lineage = read_lineage(path)
+        if (lineage is None or lineage["params"] != json.loads(json.dumps(params))
+                or lineage["rows"] >= len(hashes) or (best and lineage["rows"] <= best[1]["rows"])):
+            continue
+        if prefix_digest(hashes, lineage["rows"]) == lineage["digest"]:
+            best = path, lineage
+    return best
+
+
+def staleness(lineage, rows):
+    """Why ``rows`` of data need a full refit from this lineage, or None if an update will do."""
+    full_rows = lineage["full_fit"]["rows"]
+    if lineage["updates"] >= MAX_UPDATES:
+        return f"{lineage['updates']} incremental updates since the last full fit"
+    if rows - full_rows > MAX_NEW_ROW_FRACTION * full_rows:
+        return f"{rows - full_rows:,} rows added since the last full fit of {full_rows:,}"
+    return None
+
+
+def update_engine(dataset, params=RF_PARAMS, model_dir=MODEL_DIR, mode="rotate", n_trees=UPDATE_TREES):
+    """Incrementally update the engine of a prefix of ``dataset``; returns ``(engine, message)``.
+
+    ``engine`` is None when a full refit is needed instead (no base engine,
+    earlier rows changed or the staleness budget is spent).
+    """
+    if mode not in UPDATE_MODES:
+        raise ValueError(f"mode must be one of {UPDATE_MODES}")
+    found = find_base(dataset, params, model_dir)
+    if found is None:
+        return None, "no saved engine was trained on a prefix of this data"
+    path, lineage = found
+    df = dataset.df
+    reason = staleness(lineage, len(df))
+    if reason:
+        return None, reason
+
+    base = FlatForest.load(path)
+    categories = [np.union1d(values, np.unique(df[name].dropna().to_numpy(dtype=values.dtype)))
+                  for name, values in zip(base.features, base.categories)]
+    base = base.with_categories(categories)
+    new_rows = len(df) - lineage["rows"]
+    # Only rows of the training split, so the test rows stay unseen
+    train = df[df.index.isin(split(df)[0].index)]
+    if mode == "grow":
+        train = train[train.index.isin(df.index[-max(new_rows, int(len(df) * RECENT_FRACTION)):])]
+    encoder = OneHotEncoder(categories=[list(values) for values in base.categories], handle_unknown="ignore")
+    rf = RandomForestRegressor(**{**params, "n_estimators": n_trees,
+                                  "random_state": params.get("random_state", 0) + lineage["updates"] + 1})
+    rf.fit(encoder.fit_transform(train[FEATURES]), np.log1p(train[TARGET]))
+    owner = np.repeat(np.arange(len(FEATURES)), [len(values) for values in base.categories])
+    fresh = FlatForest.from_trees([est.tree_ for est in rf.estimators_], base.features, base.categories,
+                                  owner, rf.feature_importances_)
+    drop = min(n_trees, base.n_trees - 1) if mode == "rotate" else 0
+    engine = base.merge(fresh, drop=drop)
+
+    key = artifact_key(dataset.version, params)
+    rows = len(df)
+    info = {"dataset": dataset.version, "rows": rows, "digest": prefix_digest(row_hashes(df), rows),
+            "params": params, "updates": lineage["updates"] + 1, "full_fit": lineage["full_fit"],
+            "base": lineage["dataset"], "mode": mode, "new_rows": new_rows, "trees": engine.n_trees}
+    message = (f"{mode}: {n_trees} trees fitted on {len(train):,} rows ({new_rows:,} new), "
+               f"{drop} dropped; update {info['updates']} of {MAX_UPDATES}")
+    try:
+        return FlatForest.load(save_engine(engine, key, model_dir, info)), message
+    except OSError:
+        return engine, message
+
+
+# ----------- CLI -----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and save the salary model artifact.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit the model for the current dataset and save it")
+    train.add_argument("--data", default=CLEAN_CSV, help="cleaned CSV (its Arrow snapshot is used when present)")
+    train.add_argument("--model-dir", default=MODEL_DIR)
+    train.add_argument("--force", action="store_true", help="retrain even if a matching artifact exists")
+    update = sub.add_parser("update", help="incrementally update the flat engine after rows were appended")
+    update.add_argument("--data", default=CLEAN_CSV, help="cleaned CSV (its Arrow snapshot is used when present)")
+    update.add_argument("--model-dir", default=MODEL_DIR)
+    update.add_argument("--mode", choices=UPDATE_MODES, default="rotate",
+                        help="rotate: replace the oldest trees with ones fitted on all training rows; "
+                             "grow: add trees fitted on the most recent training rows")
+    update.add_argument("--trees", type=int, default=UPDATE_TREES)
+    args = parser.parse_args(argv)
+
+    dataset = get_dataset(args.data)
+    key = artifact_key(dataset.version)
+    if args.command == "update":
+        flat = engine_path(key, args.model_dir)
+        if os.path.exists(os.path.join(flat, META_FILE)):
+            print(f"Engine {key} is up to date: {flat}")
+            return
+        engine, message = update_engine(dataset, RF_PARAMS, args.model_dir, args.mode, args.trees)
+        if engine is None:
+            print(f"Full refit needed: {message}")
+            engine = load_engine(dataset, model_dir=args.model_dir, incremental=False)
+        else:
+            print(message)
+        print(f"Saved {flat} ({engine!r})")
+        return
+
+    model_path, manifest_path = artifact_paths(key, args.model_dir)
+    trained = args.force or not os.path.exists(model_path)
+    if not trained:
+        print(f"Artifact {key} is up to date: {model_path}")
+        model = load_artifact(key, args.model_dir)
+    else:
+        print(f"Training on {len(dataset.df):,} rows (dataset {dataset.version})...")
+        model, metrics = train_pipeline(dataset.df)
+        save_artifact(model, key, {"dataset": dataset.version, "params": RF_PARAMS, "metrics": metrics}, args.model_dir)
+        print(f"Saved {model_path}")
+        print(json.dumps(metrics, indent=2))
+    flat = engine_path(key, args.model_dir)
+    lineage = read_lineage(flat)
+    if trained or (lineage and lineage["updates"] > 0):
+        # The served engine must be this artifact's model, not an earlier fit or an incremental update
+        remove_derived(key, args.model_dir)
+    if not os.path.exists(os.path.join(flat, META_FILE)):
+        print(f"Saved {save_engine(model, key, args.model_dir, full_lineage(dataset))}")
+
+
+if __name__ == "__main__":
+    main()
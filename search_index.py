@@ -0,0 +1,147 @@
+"""Prebuilt job-title search for the searchable tables.
+
+The index is built once per dataset version over the unique titles:
+
+* a sorted array of lowercased titles answers prefix queries with two
+  binary searches;
+* an inverted index of 1-, 2- and 3-grams narrows substring queries to a few
+  candidates, which are then verified with ``in``;
+* typo-tolerant matching keeps titles sharing enough trigrams with the query
+  and ranks them by edit distance to their best-matching substring.
+
+Results are integer ids into ``titles`` (sorted, so sorted ids keep
+alphabetical order).
+"""
+import numpy as np
+
+GRAM = 3
+
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def substring_distance(query, text):
+    """Fewest edits turning ``query`` into some substring of ``text``.
+
+    Myers' bit-parallel algorithm: one pass over ``text`` with the DP column
+    held in two bitmasks of ``len(query)`` bits.
+    """
+    m = len(query)
+    if not m:
+        return 0
+    peq = {}
+    for i, ch in enumerate(query):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    best = m
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        if score < best:
+            best = score
+    return best
+
+
+def fuzzy_distance(query):
+    """Edits tolerated for a query of this length: 0 below 4 chars, at most 2."""
+    return min(2, len(query) // 4)
+
+
+class TitleSearchIndex:
+    """Prefix, substring and fuzzy search over unique job titles."""
+
+    def __init__(self, titles):
+        self.titles = np.array(sorted(set(map(str, titles))), dtype=object)
+        self.lower = [title.lower() for title in self.titles]
+        order = np.argsort(np.array(self.lower, dtype=object), kind="stable")
+        self._prefix_keys = np.array(self.lower, dtype=object)[order]
+        self._prefix_ids = order
+        postings = {}
+        for i, title in enumerate(self.lower):
+            for n in range(1, GRAM + 1):
+                for gram in _grams(title, n):
+                    postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._all = np.arange(len(self.titles))
+        self._empty = self._all[:0]
+
+    def __len__(self):
+        return len(self.titles)
+
+    @staticmethod
+    def _normalize(query):
+        return str(query).strip().lower()
+
+    def prefix(self, query):
+        """Ids of titles starting with ``query`` (case-insensitive)."""
+        query = self._normalize(query)
+        if not query:
+            return self._all
+        lo = np.searchsorted(self._prefix_keys, query, side="left")
+        hi = np.searchsorted(self._prefix_keys, query + "\U0010ffff", side="left")
+        return np.sort(self._prefix_ids[lo:hi])
+
+    def contains(self, query):
+        """Ids of titles containing ``query`` (case-insensitive, literal)."""
+        query = self._normalize(query)
+        if not query:
+            return self._all
+        grams = _grams(query, min(len(query), GRAM))
+        lists = sorted((self.postings.get(gram, self._empty) for gram in grams), key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        if len(query) <= GRAM:
+            return candidates
+        return np.array([i for i in candidates if query in self.lower[i]], dtype=candidates.dtype)
+
+    def fuzzy(self, query, max_distance=None):
+        """Ids of titles within ``max_distance`` edits of ``query``, closest first."""
+        query = self._normalize(query)
+        if max_distance is None:
+            max_distance = fuzzy_distance(query)
+        if not query:
+            return self._all
+        grams = _grams(query, GRAM)
+        # Each edit breaks at most GRAM of the query's trigrams
+        needed = len(grams) - GRAM * max_distance
+        if needed > 0:
+            hits = [self.postings[gram] for gram in grams if gram in self.postings]
+            shared = np.bincount(np.concatenate(hits), minlength=len(self)) if hits else np.zeros(len(self))
+            candidates = np.flatnonzero(shared >= needed)
+        else:
+            candidates = self._all
+        scored = []
+        for i in candidates:
+            distance = substring_distance(query, self.lower[i])
+            if distance <= max_distance:
+                scored.append((distance, i))
+        return np.array([i for _, i in sorted(scored)], dtype=np.int64)
+
+    def search(self, query, fuzzy=True):
+        """``(ids, is_fuzzy)``: substring matches, or fuzzy ones when there are none."""
+        ids = self.contains(query)
+        if len(ids) or not fuzzy:
+            return ids, False
+        return self.fuzzy(query), True
+
+
+def get_title_index(dataset):
+    """Search index over the dataset's job titles, built once per version."""
+    return dataset.derived("title_search", lambda ds: TitleSearchIndex(ds.df["job_title"].dropna().unique()))
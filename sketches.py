@@ -0,0 +1,127 @@
+"""Mergeable, bounded-memory quantile sketch (KLL style).
+
+Used wherever a quantile has to be estimated without holding every value:
+streaming preprocessing, aggregate cubes and the approximate percentile mode.
+"""
+import numpy as np
+
+
+class QuantileSketch:
+    """KLL-style quantile sketch over float values.
+
+    Items live in levels; an item on level ``h`` stands for ``2**h`` inputs.
+    When a level overflows it is sorted and every other item is promoted, so
+    memory stays around ``3 * k`` items whatever the input size. Rank error is
+    roughly ``1.7 / k`` of ``n``. While nothing has been compacted the sketch
+    is exact and ``quantile`` matches ``np.quantile`` / ``Series.quantile``.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    # ----------- Updates -----------
+    def update(self, values):
+        """Add an array of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def add(self, value, count):
+        """Add ``count`` copies of ``value`` without materialising them."""
+        count = int(count)
+        if count <= 0 or np.isnan(value):
+            return self
+        self.n += count
+        level = 0
+        while count:
+            if count & 1:
+                self._ensure_level(level)
+                self.levels[level] = np.append(self.levels[level], float(value))
+            count >>= 1
+            level += 1
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch; both must use the same ``k``."""
+        for level, items in enumerate(other.levels):
+            self._ensure_level(level)
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def copy(self):
+        clone = QuantileSketch(k=self.k)
+        clone.n = self.n
+        clone.levels = [items.copy() for items in self.levels]
+        return clone
+
+    def _ensure_level(self, level):
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # An odd item stays behind so total weight is preserved exactly
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self._ensure_level(level + 1)
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    # ----------- Queries -----------
+    @property
+    def is_exact(self):
+        return all(len(items) == 0 for items in self.levels[1:])
+
+    @property
+    def size(self):
+        """Number of retained items."""
+        return sum(len(items) for items in self.levels)
+
+    def quantile(self, q):
+        """Estimate quantile(s) ``q`` in [0, 1]; NaN for an empty sketch."""
+        q = np.asarray(q, dtype=float)
+        if self.n == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        if self.is_exact:
+            return np.quantile(self.levels[0], q)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cum = values[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, q * cum[-1], side="left")
+        return values[np.clip(idx, 0, len(values) - 1)]
+
+    # ----------- Persistence -----------
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "levels": [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(k=state["k"])
+        sketch.n = state["n"]
+        sketch.levels = [np.asarray(items, dtype=float) for items in state["levels"]] or [np.empty(0)]
+        return sketch
+
+    def __repr__(self):
+        return f"QuantileSketch(k={self.k}, n={self.n}, size={self.size})"